@@ -1,12 +1,34 @@
 # main_supremo_todo_scraper_unimarc.py
 
 import requests
-from bs4 import BeautifulSoup
-import json
 import os
+import sqlite3
+from collections.abc import Hashable
 from datetime import datetime
-import time
-import random
+
+import codec_json
+from cache_condicional import CacheCondicional
+from cliente_http import ClienteHttp, crear_sesion
+from contador_bytes import ContadorBytes
+from especificaciones_unimarc import (
+    DATOS_GENERALES_UNIFICADO, DETALLE_PROMOCION_UNIFICADO, ETIQUETA_PROMOCIONAL_UNIFICADA,
+    PRECIO_BASE_UNIFICADO, PRODUCTO_LISTADO_UNIFICADO, PROMOCION_ADICIONAL_UNIFICADA,
+    buscar_especificacion, indexar_queries, indexar_queries_de, nodo_item_precio_unificado,
+    nodo_producto_unificado, nodo_productos_listado_unificado, productos_listado_unificado_perezoso,
+)
+from extraccion import extraer_lote
+from frontera import DETALLE, Frontera
+from limitador_tasa import LimitadorAIMD
+from memo_extraccion import MemoExtraccion
+from motor_descargas import PoliticaCobertura, descargar_y_procesar, descargar_y_procesar_flujo
+from next_data import extraer_next_data
+from next_data_perezoso import PEREZOSA_POR_DEFECTO, NextDataPerezoso
+from recorrido_json import buscar_claves
+from tuberia import ejecutar_tuberia
+from registros_productos import (
+    DatosGeneralesUnificado, DetallePromocionUnificado, EtiquetaPromocionalUnificada, NutricionUnificada,
+    PrecioUnificado, ProductoUnificado, PromocionAdicionalUnificada,
+)
 
 '''
 SCRIPT UNIFICADO SUPREMO DE SCRAPING UNIMARC
@@ -40,6 +62,53 @@ JSON_PRECIOS_DIR = os.path.join(BASE_DIR, "JSON_Precios_Individuales") # Info de
 JSON_NUTRICIONAL_DIR = os.path.join(BASE_DIR, "JSON_Nutricional_Individuales") # Info nutricional procesada
 LISTADOS_DIR = os.path.join(BASE_DIR, "Info_Listados") # JSONs de productos por listado, y URLs de detalle
 
+# Máximo de solicitudes simultáneas en la fase de detalles de productos
+MAX_EN_VUELO_DETALLES = 8
+
+# Transporte HTTP/2 opcional (transporte_http2.py); vuelve a HTTP/1.1 si no está disponible
+USAR_HTTP2 = False
+# Cobertura de latencia (hedged requests) en la fase de detalles: si una descarga supera el
+# percentil de latencia observado se envía un duplicado; como máximo una fracción del total
+USAR_COBERTURA = True
+COBERTURA_PERCENTIL = 0.95
+COBERTURA_FRACCION_MAXIMA = 0.05
+# Listados: decodificar de __NEXT_DATA__ solo las queries con los productos y el total
+# (next_data_perezoso.py) en vez del documento completo. Solo conviene sin orjson/msgspec
+# (benchmark_next_data_perezoso.py)
+DECODIFICACION_PEREZOSA = PEREZOSA_POR_DEFECTO
+# Procesos de parseo de los detalles (motor_descargas.py): el parseo y la extracción de cada producto
+# corren en otros procesos y no le quitan el GIL a las descargas. 0 = en hilos del proceso principal.
+# Los procesos leen la configuración de este archivo (no ven cambios hechos en tiempo de ejecución)
+PROCESOS_PARSEO = max(0, (os.cpu_count() or 1) - 1)
+# Tubería continua (tuberia.py): cada producto se descarga apenas su página de listado entrega la URL,
+# sin esperar a que termine la Fase 1. False = primero todos los listados, después los detalles
+TUBERIA_CONTINUA = True
+# URLs de detalle que pueden esperar entre los listados y los detalles (con la cola llena, los listados esperan)
+TAMANO_COLA_TUBERIA = 256
+# Páginas de listado en vuelo (se recorren de a una); en tubería se suman al pool de conexiones de la sesión
+MAX_EN_VUELO_LISTADOS = 1
+
+# Cache de validadores HTTP (ETag/Last-Modified) + __NEXT_DATA__ de las páginas de producto.
+# Los productos sin cambios desde la corrida anterior responden 304 y no se descargan completos.
+USAR_CACHE_CONDICIONAL = True
+CACHE_CONDICIONAL_DB = os.path.join(BASE_DIR, "cache_condicional.sqlite")
+
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
+# Memo de extracción (memo_extraccion.py): un __NEXT_DATA__ idéntico al de una corrida anterior no se
+# vuelve a decodificar ni a extraer. Subir VERSION_EXTRACCION al cambiar lo que extrae el script
+USAR_MEMO_EXTRACCION = True
+MEMO_EXTRACCION_DB = os.path.join(BASE_DIR, "memo_extraccion.sqlite")
+VERSION_EXTRACCION = 1
+
+# Frontera persistente (frontera.py): estado de cada listado y producto en SQLite. Si una corrida se corta,
+# la siguiente retoma donde quedó. SOLO_FALLIDAS = True solo reintenta las URLs que fallaron
+USAR_FRONTERA = True
+FRONTERA_DB = os.path.join(BASE_DIR, "frontera.sqlite")
+FRONTERA_MAX_INTENTOS = 3
+SOLO_FALLIDAS = False
+
 # Archivo de entrada para URLs de categorías base
 ARCHIVO_URLS_CATEGORIAS_BASE = "links_categorias_unimarc.txt"
 
@@ -57,12 +126,6 @@ def generar_timestamp():
     """Genera un timestamp único para nombrar archivos"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
-def espera_aleatoria(min_seg=1.5, max_seg=3.5):
-    """Espera un tiempo aleatorio entre solicitudes para evitar bloqueos"""
-    wait_time = random.uniform(min_seg, max_seg)
-    print(f"Esperando {wait_time:.2f} segundos...")
-    time.sleep(wait_time)
-
 def leer_urls_base_categorias(archivo):
     """Lee las URLs base de categorías desde un archivo de texto"""
     urls = []
@@ -126,17 +189,19 @@ def get_categoria_from_url(url):
         pass
     return "categoria_desconocida"
 
-def get_total_products_from_listing(soup):
+def get_total_products_from_listing(html):
     """Extrae el número total de productos disponibles en un listado desde __NEXT_DATA__"""
     try:
-        script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
-        if script_tag and script_tag.string:
-            data = json.loads(script_tag.string)
-            queries = data.get("props", {}).get("pageProps", {}).get("dehydratedState", {}).get("queries", [])
-            for query in queries:
-                # La clave puede variar, buscamos una que contenga 'totalProducts'
-                # o algo similar como 'total' dentro de una estructura relacionada con la paginación o productos
-                query_state_data = query.get("state", {}).get("data", {})
+        json_data_string = extraer_next_data(html)
+        if json_data_string:
+            # La clave puede variar, buscamos una que contenga 'totalProducts'
+            # o algo similar como 'total' dentro de una estructura relacionada con la paginación o productos
+            campos_total = ("totalProducts", "recordsFiltered", "productSearch")
+            if DECODIFICACION_PEREZOSA:
+                indice = indexar_queries_de(NextDataPerezoso(json_data_string), *campos_total)
+            else:
+                indice = indexar_queries(codec_json.loads(json_data_string))
+            for query_state_data in indice.datos_con(*campos_total):
                 if "totalProducts" in query_state_data:
                     return query_state_data["totalProducts"]
                 if "recordsFiltered" in query_state_data: # Otra posible clave
@@ -149,72 +214,31 @@ def get_total_products_from_listing(soup):
         print(f"Advertencia: Error al obtener total de productos del listado: {e}")
     return None
 
-def extract_products_from_listing_page(soup, sellos_tipo, categoria):
+def extract_products_from_listing_page(html, sellos_tipo, categoria):
     """Extrae productos y sus URLs de detalle de una página de listado"""
     extracted_products_summary = []
     product_detail_urls = []
     
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
-    if not (script_tag and script_tag.string):
+    json_data_string = extraer_next_data(html)
+    if not json_data_string:
         print("  No se encontró __NEXT_DATA__ en la página de listado.")
         return extracted_products_summary, product_detail_urls
 
     try:
-        data = json.loads(script_tag.string)
-        # La estructura de 'availableProducts' puede variar. Intentar varias rutas comunes.
-        products_list_json = []
-        page_props = data.get("props", {}).get("pageProps", {})
-        
-        # Ruta 1: dehydratedState.queries[*].state.data.availableProducts
-        queries = page_props.get("dehydratedState", {}).get("queries", [])
-        for query_item in queries:
-            state_data = query_item.get("state", {}).get("data", {})
-            if "availableProducts" in state_data and isinstance(state_data["availableProducts"], list):
-                products_list_json = state_data["availableProducts"]
-                break
-            # Ruta alternativa dentro de queries (a veces está anidado bajo 'productSearch')
-            if "productSearch" in state_data and "products" in state_data["productSearch"]:
-                 products_list_json = state_data["productSearch"]["products"]
-                 break
-        
-        if not products_list_json:
-             # Ruta 2: pageProps.products (menos común para listados, más para detalles)
-            if "products" in page_props and isinstance(page_props["products"], list):
-                products_list_json = page_props["products"]
-
+        # La estructura de 'availableProducts' puede variar: se prueban varias rutas comunes
+        # (ver nodo_productos_listado_unificado en especificaciones_unimarc.py)
+        if DECODIFICACION_PEREZOSA:
+            products_list_json = productos_listado_unificado_perezoso(NextDataPerezoso(json_data_string))
+        else:
+            data = codec_json.loads(json_data_string)
+            products_list_json = nodo_productos_listado_unificado(data, indexar_queries(data))
 
         if not products_list_json:
             print("  No se encontró la lista de productos ('availableProducts' o similar) en __NEXT_DATA__.")
             return extracted_products_summary, product_detail_urls
 
-        for product_json in products_list_json:
-            nombre = product_json.get("nameComplete") or product_json.get("productName")
-            marca = product_json.get("brand")
-            sku = product_json.get("itemId") or product_json.get("productId") # itemId es más común en listados
-
-            precio = None
-            sellers = product_json.get("sellers", [])
-            if sellers and isinstance(sellers, list) and len(sellers) > 0:
-                # VTEX a veces tiene 'Price' y otras 'price'
-                price_val = sellers[0].get("commertialOffer", {}).get("Price")
-                if price_val is None:
-                    price_val = sellers[0].get("commertialOffer", {}).get("price")
-                precio = price_val
-
-
-            url_imagen = None
-            images = product_json.get("images", [])
-            if images and isinstance(images, list) and len(images) > 0:
-                # A veces la imagen es un dict con 'imageUrl', otras una string
-                img_data = images[0]
-                if isinstance(img_data, dict):
-                    url_imagen = img_data.get("imageUrl")
-                elif isinstance(img_data, str):
-                    url_imagen = img_data
-
-            url_producto_relativo = product_json.get("linkText") # 'linkText' suele ser el slug para la URL
-            if not url_producto_relativo:
-                 url_producto_relativo = product_json.get("detailUrl") # Alternativa
+        for product_json in extraer_lote(PRODUCTO_LISTADO_UNIFICADO, products_list_json):
+            url_producto_relativo = product_json["url_relativa"] # 'linkText' suele ser el slug para la URL; alternativa 'detailUrl'
 
             url_producto_absoluto = None
             if url_producto_relativo:
@@ -232,24 +256,27 @@ def extract_products_from_listing_page(soup, sellos_tipo, categoria):
             if url_producto_absoluto: # Solo añadir si se pudo construir una URL
                 product_detail_urls.append(url_producto_absoluto)
                 extracted_products_summary.append({
-                    "nombre": nombre,
-                    "marca": marca,
-                    "sku": sku,
-                    "precio_listado": precio,
-                    "url_imagen": url_imagen,
+                    "nombre": product_json["nombre"],
+                    "marca": product_json["marca"],
+                    "sku": product_json["sku"],
+                    "precio_listado": product_json["precio_listado"],
+                    "url_imagen": product_json["url_imagen"],
                     "url_producto_detalle": url_producto_absoluto,
                     "tipo_sello_filtro": sellos_tipo,
                     "categoria_listado": categoria
                 })
-    except json.JSONDecodeError:
+    except codec_json.JSONDecodeError:
         print("  Error al decodificar JSON de __NEXT_DATA__ en página de listado.")
     except Exception as e:
         print(f"  Error al procesar productos del listado desde __NEXT_DATA__: {e}")
     
     return extracted_products_summary, product_detail_urls
 
-def scrape_product_listings(base_url_con_filtro, session):
-    """Procesa todas las páginas de un listado de productos para una categoría y filtro de sello"""
+def scrape_product_listings(base_url_con_filtro, cliente, al_extraer_pagina=None):
+    """
+    Procesa todas las páginas de un listado de productos para una categoría y filtro de sello.
+    al_extraer_pagina(productos, urls), si se indica, recibe cada página apenas se extrae
+    """
     sellos_tipo = get_tipo_sello_from_url(base_url_con_filtro)
     categoria = get_categoria_from_url(base_url_con_filtro)
     
@@ -270,26 +297,26 @@ def scrape_product_listings(base_url_con_filtro, session):
         print(f"  Scraping página {page}: {paginated_url}")
         
         try:
-            response = session.get(paginated_url, headers=HEADERS, timeout=45)
+            response = cliente.get(paginated_url, timeout=(5, 45))
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             print(f"  Error HTTP al acceder a página {page} del listado: {e}")
             break 
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        html = response.content
         
-        # Guardar HTML de la página de listado
+        # Guardar HTML de la página de listado (tal como llegó)
         ts = generar_timestamp()
         listado_html_filename = f"listado_{categoria}_{sellos_tipo}_pagina{page}_{ts}.html"
         listado_html_path = os.path.join(HTML_DIR, listado_html_filename)
         try:
-            with open(listado_html_path, "w", encoding="utf-8") as f:
-                f.write(soup.prettify())
+            with open(listado_html_path, "wb") as f:
+                f.write(html)
         except Exception as e_write:
             print(f"  Advertencia: No se pudo guardar HTML del listado: {e_write}")
 
         if page == 1 and total_products_expected is None:
-            total_products_expected = get_total_products_from_listing(soup)
+            total_products_expected = get_total_products_from_listing(html)
             if total_products_expected is not None:
                 print(f"  Total de productos esperados en este listado: {total_products_expected}")
                 if total_products_expected == 0:
@@ -300,7 +327,7 @@ def scrape_product_listings(base_url_con_filtro, session):
                 # print(f"  Número estimado de páginas: {max_pages}")
 
 
-        products_on_this_page, urls_on_this_page = extract_products_from_listing_page(soup, sellos_tipo, categoria)
+        products_on_this_page, urls_on_this_page = extract_products_from_listing_page(html, sellos_tipo, categoria)
         
         if not products_on_this_page:
             print(f"  No se encontraron más productos en la página {page}. Fin del listado para {categoria} - {sellos_tipo}.")
@@ -309,6 +336,8 @@ def scrape_product_listings(base_url_con_filtro, session):
         all_products_summary_list.extend(products_on_this_page)
         all_product_detail_urls_list.extend(urls_on_this_page)
         print(f"  Extraídos {len(products_on_this_page)} productos de la página {page}.")
+        if al_extraer_pagina is not None:
+            al_extraer_pagina(products_on_this_page, urls_on_this_page)
         
         # Condición de parada más robusta: si se extraen menos productos que el nominal y no es la primera página,
         # o si el total esperado ya se alcanzó (si se conoce).
@@ -320,7 +349,6 @@ def scrape_product_listings(base_url_con_filtro, session):
             break
             
         page += 1
-        espera_aleatoria(1.0, 2.5) # Pausa más corta para listados
 
     # Guardar JSON resumen de productos para este listado específico
     if all_products_summary_list:
@@ -328,8 +356,7 @@ def scrape_product_listings(base_url_con_filtro, session):
         listado_json_filename = f"listado_productos_{categoria}_{sellos_tipo}_{len(all_products_summary_list)}items_{ts}.json"
         listado_json_path = os.path.join(LISTADOS_DIR, listado_json_filename)
         try:
-            with open(listado_json_path, "w", encoding="utf-8") as f_json:
-                json.dump(all_products_summary_list, f_json, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(listado_json_path, all_products_summary_list, compacto=JSON_COMPACTO)
             print(f"  Resumen de productos del listado guardado: {listado_json_path}")
         except Exception as e_write_json:
             print(f"  Advertencia: No se pudo guardar JSON del listado: {e_write_json}")
@@ -338,44 +365,46 @@ def scrape_product_listings(base_url_con_filtro, session):
 
 # --- Funciones de Scraping de Detalles de Producto ---
 
-def find_key_in_json_recursive(data_item, target_key):
-    """Busca recursivamente una clave en un diccionario o lista anidada."""
-    if isinstance(data_item, dict):
-        if target_key in data_item:
-            return data_item[target_key]
-        for key, value in data_item.items():
-            result = find_key_in_json_recursive(value, target_key)
-            if result is not None:
-                return result
-    elif isinstance(data_item, list):
-        for item_element in data_item:
-            result = find_key_in_json_recursive(item_element, target_key)
-            if result is not None:
-                return result
-    return None
+def guardar_json_crudo(json_bytes, product_id_str, timestamp_str):
+    """Escribe el __NEXT_DATA__ ya codificado en RAW_JSON_PRODUCTOS_DIR"""
+    raw_json_filename = f"raw_json_producto_{product_id_str}_{timestamp_str}.json"
+    raw_json_path = os.path.join(RAW_JSON_PRODUCTOS_DIR, raw_json_filename)
+    with open(raw_json_path, "wb") as f:
+        f.write(json_bytes)
+    # print(f"    JSON crudo __NEXT_DATA__ guardado: {raw_json_path}") # Puede ser muy verboso
 
-def extract_and_save_raw_json_product(soup, product_id_str, timestamp_str):
+def extract_and_save_raw_json_product(html, product_id_str, timestamp_str, memo=None):
     """Extrae y guarda el JSON completo de __NEXT_DATA__ de la página de producto"""
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
-    if not (script_tag and script_tag.string):
+    json_data_string = extraer_next_data(html)
+    if not json_data_string:
         print("    No se encontró __NEXT_DATA__ en la página del producto o estaba vacío.")
         return None
     
     try:
-        json_data = json.loads(script_tag.string)
-        raw_json_filename = f"raw_json_producto_{product_id_str}_{timestamp_str}.json"
-        raw_json_path = os.path.join(RAW_JSON_PRODUCTOS_DIR, raw_json_filename)
-        with open(raw_json_path, "w", encoding="utf-8") as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=4)
-        # print(f"    JSON crudo __NEXT_DATA__ guardado: {raw_json_path}") # Puede ser muy verboso
+        json_data = codec_json.loads(json_data_string)
+        json_bytes = codec_json.dumps_bytes(json_data, compacto=JSON_COMPACTO)
+        guardar_json_crudo(json_bytes, product_id_str, timestamp_str)
+        if memo is not None:
+            memo.guardar("raw_json", json_data_string, json_bytes)
         return json_data
-    except json.JSONDecodeError:
+    except codec_json.JSONDecodeError:
         print("    Error al decodificar JSON de __NEXT_DATA__ del producto.")
         return None
     except Exception as e:
         print(f"    Error al guardar JSON crudo del producto: {e}")
         return None
 
+def _en_nombres_listados(nombres):
+    """Pertenencia a allSpecifications con un conjunto (O(1)) en vez de recorrer la lista por cada grupo"""
+    if isinstance(nombres, list):
+        try:
+            conjunto = set(nombres)
+        except TypeError:
+            pass
+        else:
+            return lambda nombre: isinstance(nombre, Hashable) and nombre in conjunto
+    return lambda nombre: nombre in nombres
+
 def extract_product_details_unified(next_data_json, url, product_id_str):
     """
     Extrae detalles completos (generales, nutricionales, precios) de un producto
@@ -384,211 +413,171 @@ def extract_product_details_unified(next_data_json, url, product_id_str):
     if not next_data_json:
         return None
 
-    product_details_obj = {
-        "url_producto": url,
-        "id_producto_scraped": product_id_str, # ID de la URL
-        "fecha_extraccion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "datos_generales": {},
-        "informacion_nutricional_completa": {},
-        "detalles_precio_promocion": {}
-    }
-    
-    page_props = next_data_json.get("props", {}).get("pageProps", {})
+    # Registro compacto por producto (ver registros_productos.py)
+    product_details_obj = ProductoUnificado(
+        url_producto=url,
+        id_producto_scraped=product_id_str, # ID de la URL
+        fecha_extraccion=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        datos_generales=DatosGeneralesUnificado(),
+        informacion_nutricional_completa=NutricionUnificada(),
+        detalles_precio_promocion=PrecioUnificado()
+    )
+    datos_generales = product_details_obj.datos_generales
     
     # --- 1. Datos Generales del Producto ---
-    # Intentar varias rutas para product_data
-    product_data_source = None
-    if "product" in page_props: # Ruta más directa
-        product_data_source = page_props.get("product")
-    
-    if not product_data_source and "dehydratedState" in page_props: # Ruta vía dehydratedState
-        queries = page_props.get("dehydratedState", {}).get("queries", [])
-        for query in queries:
-            # El producto puede estar bajo 'product' o anidado
-            query_data = query.get("state", {}).get("data", {})
-            if "product" in query_data:
-                product_data_source = query_data["product"]
-                break
-            # A veces está en query_data.products[0].item o similar
-            if "products" in query_data and isinstance(query_data["products"], list) and query_data["products"]:
-                # El producto de detalle suele ser uno solo, o el primero de una lista pequeña
-                # La estructura varía: a veces es el item[0] directamente, otras item[0].item
-                potential_product = query_data["products"][0]
-                if isinstance(potential_product, dict):
-                    if "nameComplete" in potential_product: # Señal de que es el objeto producto
-                         product_data_source = potential_product
-                         break
-                    if "item" in potential_product and isinstance(potential_product["item"], dict):
-                         product_data_source = potential_product["item"]
-                         break
+    # Índice de dehydratedState.queries: una sola pasada para todas las búsquedas del producto
+    indice = indexar_queries(next_data_json)
 
+    # Intentar varias rutas para product_data (ver nodo_producto_unificado)
+    product_data_source = nodo_producto_unificado(next_data_json, indice)
 
     if product_data_source:
-        product_details_obj["datos_generales"]["nombre_completo"] = product_data_source.get("nameComplete") or product_data_source.get("productName")
-        product_details_obj["datos_generales"]["nombre_corto"] = product_data_source.get("name")
-        product_details_obj["datos_generales"]["marca"] = product_data_source.get("brand") or product_data_source.get("brandName")
-        product_details_obj["datos_generales"]["sku_principal"] = product_data_source.get("productId") or product_data_source.get("itemId") # SKU del producto
-        product_details_obj["datos_generales"]["id_item"] = product_data_source.get("itemId") # SKU de la variante/item específico
-        product_details_obj["datos_generales"]["id_categoria"] = product_data_source.get("categoryId")
-        product_details_obj["datos_generales"]["descripcion_corta"] = product_data_source.get("description")
+        datos_generales.actualizar(DATOS_GENERALES_UNIFICADO(product_data_source))
         
         images_list = product_data_source.get("images", [])
         if images_list and isinstance(images_list, list):
-            product_details_obj["datos_generales"]["imagenes"] = [img.get("imageUrl") if isinstance(img, dict) else img for img in images_list]
-            if product_details_obj["datos_generales"]["imagenes"]:
-                 product_details_obj["datos_generales"]["imagen_principal_url"] = product_details_obj["datos_generales"]["imagenes"][0]
+            datos_generales.imagenes = [img.get("imageUrl") if isinstance(img, dict) else img for img in images_list]
+            if datos_generales.imagenes:
+                 datos_generales.imagen_principal_url = datos_generales.imagenes[0]
 
         # Especificaciones (allSpecifications y specificationGroups)
         all_specs_names = product_data_source.get("allSpecifications", [])
         spec_groups = product_data_source.get("specificationGroups", [])
         especificaciones_parsed = []
         if all_specs_names and spec_groups:
+            en_nombres_listados = _en_nombres_listados(all_specs_names)
             for group in spec_groups:
-                if group.get("name") in all_specs_names: # Si el grupo está en allSpecifications
+                if en_nombres_listados(group.get("name")): # Si el grupo está en allSpecifications
                     for spec_item in group.get("specifications", []):
                         especificaciones_parsed.append({
                             "grupo": group.get("name"),
                             "nombre_especificacion": spec_item.get("name"),
                             "valores": spec_item.get("values", [])
                         })
-        product_details_obj["datos_generales"]["especificaciones_producto"] = especificaciones_parsed
+        datos_generales.especificaciones_producto = especificaciones_parsed
         
         # Sellos de Advertencia (warnings)
         warnings_list = product_data_source.get("warnings", [])
         if warnings_list and isinstance(warnings_list, list):
-             product_details_obj["datos_generales"]["sellos_advertencia"] = [warn.get("name") for warn in warnings_list if isinstance(warn, dict)]
+             datos_generales.sellos_advertencia = [warn.get("name") for warn in warnings_list if isinstance(warn, dict)]
     else:
         print(f"    Advertencia: No se encontró 'product_data_source' para datos generales del producto {product_id_str}.")
 
     # --- 2. Información Nutricional Completa ---
-    nutri_info = {}
-    # Búsqueda robusta de 'nutritional_tables_sets'
-    nutri_tables = find_key_in_json_recursive(next_data_json, "nutritional_tables_sets")
+    nutri_info = product_details_obj.informacion_nutricional_completa
+    # Búsqueda robusta de 'nutritional_tables_sets' y 'full_description' en un único recorrido
+    claves_encontradas = buscar_claves(next_data_json, ("nutritional_tables_sets", "full_description"))
+    nutri_tables = claves_encontradas.get("nutritional_tables_sets")
     if nutri_tables:
-        nutri_info["tablas_nutricionales_sets"] = nutri_tables
+        nutri_info.tablas_nutricionales_sets = nutri_tables
     
-    # Búsqueda de 'full_description'
-    full_desc = find_key_in_json_recursive(next_data_json, "full_description")
+    full_desc = claves_encontradas.get("full_description")
     if full_desc:
-        nutri_info["descripcion_larga_producto"] = full_desc
+        nutri_info.descripcion_larga_producto = full_desc
 
     # También buscar en especificaciones por "Información nutricional" como texto
     if product_data_source: # Reutilizar product_data_source si existe
-        spec_groups = product_data_source.get("specificationGroups", [])
-        if spec_groups:
-            for group in spec_groups:
-                for spec in group.get("specifications", []):
-                    if spec.get("name") == "Información nutricional":
-                        nutri_info["info_nutricional_texto_especificaciones"] = spec.get("values", [])
-                        break
-                if "info_nutricional_texto_especificaciones" in nutri_info: break
-    
-    product_details_obj["informacion_nutricional_completa"] = nutri_info
+        spec_nutricional = buscar_especificacion(product_data_source, "Información nutricional")
+        if spec_nutricional is not None:
+            nutri_info.info_nutricional_texto_especificaciones = spec_nutricional.get("values", [])
 
     # --- 3. Detalles de Precio y Promoción ---
     # La info de precio suele estar más consistentemente en pageProps.product.products[0] o similar
-    price_promo_data = {}
-    # product_item_for_price = None
-    # if page_props.get("product") and page_props["product"].get("products"):
-    #      product_item_for_price = page_props["product"]["products"][0] if page_props["product"]["products"] else None
-    
-    # Alternativamente, buscar 'priceDetail' o 'price' de forma recursiva,
-    # pero esto puede ser menos preciso. Intentemos con la estructura más común.
-    # El objeto 'product' que a veces contiene 'products' (una lista), y el primer item de esa lista es el relevante.
-    product_section_pp = page_props.get("product", {})
-    product_list_pp = product_section_pp.get("products", [])
-
-    item_for_price_details = None
-
-    if product_list_pp and isinstance(product_list_pp, list) and len(product_list_pp) > 0:
-        item_for_price_details = product_list_pp[0] # Usualmente el primer (y único) item
-    
-    # Si no se encuentra arriba, intentar una búsqueda más genérica en dehydratedState para price y priceDetail
-    if not item_for_price_details and "dehydratedState" in page_props:
-        queries = page_props.get("dehydratedState", {}).get("queries", [])
-        for query in queries:
-            query_data = query.get("state", {}).get("data", {})
-            # A veces está en query_data.products[0]
-            if "products" in query_data and isinstance(query_data["products"], list) and query_data["products"]:
-                potential_item = query_data["products"][0]
-                if isinstance(potential_item, dict) and ("price" in potential_item or "priceDetail" in potential_item):
-                    item_for_price_details = potential_item
-                    break
+    price_promo_data = product_details_obj.detalles_precio_promocion
+    # Usualmente el primer (y único) item de pageProps.product.products; si no, el primer producto
+    # de dehydratedState con price o priceDetail
+    item_for_price_details = nodo_item_precio_unificado(next_data_json, indice)
     
     if item_for_price_details:
         # Precio base y oferta
         price_node = item_for_price_details.get("price", {})
         if price_node: # Asegurarse que price_node es un dict
-            price_promo_data["precio_lista_base"] = price_node.get("listPrice")
-            price_promo_data["precio_oferta_actual"] = price_node.get("price")
-            price_promo_data["precio_sin_descuento_directo"] = price_node.get("priceWithoutDiscount")
-            price_promo_data["ahorro_directo"] = price_node.get("saving")
-            price_promo_data["precio_por_unidad_medida_oferta"] = price_node.get("ppum")
-            price_promo_data["precio_por_unidad_medida_lista"] = price_node.get("ppumListPrice")
+            price_promo_data.actualizar(PRECIO_BASE_UNIFICADO(price_node))
 
         # Detalles de promoción (priceDetail)
         price_detail_node = item_for_price_details.get("priceDetail", {})
         if price_detail_node: # Asegurarse que price_detail_node es un dict
-            price_promo_data["detalle_promocion_especifica"] = {
-                "tipo_promocion": price_detail_node.get("promotionType"),
-                "nombre_promocion": price_detail_node.get("promotionName"),
-                "id_promocion": price_detail_node.get("promotionId"),
-                "codigo_tag_promocional": price_detail_node.get("promotionalTagCode"),
-                "precio_lista_promo": price_detail_node.get("listPrice"), # Precio antes de esta promo específica
-                "precio_descuento_promo": price_detail_node.get("discountPrice"),
-                "ppum_lista_promo": price_detail_node.get("ppumListPrice"),
-                "ppum_descuento_promo": price_detail_node.get("discountPpumPrice"),
-                "porcentaje_descuento_promo": price_detail_node.get("discountPercentage"),
-                "mensaje_promocion": price_detail_node.get("promotionMessage"),
-                "items_requeridos_promo": price_detail_node.get("itemsRequiredForPromotion")
-            }
+            detalle_promocion = DetallePromocionUnificado(DETALLE_PROMOCION_UNIFICADO(price_detail_node))
             # Etiqueta promocional
-            if "promotionalTag" in price_detail_node and isinstance(price_detail_node["promotionalTag"], dict):
-                tag_node = price_detail_node["promotionalTag"]
-                price_promo_data["detalle_promocion_especifica"]["etiqueta_visual_promo"] = {
-                    "id_campania": tag_node.get("campaignId"),
-                    "texto_etiqueta": tag_node.get("text"),
-                    "color_texto": tag_node.get("textColor"),
-                    "color_fondo": tag_node.get("color")
-                }
+            if isinstance(price_detail_node.get("promotionalTag"), dict):
+                detalle_promocion.etiqueta_visual_promo = EtiquetaPromocionalUnificada(ETIQUETA_PROMOCIONAL_UNIFICADA(price_detail_node["promotionalTag"]))
             # Métodos de pago y membresías para la promo
-            if "paymentMethod" in price_detail_node: price_promo_data["detalle_promocion_especifica"]["metodos_pago_promo"] = price_detail_node["paymentMethod"]
-            if "membership" in price_detail_node: price_promo_data["detalle_promocion_especifica"]["membresias_promo"] = price_detail_node["membership"]
+            if "paymentMethod" in price_detail_node: detalle_promocion.metodos_pago_promo = price_detail_node["paymentMethod"]
+            if "membership" in price_detail_node: detalle_promocion.membresias_promo = price_detail_node["membership"]
+            price_promo_data.detalle_promocion_especifica = detalle_promocion
         
         # Promoción adicional (a veces existe un nodo 'promotion' separado)
         promo_adicional_node = item_for_price_details.get("promotion", {})
         if promo_adicional_node: # Asegurarse que es un dict
-             price_promo_data["promocion_adicional_info"] = {
-                "tiene_ahorro": promo_adicional_node.get("hasSavings"),
-                "nombre_promo_adicional": promo_adicional_node.get("name"),
-                "tipo_promo_adicional": promo_adicional_node.get("type"),
-                "codigo_descripcion": promo_adicional_node.get("descriptionCode"),
-                "mensaje_descripcion": promo_adicional_node.get("descriptionMessage"),
-                "precio_promo_adicional": promo_adicional_node.get("price"),
-                "mensaje_oferta_adicional": promo_adicional_node.get("offerMessage"),
-                "ahorro_promo_adicional": promo_adicional_node.get("saving"),
-                "ppum_promo_adicional": promo_adicional_node.get("ppum")
-            }
+             price_promo_data.promocion_adicional_info = PromocionAdicionalUnificada(PROMOCION_ADICIONAL_UNIFICADA(promo_adicional_node))
     else:
         print(f"    Advertencia: No se encontró 'item_for_price_details' para precios del producto {product_id_str}.")
 
-
-    product_details_obj["detalles_precio_promocion"] = price_promo_data
     
     return product_details_obj
 
-def process_product_detail_unified(url, session):
+def process_product_detail_unified(url, cliente):
     """Procesa una URL de producto individual para extraer y guardar toda su información"""
     print(f"  Procesando URL de producto: {url}")
     
     try:
-        response = session.get(url, headers=HEADERS, timeout=30)
+        response = cliente.get(url)
+    except requests.exceptions.RequestException as e:
+        print(f"    Error HTTP al acceder a URL de producto {url}: {e}")
+        return None
+
+    return process_product_response_unified(url, response)
+
+def producto_desde_memo(memo, html, url, product_id_str, timestamp_str):
+    """
+    Producto ya extraído en una corrida anterior con el mismo __NEXT_DATA__ (memo_extraccion.py): guarda
+    el JSON crudo y devuelve el registro sin decodificar ni extraer nada; None si no está memorizado.
+    """
+    json_data_string = extraer_next_data(html)
+    if not json_data_string:
+        return None
+    campos = memo.obtener("producto", json_data_string)
+    json_bytes = memo.obtener("raw_json", json_data_string) if campos is not None else None
+    if json_bytes is None:
+        return None
+    try:
+        guardar_json_crudo(json_bytes, product_id_str, timestamp_str)
+    except Exception as e:
+        print(f"    Error al guardar JSON crudo del producto: {e}")
+    producto = ProductoUnificado(
+        url_producto=url,
+        id_producto_scraped=product_id_str,
+        fecha_extraccion=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+    producto.actualizar(campos)
+    return producto
+
+# Memo de extracción propia de cada proceso de parseo (la conexión SQLite no se puede enviar)
+_memo_proceso = None
+
+def iniciar_proceso_parseo(versiones_memo):
+    """Inicializador de los procesos de parseo: abre la memo de extracción del proceso"""
+    global _memo_proceso
+    if versiones_memo is not None:
+        try:
+            _memo_proceso = MemoExtraccion(MEMO_EXTRACCION_DB, versiones=versiones_memo)
+        except sqlite3.Error as e:
+            # Sin memo el proceso extrae todo de nuevo; un error aquí rompería el pool completo
+            print(f"No se pudo abrir la memo de extracción en el proceso de parseo: {e}")
+
+def process_product_response_unified_en_proceso(url, response):
+    """process_product_response_unified dentro de un proceso de parseo"""
+    return process_product_response_unified(url, response, _memo_proceso)
+
+def process_product_response_unified(url, response, memo=None):
+    """Extrae y guarda toda la información de un producto a partir de su respuesta HTTP ya descargada"""
+    try:
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"    Error HTTP al acceder a URL de producto {url}: {e}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    html = response.content
     
     # Extraer ID del producto de la URL para nombrar archivos
     # ej: https://www.unimarc.cl/product/aceite-vegetal-1-l/p  -> product/aceite-vegetal-1-l
@@ -599,78 +588,85 @@ def process_product_detail_unified(url, session):
 
     ts = generar_timestamp()
     
-    # Guardar HTML del producto
+    # Guardar HTML del producto (tal como llegó)
     product_html_filename = f"producto_{product_id_str}_{ts}.html"
     product_html_path = os.path.join(HTML_DIR, product_html_filename)
     try:
-        with open(product_html_path, "w", encoding="utf-8") as f:
-            f.write(soup.prettify())
+        with open(product_html_path, "wb") as f:
+            f.write(html)
     except Exception as e_html:
          print(f"    Advertencia: No se pudo guardar HTML del producto: {e_html}")
 
-    # Extraer y guardar JSON crudo __NEXT_DATA__
-    next_data_json = extract_and_save_raw_json_product(soup, product_id_str, ts)
-    if not next_data_json:
-        print(f"    No se pudo obtener __NEXT_DATA__ para {url}. Saltando extracción de detalles.")
-        return None # No se puede continuar sin __NEXT_DATA__
-
-    # Extraer detalles unificados
-    producto_completo = extract_product_details_unified(next_data_json, url, product_id_str)
-
-    if not producto_completo or not (producto_completo["datos_generales"] or producto_completo["informacion_nutricional_completa"] or producto_completo["detalles_precio_promocion"]):
-        print(f"    No se extrajeron suficientes datos para el producto {product_id_str} desde {url}")
-        # Guardar __NEXT_DATA__ para depuración si la extracción falló pero el JSON existe
-        if next_data_json:
-            debug_filename = f"failed_extraction_raw_json_{product_id_str}_{ts}.json"
-            debug_filepath = os.path.join(RAW_JSON_PRODUCTOS_DIR, debug_filename)
-            try:
-                with open(debug_filepath, "w", encoding="utf-8") as f_debug:
-                    json.dump(next_data_json, f_debug, ensure_ascii=False, indent=4)
-                print(f"    __NEXT_DATA__ de extracción fallida guardado en: {debug_filepath}")
-            except Exception as e_write_debug:
-                print(f"    Error al guardar archivo de depuración {debug_filepath}: {e_write_debug}")
-        return None
+    # Con la memo de extracción, un __NEXT_DATA__ ya procesado en otra corrida no se decodifica ni se extrae
+    producto_completo = producto_desde_memo(memo, html, url, product_id_str, ts) if memo is not None else None
+
+    if producto_completo is None:
+        # Extraer y guardar JSON crudo __NEXT_DATA__
+        next_data_json = extract_and_save_raw_json_product(html, product_id_str, ts, memo)
+        if not next_data_json:
+            print(f"    No se pudo obtener __NEXT_DATA__ para {url}. Saltando extracción de detalles.")
+            return None # No se puede continuar sin __NEXT_DATA__
+
+        # Extraer detalles unificados
+        producto_completo = extract_product_details_unified(next_data_json, url, product_id_str)
+
+        if not producto_completo or not (producto_completo.datos_generales or producto_completo.informacion_nutricional_completa or producto_completo.detalles_precio_promocion):
+            print(f"    No se extrajeron suficientes datos para el producto {product_id_str} desde {url}")
+            # Guardar __NEXT_DATA__ para depuración si la extracción falló pero el JSON existe
+            if next_data_json:
+                debug_filename = f"failed_extraction_raw_json_{product_id_str}_{ts}.json"
+                debug_filepath = os.path.join(RAW_JSON_PRODUCTOS_DIR, debug_filename)
+                try:
+                    codec_json.escribir_archivo(debug_filepath, next_data_json, compacto=JSON_COMPACTO)
+                    print(f"    __NEXT_DATA__ de extracción fallida guardado en: {debug_filepath}")
+                except Exception as e_write_debug:
+                    print(f"    Error al guardar archivo de depuración {debug_filepath}: {e_write_debug}")
+            return None
+
+        if memo is not None:
+            # Solo lo que sale del __NEXT_DATA__: URL, ID y fecha son de esta corrida
+            memo.guardar("producto", extraer_next_data(html), {
+                campo: valor for campo, valor in producto_completo.a_dict().items()
+                if campo not in ("url_producto", "id_producto_scraped", "fecha_extraccion")
+            })
 
     # Guardar JSON procesado completo del producto
     processed_json_filename = f"producto_procesado_{product_id_str}_{ts}.json"
     processed_json_path = os.path.join(JSON_PRODUCTOS_PROCESADOS_DIR, processed_json_filename)
     try:
-        with open(processed_json_path, "w", encoding="utf-8") as f:
-            json.dump(producto_completo, f, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(processed_json_path, producto_completo, compacto=JSON_COMPACTO)
         print(f"    Detalles completos del producto guardados: {processed_json_path}")
     except Exception as e_proc_json:
         print(f"    Advertencia: No se pudo guardar JSON procesado del producto: {e_proc_json}")
 
 
     # Guardar JSON específico de información nutricional si existe
-    if producto_completo.get("informacion_nutricional_completa"):
+    if producto_completo.informacion_nutricional_completa:
         nutri_data_to_save = {
             "url_producto": url,
             "id_producto_scraped": product_id_str,
-            "nombre_producto": producto_completo.get("datos_generales", {}).get("nombre_completo"),
-            "data_nutricional": producto_completo["informacion_nutricional_completa"]
+            "nombre_producto": producto_completo.datos_generales.get("nombre_completo"),
+            "data_nutricional": producto_completo.informacion_nutricional_completa
         }
         nutri_filename = f"nutricional_{product_id_str}_{ts}.json"
         nutri_path = os.path.join(JSON_NUTRICIONAL_DIR, nutri_filename)
         try:
-            with open(nutri_path, "w", encoding="utf-8") as f:
-                json.dump(nutri_data_to_save, f, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(nutri_path, nutri_data_to_save, compacto=JSON_COMPACTO)
         except Exception as e_nutri_json:
             print(f"    Advertencia: No se pudo guardar JSON nutricional: {e_nutri_json}")
 
     # Guardar JSON específico de precios y promociones si existe
-    if producto_completo.get("detalles_precio_promocion"):
+    if producto_completo.detalles_precio_promocion:
         precio_data_to_save = {
             "url_producto": url,
             "id_producto_scraped": product_id_str,
-            "nombre_producto": producto_completo.get("datos_generales", {}).get("nombre_completo"),
-            "data_precios_promos": producto_completo["detalles_precio_promocion"]
+            "nombre_producto": producto_completo.datos_generales.get("nombre_completo"),
+            "data_precios_promos": producto_completo.detalles_precio_promocion
         }
         precio_filename = f"precio_{product_id_str}_{ts}.json"
         precio_path = os.path.join(JSON_PRECIOS_DIR, precio_filename)
         try:
-            with open(precio_path, "w", encoding="utf-8") as f:
-                json.dump(precio_data_to_save, f, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(precio_path, precio_data_to_save, compacto=JSON_COMPACTO)
         except Exception as e_precio_json:
             print(f"    Advertencia: No se pudo guardar JSON de precios: {e_precio_json}")
             
@@ -678,40 +674,28 @@ def process_product_detail_unified(url, session):
 
 
 # --- Función Principal ---
-def main_supremo_scraper():
-    print(f"\n{'='*80}")
-    print(f"   INICIO SCRAPER UNIFICADO SUPREMO UNIMARC - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*80}")
-    
-    crear_directorios()
-    
-    # 1. Leer URLs base de categorías
-    urls_categorias_base = leer_urls_base_categorias(ARCHIVO_URLS_CATEGORIAS_BASE)
-    if not urls_categorias_base:
-        print("Finalizando: No se pudieron cargar URLs de categorías base.")
-        return
-
-    # 2. Generar URLs de listado con filtros de sellos
-    filtros_sellos = obtener_filtros_sellos()
-    urls_listado_filtradas = generar_urls_listado_con_filtros(urls_categorias_base, filtros_sellos)
-    
-    if not urls_listado_filtradas:
-        print("Finalizando: No se generaron URLs de listado con filtros.")
-        return
-
+def procesar_por_fases(urls_listado_filtradas, cliente_listados, categorias_por_url, descargar_detalles, frontera=None,
+                       urls_detalle_iniciales=()):
+    """Fase 1 (todos los listados) y después Fase 2 (detalles). Devuelve la cantidad de productos, o None sin URLs"""
     # 3. Scrapear listados para obtener URLs de detalle de productos
     print(f"\n--- Iniciando Fase 1: Scraping de Listados ({len(urls_listado_filtradas)} URLs a procesar) ---")
     todas_urls_detalle_productos = []
-    
-    with requests.Session() as session: # Usar sesión para eficiencia
-        for i, url_listado in enumerate(urls_listado_filtradas):
-            print(f"\nProcesando URL de listado ({i+1}/{len(urls_listado_filtradas)})...")
-            _, urls_detalle_obtenidas = scrape_product_listings(url_listado, session)
-            todas_urls_detalle_productos.extend(urls_detalle_obtenidas)
-            if i < len(urls_listado_filtradas) - 1:
-                 espera_aleatoria(2,4) # Pausa entre diferentes listados (categoría/sello)
-
-    urls_detalle_unicas = sorted(list(set(todas_urls_detalle_productos)))
+    for i, url_listado in enumerate(urls_listado_filtradas):
+        print(f"\nProcesando URL de listado ({i+1}/{len(urls_listado_filtradas)})...")
+        if frontera is not None:
+            frontera.en_vuelo(url_listado)
+        productos_listado, urls_detalle_obtenidas = scrape_product_listings(url_listado, cliente_listados)
+        todas_urls_detalle_productos.extend(urls_detalle_obtenidas)
+        for producto in productos_listado:
+            categorias_por_url[producto["url_producto_detalle"]] = producto["categoria_listado"]
+        if frontera is not None:
+            frontera.agregar(DETALLE, urls_detalle_obtenidas, origen=url_listado)
+            frontera.registrar_resultado(url_listado, productos_listado)
+
+    # Al reanudar se agregan los productos pendientes de la corrida anterior y se omiten los ya hechos
+    urls_detalle_unicas = sorted(set(todas_urls_detalle_productos).union(urls_detalle_iniciales))
+    if frontera is not None:
+        urls_detalle_unicas = [url for url in urls_detalle_unicas if not frontera.esta_hecha(url)]
     print(f"\n--- Fin Fase 1 ---")
     print(f"Total de URLs de detalle de productos únicas encontradas: {len(urls_detalle_unicas)}")
 
@@ -729,21 +713,13 @@ def main_supremo_scraper():
             print(f"Advertencia: No se pudo guardar archivo de URLs de detalle: {e_write_consolidated_urls}")
     else:
         print("No se encontraron URLs de detalle de productos para procesar. Finalizando.")
-        return
+        return None
 
     # 4. Scrapear detalles de cada producto
     print(f"\n--- Iniciando Fase 2: Scraping de Detalles de Productos ({len(urls_detalle_unicas)} URLs a procesar) ---")
-    todos_los_productos_detallados = []
-    
-    with requests.Session() as session:
-        for j, url_producto_detalle in enumerate(urls_detalle_unicas):
-            print(f"\nProcesando detalle de producto ({j+1}/{len(urls_detalle_unicas)})...")
-            producto_data = process_product_detail_unified(url_producto_detalle, session)
-            if producto_data:
-                todos_los_productos_detallados.append(producto_data)
-            
-            if j < len(urls_detalle_unicas) - 1: # No esperar después del último
-                 espera_aleatoria() # Pausa entre productos individuales
+    # Con frontera, cada producto queda registrado apenas termina (no al final de la Fase 2)
+    resultados_detalle = descargar_detalles(urls_detalle_unicas, frontera.registrar_resultado if frontera is not None else None)
+    todos_los_productos_detallados = [producto_data for producto_data in resultados_detalle if producto_data]
 
     print(f"\n--- Fin Fase 2 ---")
     print(f"Total de productos con detalles extraídos: {len(todos_los_productos_detallados)}")
@@ -754,18 +730,197 @@ def main_supremo_scraper():
         consolidado_filename = f"TODOS_PRODUCTOS_UNIMARC_CONSOLIDADOS_{len(todos_los_productos_detallados)}_{ts}.json"
         consolidado_path = os.path.join(BASE_DIR, consolidado_filename) # Guardar en el directorio base
         try:
-            with open(consolidado_path, "w", encoding="utf-8") as f_consol:
-                json.dump(todos_los_productos_detallados, f_consol, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(consolidado_path, todos_los_productos_detallados, compacto=JSON_COMPACTO)
             print(f"\nArchivo JSON consolidado con todos los productos detallados guardado en: {consolidado_path}")
         except Exception as e_write_final_json:
              print(f"Error al guardar el archivo JSON consolidado final: {e_write_final_json}")
     else:
         print("\nNo se extrajeron detalles de ningún producto para el archivo consolidado.")
+    return len(todos_los_productos_detallados)
+
+def procesar_en_tuberia(urls_listado_filtradas, cliente_listados, categorias_por_url, descargar_detalles_flujo,
+                        frontera=None, urls_detalle_iniciales=()):
+    """
+    Fases 1 y 2 en tubería (tuberia.py): cada URL de detalle se descarga apenas aparece en su página de
+    listado y los consolidados se escriben a medida que avanzan. Devuelve la cantidad de productos, o None sin URLs
+    """
+    print(f"\n--- Iniciando Fases 1 y 2 en tubería: Listados ({len(urls_listado_filtradas)} URLs) y Detalles de Productos ---")
+    ts = generar_timestamp()
+    # Los nombres finales llevan las cantidades: mientras tanto se escribe con otro nombre
+    urls_en_curso_path = os.path.join(LISTADOS_DIR, f"urls_detalle_productos_consolidadas_en_curso_{ts}.txt")
+    consolidado_en_curso_path = os.path.join(BASE_DIR, f"TODOS_PRODUCTOS_UNIMARC_CONSOLIDADOS_en_curso_{ts}.json")
+
+    def recorrer_listado(indice_y_url, emitir):
+        i, url_listado = indice_y_url
+        print(f"\nProcesando URL de listado ({i+1}/{len(urls_listado_filtradas)})...")
+        if frontera is not None:
+            frontera.en_vuelo(url_listado)
+
+        def al_extraer_pagina(productos_pagina, urls_pagina):
+            for producto in productos_pagina:
+                categorias_por_url[producto["url_producto_detalle"]] = producto["categoria_listado"]
+            if frontera is not None:
+                # Registradas antes de descargarlas: si la corrida se corta, quedan pendientes
+                frontera.agregar(DETALLE, urls_pagina, origen=url_listado)
+            emitir(urls_pagina)
+
+        productos_listado, _ = scrape_product_listings(url_listado, cliente_listados, al_extraer_pagina)
+        if frontera is not None:
+            frontera.registrar_resultado(url_listado, productos_listado)
+
+    with open(urls_en_curso_path, "w", encoding="utf-8") as f_urls:
+        consolidado = codec_json.EscritorLista(consolidado_en_curso_path, compacto=JSON_COMPACTO)
+
+        def registrar_urls(urls_unicas):
+            if frontera is not None:
+                urls_unicas = frontera.despachar(urls_unicas)
+            for url_prod in urls_unicas:
+                f_urls.write(f"{url_prod}\n")
+                yield url_prod
+
+        def al_resultado(url, producto_data):
+            if frontera is not None:
+                frontera.registrar_resultado(url, producto_data)
+            if producto_data:
+                consolidado.agregar(producto_data)
+
+        try:
+            total_urls = ejecutar_tuberia(
+                enumerate(urls_listado_filtradas), recorrer_listado,
+                lambda urls_unicas: descargar_detalles_flujo(registrar_urls(urls_unicas), al_resultado),
+                tamano_cola=TAMANO_COLA_TUBERIA, urls_iniciales=urls_detalle_iniciales,
+            )
+        finally:
+            consolidado.close()
+
+    print(f"\n--- Fin Fases 1 y 2 ---")
+    print(f"Total de URLs de detalle de productos únicas encontradas: {total_urls}")
+    print(f"Total de productos con detalles extraídos: {consolidado.cantidad}")
+
+    if total_urls:
+        urls_detalle_consolidado_path = os.path.join(LISTADOS_DIR, f"urls_detalle_productos_consolidadas_{total_urls}_{ts}.txt")
+        os.replace(urls_en_curso_path, urls_detalle_consolidado_path)
+        print(f"Archivo de URLs de detalle consolidadas guardado: {urls_detalle_consolidado_path}")
+    else:
+        os.remove(urls_en_curso_path)
+    if consolidado.cantidad:
+        consolidado_path = os.path.join(BASE_DIR, f"TODOS_PRODUCTOS_UNIMARC_CONSOLIDADOS_{consolidado.cantidad}_{ts}.json")
+        os.replace(consolidado_en_curso_path, consolidado_path)
+        print(f"\nArchivo JSON consolidado con todos los productos detallados guardado en: {consolidado_path}")
+    else:
+        os.remove(consolidado_en_curso_path)
+        print("\nNo se extrajeron detalles de ningún producto para el archivo consolidado.")
+    return consolidado.cantidad if total_urls else None
+
+def main_supremo_scraper():
+    print(f"\n{'='*80}")
+    print(f"   INICIO SCRAPER UNIFICADO SUPREMO UNIMARC - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*80}")
+    
+    crear_directorios()
+    
+    # 1. Leer URLs base de categorías
+    urls_categorias_base = leer_urls_base_categorias(ARCHIVO_URLS_CATEGORIAS_BASE)
+    if not urls_categorias_base:
+        print("Finalizando: No se pudieron cargar URLs de categorías base.")
+        return
+
+    # 2. Generar URLs de listado con filtros de sellos
+    filtros_sellos = obtener_filtros_sellos()
+    urls_listado_filtradas = generar_urls_listado_con_filtros(urls_categorias_base, filtros_sellos)
+    
+    if not urls_listado_filtradas:
+        print("Finalizando: No se generaron URLs de listado con filtros.")
+        return
+
+    # Al reanudar una corrida cortada se omiten los listados ya hechos y se retoman los productos pendientes
+    frontera = Frontera(FRONTERA_DB, max_intentos=FRONTERA_MAX_INTENTOS) if USAR_FRONTERA else None
+    urls_detalle_iniciales = []
+    if frontera is not None:
+        urls_listado_filtradas, urls_detalle_iniciales = frontera.preparar(urls_listado_filtradas,
+                                                                            solo_fallidas=SOLO_FALLIDAS)
+
+    # Limitador de tasa adaptativo compartido por la Fase 1 (listados) y la Fase 2 (detalles)
+    limitador = LimitadorAIMD()
+    # Una única sesión (pool de conexiones keep-alive) compartida por ambas fases; en tubería, listados
+    # y detalles usan conexiones al mismo tiempo
+    tamano_pool = MAX_EN_VUELO_DETALLES + MAX_EN_VUELO_LISTADOS if TUBERIA_CONTINUA else MAX_EN_VUELO_DETALLES
+    sesion = crear_sesion(tamano_pool=tamano_pool, http2=USAR_HTTP2)
+    
+    # Bytes transferidos (en red y descomprimidos) por fase y categoría, resumidos al final
+    contador = ContadorBytes()
+    categorias_por_url = {}
+    
+    cliente_listados = ClienteHttp(sesion=sesion, limitador=limitador, headers=HEADERS,
+                                   contador=contador, fase="listados", categoria_de_url=get_categoria_from_url)
+    cache = CacheCondicional(CACHE_CONDICIONAL_DB) if USAR_CACHE_CONDICIONAL else None
+    cliente_detalles = ClienteHttp(sesion=sesion, limitador=limitador, headers=HEADERS, cache=cache,
+                                   contador=contador, fase="detalles",
+                                   categoria_de_url=lambda url: categorias_por_url.get(url, "sin_categoria"))
+    # El límite de solicitudes en vuelo reemplaza la pausa fija entre productos individuales
+    cobertura = PoliticaCobertura(percentil=COBERTURA_PERCENTIL, fraccion_maxima=COBERTURA_FRACCION_MAXIMA) if USAR_COBERTURA else None
+    # El JSON crudo depende además del formato de salida: cambiarlo también invalida lo memorizado
+    versiones_memo = {
+        "producto": VERSION_EXTRACCION,
+        "raw_json": f"{VERSION_EXTRACCION}-{codec_json.BACKEND}-{'compacto' if JSON_COMPACTO else 'indentado'}",
+    } if USAR_MEMO_EXTRACCION else None
+    memo = MemoExtraccion(MEMO_EXTRACCION_DB, versiones=versiones_memo) if versiones_memo is not None else None
+    if PROCESOS_PARSEO > 0:
+        # Cada proceso abre su propia memo; la del proceso principal queda para expirar al final
+        procesar = process_product_response_unified_en_proceso
+    else:
+        procesar = lambda url, response: process_product_response_unified(url, response, memo)
+    opciones_detalles = dict(
+        cliente=cliente_detalles, max_en_vuelo=MAX_EN_VUELO_DETALLES, cobertura=cobertura,
+        procesos=PROCESOS_PARSEO, inicializar_proceso=iniciar_proceso_parseo, argumentos_inicializar=(versiones_memo,)
+    )
+
+    if TUBERIA_CONTINUA:
+        total_productos = procesar_en_tuberia(
+            urls_listado_filtradas, cliente_listados, categorias_por_url,
+            lambda urls, al_resultado: descargar_y_procesar_flujo(urls, procesar, al_resultado, **opciones_detalles),
+            frontera, urls_detalle_iniciales
+        )
+    else:
+        total_productos = procesar_por_fases(
+            urls_listado_filtradas, cliente_listados, categorias_por_url,
+            lambda urls, al_resultado: descargar_y_procesar(urls, procesar, al_resultado=al_resultado, **opciones_detalles),
+            frontera, urls_detalle_iniciales
+        )
+
+    if total_productos is None:
+        # Sin URLs de detalle no hubo Fase 2
+        sesion.close()
+        if cache is not None:
+            cache.close()
+        if memo is not None:
+            memo.close()
+        if frontera is not None:
+            print(frontera.resumen())
+            frontera.close()
+        print(contador.resumen())
+        return
+
+    if cobertura is not None:
+        print(cobertura.resumen())
+    sesion.close()
+    if cache is not None:
+        print(cache.resumen())
+        cache.close()
+    if memo is not None:
+        if PROCESOS_PARSEO == 0:
+            print(memo.resumen())
+        memo.expirar()
+        memo.close()
+    if frontera is not None:
+        print(frontera.resumen())
+        frontera.close()
 
     print(f"\n{'='*80}")
     print(f"   FIN SCRAPER UNIFICADO SUPREMO UNIMARC - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"   Resultados en la carpeta: {BASE_DIR}")
     print(f"{'='*80}")
+    print(contador.resumen())
 
 
 if __name__ == "__main__":
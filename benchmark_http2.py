@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import h2.config
+import h2.connection
+import h2.events
+import requests
+
+from cliente_http import ClienteHttp
+from motor_descargas import descargar_y_procesar
+from transporte_http2 import SesionHttp2
+
+'''
+BENCHMARK: TRANSPORTE HTTP/1.1 (requests) VS HTTP/2 (httpx + h2)
+Levanta dos servidores locales que imitan una página de producto con una latencia fija por solicitud:
+- uno HTTP/1.1 con keep-alive (http.server)
+- uno HTTP/2 sin TLS con conocimiento previo (h2c, implementado con la librería h2)
+y descarga las mismas URLs con el motor concurrente (motor_descargas.py) y ClienteHttp sobre cada
+transporte. Informa tiempo total, solicitudes por segundo y cuántas conexiones TCP abrió el cliente.
+
+En producción el HTTP/2 se negocia por TLS (ALPN) contra www.unimarc.cl; aquí se usa h2c para no
+necesitar certificados. Requiere httpx y h2 (pip install 'httpx[http2]').
+'''
+
+HOST = "127.0.0.1"
+PUERTO_HTTP1 = 8801
+PUERTO_HTTP2 = 8802
+TOTAL_SOLICITUDES = 400
+MAX_EN_VUELO = 32
+LATENCIA_SERVIDOR = 0.05  # segundos por solicitud
+
+CUERPO = (
+    '<html><head><title>Producto</title></head><body><script id="__NEXT_DATA__" type="application/json">'
+    + '{"props":{"pageProps":{"product":{"products":[{"item":{"nameComplete":"Producto de prueba"}}]}}}}'
+    + "</script>" + "x" * 800 + "</body></html>"
+).encode("utf-8")
+
+conexiones = {"http1": 0, "http2": 0}
+
+
+class _ManejadorHttp1(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCIA_SERVIDOR)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(CUERPO)))
+        self.end_headers()
+        self.wfile.write(CUERPO)
+
+
+class _ServidorHttp1(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conexiones["http1"] += 1
+        return super().get_request()
+
+
+class _ProtocoloH2(asyncio.Protocol):
+    """Servidor HTTP/2 mínimo (h2c): responde CUERPO a cada stream tras LATENCIA_SERVIDOR"""
+
+    def connection_made(self, transport):
+        conexiones["http2"] += 1
+        self.transport = transport
+        self.conexion = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        self.conexion.initiate_connection()
+        self.pendientes = []  # streams esperando ventana de control de flujo
+        self.transport.write(self.conexion.data_to_send())
+
+    def data_received(self, data):
+        for evento in self.conexion.receive_data(data):
+            if isinstance(evento, h2.events.RequestReceived):
+                asyncio.get_running_loop().call_later(LATENCIA_SERVIDOR, self._responder, evento.stream_id)
+            elif isinstance(evento, h2.events.WindowUpdated):
+                self._enviar_pendientes()
+        self._escribir()
+
+    def _escribir(self):
+        if not self.transport.is_closing():
+            self.transport.write(self.conexion.data_to_send())
+
+    def _responder(self, stream_id):
+        if self.transport.is_closing():
+            return
+        self.conexion.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "text/html; charset=utf-8"),
+            ("content-length", str(len(CUERPO))),
+        ])
+        self.pendientes.append(stream_id)
+        self._enviar_pendientes()
+        self._escribir()
+
+    def _enviar_pendientes(self):
+        while self.pendientes:
+            stream_id = self.pendientes[0]
+            if self.conexion.local_flow_control_window(stream_id) < len(CUERPO):
+                return
+            self.conexion.send_data(stream_id, CUERPO, end_stream=True)
+            self.pendientes.pop(0)
+
+
+def _iniciar_servidores():
+    servidor_http1 = _ServidorHttp1((HOST, PUERTO_HTTP1), _ManejadorHttp1)
+    threading.Thread(target=servidor_http1.serve_forever, daemon=True).start()
+
+    loop = asyncio.new_event_loop()
+    listo = threading.Event()
+
+    def correr_loop():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(loop.create_server(_ProtocoloH2, HOST, PUERTO_HTTP2))
+        listo.set()
+        loop.run_forever()
+
+    threading.Thread(target=correr_loop, daemon=True).start()
+    listo.wait()
+    return servidor_http1
+
+
+def _medir(nombre, sesion, puerto, clave_conexiones):
+    urls = [f"http://{HOST}:{puerto}/product/producto-{i}/p" for i in range(TOTAL_SOLICITUDES)]
+    conexiones[clave_conexiones] = 0
+    cliente = ClienteHttp(sesion=sesion)
+    inicio = time.perf_counter()
+    resultados = descargar_y_procesar(urls, lambda url, response: response.status_code == 200,
+                                      cliente=cliente, max_en_vuelo=MAX_EN_VUELO)
+    duracion = time.perf_counter() - inicio
+    cliente.close()
+    return {
+        "transporte": nombre,
+        "correctas": sum(1 for r in resultados if r),
+        "segundos": duracion,
+        "solicitudes_por_segundo": TOTAL_SOLICITUDES / duracion,
+        "conexiones_tcp": conexiones[clave_conexiones],
+    }
+
+
+def main():
+    print(f"Benchmark de transporte: {TOTAL_SOLICITUDES} solicitudes, {MAX_EN_VUELO} en vuelo, "
+          f"latencia del servidor {LATENCIA_SERVIDOR * 1000:.0f} ms")
+    servidor_http1 = _iniciar_servidores()
+
+    resultados = [
+        _medir("HTTP/1.1 (requests)", requests.Session(), PUERTO_HTTP1, "http1"),
+        _medir("HTTP/2 (httpx h2c)", SesionHttp2(conocimiento_previo=True, max_conexiones=1), PUERTO_HTTP2, "http2"),
+    ]
+    servidor_http1.shutdown()
+
+    print(f"\n{'Transporte':<22}{'Correctas':>10}{'Segundos':>10}{'Sol/s':>10}{'Conexiones':>12}")
+    for r in resultados:
+        print(f"{r['transporte']:<22}{r['correctas']:>10}{r['segundos']:>10.2f}"
+              f"{r['solicitudes_por_segundo']:>10.1f}{r['conexiones_tcp']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import time
+
+import codec_json
+from especificaciones_unimarc import (
+    NODO_PRIMER_PRODUCTO, RUTA_PRIMER_PRODUCTO, indexar_queries, indexar_queries_de, nodo_productos_listado,
+)
+from next_data_perezoso import NO_RESUELTO, NextDataPerezoso
+
+'''
+BENCHMARK: DECODIFICACIÓN PEREZOSA (next_data_perezoso.py) VS DOCUMENTO COMPLETO (codec_json.loads)
+Arma documentos __NEXT_DATA__ sintéticos con la forma de las páginas de Unimarc (menú de categorías,
+banners, queries de dehydratedState, 50 productos por listado) y mide, por página, lo que hacen los
+scripts con cada camino:
+- listado: índice de queries para availableProducts y totalProducts
+- detalle: pageProps.product.products[0]
+
+Cada forma se prueba con lo buscado antes y después del menú: en el segundo caso el decodificador
+perezoso no puede saltar tanto texto y recurre al documento completo. Los resultados de ambos caminos
+se comparan antes de medir. El backend de codec_json (orjson, msgspec o la librería estándar) decide
+cuál conviene: ver PEREZOSA_POR_DEFECTO.
+'''
+
+REPETICIONES = 200
+CATEGORIAS_MENU = 150
+PRODUCTOS_POR_PAGINA = 50
+
+
+def _producto(i):
+    return {
+        "itemId": str(i), "nameComplete": f"Producto número {i} \"especial\"", "brand": "Marca",
+        "sellers": [{"price": "$1.990", "listPrice": "$2.490", "ppum": "$9,95 x 100 g", "availableQuantity": 10}],
+        "images": [f"https://unimarc.cl/img/{i}_{k}.jpg" for k in range(4)], "detailUrl": f"/product/p{i}/p",
+        "priceDetail": {"promotionalTag": {"text": "Oferta", "color": "#f00"}, "discountPercentage": "20%"},
+        "specs": [{"name": f"especificacion {k}", "values": [str(k)]} for k in range(6)],
+    }
+
+
+def _documentos():
+    """{nombre: texto} de los cuatro documentos de prueba"""
+    menu = [{"name": f"Categoría {i}", "url": f"/category/{i}", "children": [
+        {"name": f"Subcategoría {i}.{j}", "url": f"/category/{i}/{j}", "icon": None, "order": j} for j in range(15)
+    ]} for i in range(CATEGORIAS_MENU)]
+    banners = [{"id": i, "title": f"Banner {i}", "html": '<div class="banner">' + "texto " * 30 + "</div>"}
+               for i in range(60)]
+
+    def queries(principal):
+        return [{"queryKey": ["banners"], "state": {"data": {"banners": banners}}},
+                principal,
+                {"queryKey": ["footer"], "state": {"data": {"links": [{"text": f"l{i}", "url": f"/l/{i}"} for i in range(200)]}}}]
+
+    estado_listado = {"queries": queries({"queryKey": ["products"], "state": {"data": {
+        "totalProducts": 1234, "availableProducts": [_producto(i) for i in range(PRODUCTOS_POR_PAGINA)]}}})}
+    estado_detalle = {"queries": queries({"queryKey": ["otros"], "state": {"data": {"total": 1}}})}
+    producto = {"products": [{"item": _producto(1), "price": {"price": "$1.990"}}]}
+
+    documentos = {
+        "listado (queries antes del menú)": {"dehydratedState": estado_listado, "menu": menu},
+        "listado (queries después del menú)": {"menu": menu, "dehydratedState": estado_listado},
+        "detalle (producto antes del menú)": {"product": producto, "menu": menu, "dehydratedState": estado_detalle},
+        "detalle (producto después del menú)": {"menu": menu, "product": producto, "dehydratedState": estado_detalle},
+    }
+    return {nombre: json.dumps({"props": {"pageProps": page_props}}, ensure_ascii=False)
+            for nombre, page_props in documentos.items()}
+
+
+def _listado_completo(texto):
+    indice = indexar_queries(codec_json.loads(texto))
+    return nodo_productos_listado(indice), indice.valor("totalProducts")
+
+
+def _listado_perezoso(texto):
+    indice = indexar_queries_de(NextDataPerezoso(texto), "availableProducts", "totalProducts")
+    return nodo_productos_listado(indice), indice.valor("totalProducts")
+
+
+def _detalle_completo(texto):
+    return NODO_PRIMER_PRODUCTO(codec_json.loads(texto))
+
+
+def _detalle_perezoso(texto):
+    documento = NextDataPerezoso(texto)
+    producto = documento.valor_en_ruta(RUTA_PRIMER_PRODUCTO)
+    return NODO_PRIMER_PRODUCTO(documento.completo()) if producto is NO_RESUELTO else producto
+
+
+def _medir(funcion, texto):
+    """Milisegundos por página"""
+    funcion(texto)
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        funcion(texto)
+    return (time.perf_counter() - inicio) / REPETICIONES * 1000
+
+
+def main():
+    print(f"Backend de codec_json: {codec_json.BACKEND}")
+    for nombre, texto in _documentos().items():
+        completo, perezoso = ((_listado_completo, _listado_perezoso) if nombre.startswith("listado")
+                              else (_detalle_completo, _detalle_perezoso))
+        if completo(texto) != perezoso(texto):
+            print(f"  {nombre}: ¡resultados distintos!")
+            continue
+        print(f"  {nombre:38s} {len(texto) // 1024:4d} KB   completo {_medir(completo, texto):6.2f} ms   "
+              f"perezoso {_medir(perezoso, texto):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
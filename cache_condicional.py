@@ -0,0 +1,163 @@
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+'''
+CACHE DE SOLICITUDES CONDICIONALES (ETag / Last-Modified)
+Entre corridas diarias la mayoría de las páginas de producto no cambia. Este módulo guarda, por URL,
+los validadores que entrega el servidor (ETag, Last-Modified) junto con el contenido de __NEXT_DATA__
+(más el <title> y la meta description, que también usan algunos extractores).
+
+- ClienteHttp (cliente_http.py) agrega If-None-Match / If-Modified-Since a cada GET de una URL conocida.
+- Si el servidor responde 304 Not Modified, el cliente devuelve una respuesta sintética 200 con un HTML
+  mínimo que contiene el __NEXT_DATA__ almacenado, de modo que la extracción existente
+  (extract_product_details, extract_product_details_unified, etc.) funciona sin cambios.
+- Las respuestas servidas desde la cache llevan el encabezado X-Cache-Condicional: HIT.
+
+La cache es un archivo SQLite; se comparte entre hilos mediante un lock.
+'''
+
+ENCABEZADO_CACHE = "X-Cache-Condicional"
+
+_RE_NEXT_DATA = re.compile(
+    r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+_RE_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.DOTALL | re.IGNORECASE)
+_RE_META_DESCRIPTION = re.compile(
+    r'<meta[^>]*\bname=["\']description["\'][^>]*>', re.IGNORECASE
+)
+_RE_CONTENT = re.compile(r'\bcontent=(["\'])(.*?)\1', re.DOTALL | re.IGNORECASE)
+
+
+def _extraer_fragmentos(html):
+    """Devuelve (next_data, title, meta_description) del HTML; next_data es None si no existe"""
+    match_next = _RE_NEXT_DATA.search(html)
+    if not match_next:
+        return None, None, None
+    match_title = _RE_TITLE.search(html)
+    title = match_title.group(1) if match_title else None
+    meta_description = None
+    match_meta = _RE_META_DESCRIPTION.search(html)
+    if match_meta:
+        match_content = _RE_CONTENT.search(match_meta.group(0))
+        if match_content:
+            meta_description = match_content.group(2)
+    return match_next.group(1), title, meta_description
+
+
+def _html_minimo(next_data, title, meta_description):
+    """Reconstruye un HTML con lo necesario para los extractores (title, meta description, __NEXT_DATA__)"""
+    partes = ["<html><head>"]
+    if title is not None:
+        partes.append(f"<title>{title}</title>")
+    if meta_description is not None:
+        comilla = "'" if '"' in meta_description else '"'
+        partes.append(f'<meta name="description" content={comilla}{meta_description}{comilla}/>')
+    partes.append('</head><body><script id="__NEXT_DATA__" type="application/json">')
+    partes.append(next_data)
+    partes.append("</script></body></html>")
+    return "".join(partes)
+
+
+class CacheCondicional:
+    """Validadores HTTP y __NEXT_DATA__ por URL, persistidos en SQLite"""
+
+    def __init__(self, ruta_db="cache_condicional.sqlite"):
+        self.ruta_db = ruta_db
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                next_data TEXT NOT NULL,
+                title TEXT,
+                meta_description TEXT,
+                actualizado REAL NOT NULL
+            )"""
+        )
+        self._conexion.commit()
+        self.aciertos = 0
+        # Respuestas completas (200) que pasaron por guardar(): no son fallos de búsqueda en la cache
+        self.completas = 0
+
+    def encabezados_condicionales(self, url):
+        """Encabezados If-None-Match / If-Modified-Since para la URL (vacío si no está en cache)"""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT etag, last_modified FROM paginas WHERE url = ?", (url,)
+            ).fetchone()
+        if not fila:
+            return {}
+        encabezados = {}
+        if fila[0]:
+            encabezados["If-None-Match"] = fila[0]
+        if fila[1]:
+            encabezados["If-Modified-Since"] = fila[1]
+        return encabezados
+
+    def guardar(self, url, response):
+        """Guarda validadores y __NEXT_DATA__ de una respuesta 200; descarta la entrada si no hay validadores"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        next_data, title, meta_description = (None, None, None)
+        if etag or last_modified:
+            next_data, title, meta_description = _extraer_fragmentos(response.text)
+        with self._lock:
+            if next_data is None:
+                self._conexion.execute("DELETE FROM paginas WHERE url = ?", (url,))
+            else:
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, next_data, title, meta_description, time.time()),
+                )
+            self._conexion.commit()
+            self.completas += 1
+
+    def respuesta_desde_cache(self, url, response_304):
+        """Construye una respuesta 200 sintética con el __NEXT_DATA__ almacenado; None si no hay entrada"""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT etag, last_modified, next_data, title, meta_description FROM paginas WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if fila:
+                self.aciertos += 1
+        if not fila:
+            return None
+        etag, last_modified, next_data, title, meta_description = fila
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = response_304.url or url
+        response.request = response_304.request
+        response.encoding = "utf-8"
+        response._content = _html_minimo(next_data, title, meta_description).encode("utf-8")
+        response.headers = CaseInsensitiveDict({
+            "Content-Type": "text/html; charset=utf-8",
+            ENCABEZADO_CACHE: "HIT",
+        })
+        if etag:
+            response.headers["ETag"] = etag
+        if last_modified:
+            response.headers["Last-Modified"] = last_modified
+        response.elapsed = response_304.elapsed
+        return response
+
+    def olvidar(self, url):
+        with self._lock:
+            self._conexion.execute("DELETE FROM paginas WHERE url = ?", (url,))
+            self._conexion.commit()
+
+    def resumen(self):
+        return f"Cache condicional: {self.aciertos} páginas sin cambios (304), {self.completas} descargadas completas"
+
+    def close(self):
+        with self._lock:
+            self._conexion.close()
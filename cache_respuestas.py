@@ -0,0 +1,182 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+'''
+CACHE PERSISTENTE DE RESPUESTAS HTTP (direccionada por contenido, con TTL)
+Pensada para iterar sobre los extractores (scraper-detalles-precio.py, scraper-detalles-dentro-producto.py,
+scraper_tablas_nutricionales_v2.py) sin volver a descargar las mismas páginas en cada prueba.
+
+- Los cuerpos se guardan comprimidos en disco, nombrados por su hash SHA-256: dos URLs con el mismo
+  contenido comparten un único archivo.
+- Un índice SQLite relaciona cada URL con el hash de su cuerpo, la fecha de descarga y su TTL.
+- Modo "solo cache": no se hace ninguna solicitud de red; las URLs sin entrada lanzan SinEntradaEnCache
+  (subclase de RequestException, así los scripts la tratan como cualquier error HTTP). En este modo se
+  ignora el TTL, para poder reproducir cualquier extractor a velocidad de disco.
+- expirar() elimina las entradas vencidas y, si el total supera el tamaño máximo, las más antiguas;
+  los cuerpos que ya no referencia ninguna URL se borran.
+
+ClienteHttp (cliente_http.py) consulta la cache antes de ir a la red cuando recibe `cache_respuestas`.
+'''
+
+ENCABEZADO_CACHE = "X-Cache-Respuestas"
+TTL_POR_DEFECTO = 24 * 3600  # segundos
+TAMANO_MAXIMO_POR_DEFECTO = 2 * 1024 ** 3  # bytes (comprimidos) en disco
+
+
+class SinEntradaEnCache(requests.exceptions.RequestException):
+    """La URL no está en la cache y el modo solo cache impide descargarla"""
+
+
+class CacheRespuestas:
+    """Cuerpos por hash de contenido en disco + índice SQLite por URL con fecha de descarga y TTL"""
+
+    def __init__(self, directorio="Cache_Respuestas_Unimarc", ttl=TTL_POR_DEFECTO,
+                 tamano_maximo=TAMANO_MAXIMO_POR_DEFECTO, solo_cache=False):
+        self.directorio = directorio
+        self.dir_cuerpos = os.path.join(directorio, "cuerpos")
+        self.ttl = ttl
+        self.tamano_maximo = tamano_maximo
+        self.solo_cache = solo_cache
+        os.makedirs(self.dir_cuerpos, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(os.path.join(directorio, "indice.sqlite"), check_same_thread=False)
+        self._conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS respuestas (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                content_type TEXT,
+                obtenido REAL NOT NULL,
+                ttl REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_respuestas_hash ON respuestas (hash);
+            CREATE TABLE IF NOT EXISTS cuerpos (
+                hash TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL
+            );
+            """
+        )
+        self._conexion.commit()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _ruta_cuerpo(self, hash_cuerpo):
+        return os.path.join(self.dir_cuerpos, hash_cuerpo[:2], hash_cuerpo)
+
+    def obtener(self, url):
+        """Devuelve una respuesta 200 reconstruida desde la cache, o None si no hay entrada vigente"""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT hash, content_type, obtenido, ttl FROM respuestas WHERE url = ?", (url,)
+            ).fetchone()
+        if fila is None or (not self.solo_cache and fila[2] + fila[3] < time.time()):
+            self.fallos += 1
+            return None
+        hash_cuerpo, content_type, _, _ = fila
+        try:
+            with open(self._ruta_cuerpo(hash_cuerpo), "rb") as f:
+                cuerpo = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = url
+        response._content = cuerpo
+        response.headers = CaseInsensitiveDict({ENCABEZADO_CACHE: "HIT"})
+        if content_type:
+            response.headers["Content-Type"] = content_type
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        return response
+
+    def guardar(self, url, response, ttl=None):
+        """Guarda el cuerpo de una respuesta 200 (una sola copia por contenido) y lo asocia a la URL"""
+        if response.status_code != 200:
+            return
+        cuerpo = response.content
+        hash_cuerpo = hashlib.sha256(cuerpo).hexdigest()
+        ruta = self._ruta_cuerpo(hash_cuerpo)
+        with self._lock:
+            existe = self._conexion.execute(
+                "SELECT 1 FROM cuerpos WHERE hash = ?", (hash_cuerpo,)
+            ).fetchone()
+            if not existe or not os.path.exists(ruta):
+                comprimido = zlib.compress(cuerpo, 6)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                ruta_temporal = f"{ruta}.{threading.get_ident()}.tmp"
+                with open(ruta_temporal, "wb") as f:
+                    f.write(comprimido)
+                os.replace(ruta_temporal, ruta)
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO cuerpos VALUES (?, ?)", (hash_cuerpo, len(comprimido))
+                )
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?)",
+                (url, hash_cuerpo, response.headers.get("Content-Type"), time.time(),
+                 self.ttl if ttl is None else ttl),
+            )
+            self._conexion.commit()
+
+    def _borrar_cuerpos_huerfanos(self):
+        """Elimina los cuerpos que ya no referencia ninguna URL (requiere tener el lock)"""
+        huerfanos = self._conexion.execute(
+            "SELECT hash FROM cuerpos WHERE hash NOT IN (SELECT hash FROM respuestas)"
+        ).fetchall()
+        for (hash_cuerpo,) in huerfanos:
+            try:
+                os.remove(self._ruta_cuerpo(hash_cuerpo))
+            except FileNotFoundError:
+                pass
+        self._conexion.executemany("DELETE FROM cuerpos WHERE hash = ?", huerfanos)
+        return len(huerfanos)
+
+    def expirar(self):
+        """Elimina entradas vencidas y, si se supera el tamaño máximo, las más antiguas. Devuelve cuántas URLs se borraron"""
+        with self._lock:
+            cursor = self._conexion.execute(
+                "DELETE FROM respuestas WHERE obtenido + ttl < ?", (time.time(),)
+            )
+            borradas = cursor.rowcount
+            self._borrar_cuerpos_huerfanos()
+
+            tamano_total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM cuerpos").fetchone()[0]
+            if tamano_total > self.tamano_maximo:
+                # Se recorren las URLs de la más antigua a la más reciente, liberando cuerpos completos
+                filas = self._conexion.execute(
+                    "SELECT url, hash FROM respuestas ORDER BY obtenido"
+                ).fetchall()
+                referencias = {}
+                for _, hash_cuerpo in filas:
+                    referencias[hash_cuerpo] = referencias.get(hash_cuerpo, 0) + 1
+                tamanos = dict(self._conexion.execute("SELECT hash, tamano FROM cuerpos").fetchall())
+                urls_a_borrar = []
+                for url, hash_cuerpo in filas:
+                    if tamano_total <= self.tamano_maximo:
+                        break
+                    urls_a_borrar.append((url,))
+                    referencias[hash_cuerpo] -= 1
+                    if referencias[hash_cuerpo] == 0:
+                        tamano_total -= tamanos.get(hash_cuerpo, 0)
+                self._conexion.executemany("DELETE FROM respuestas WHERE url = ?", urls_a_borrar)
+                borradas += len(urls_a_borrar)
+                self._borrar_cuerpos_huerfanos()
+            self._conexion.commit()
+        return borradas
+
+    def resumen(self):
+        return f"Cache de respuestas: {self.aciertos} servidas desde disco, {self.fallos} no encontradas o vencidas"
+
+    def close(self):
+        with self._lock:
+            self._conexion.close()
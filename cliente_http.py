@@ -0,0 +1,294 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from cache_condicional import ENCABEZADO_CACHE as ENCABEZADO_CACHE_CONDICIONAL
+from cache_respuestas import SinEntradaEnCache
+from transporte_http2 import HTTP2_DISPONIBLE, SesionHttp2
+
+'''
+CAPA DE DESCARGA COMPARTIDA POR TODOS LOS SCRAPERS DE UNIMARC
+Todas las solicitudes HTTP de los scripts pasan por ClienteHttp.get(), que agrega:
+
+1. Timeouts de conexión y de lectura por defecto (un socket colgado ya no detiene la corrida).
+2. Reintentos acotados con backoff exponencial con jitter ante errores transitorios
+   (errores de conexión, timeouts y respuestas 429/500/502/503/504). Se respeta Retry-After.
+3. Un circuit breaker por host: tras varios fallos seguidos el host queda "abierto" y las
+   solicitudes a ese host esperan (pausan el crawl) en vez de seguir gastando intentos.
+   Pasada la pausa se deja pasar una única solicitud de prueba; si falla, la pausa se duplica.
+4. El LimitadorAIMD opcional (limitador_tasa.py), informado con el resultado de cada intento.
+5. La CacheCondicional opcional (cache_condicional.py): envía If-None-Match / If-Modified-Since y,
+   ante un 304, devuelve una respuesta 200 reconstruida con el __NEXT_DATA__ almacenado.
+6. La CacheRespuestas opcional (cache_respuestas.py): si la URL tiene una respuesta vigente en disco
+   se devuelve sin ir a la red (en modo solo cache, nunca se va a la red).
+7. Compresión: se anuncian en Accept-Encoding solo las codificaciones que urllib3 sabe decodificar en
+   este entorno (gzip/deflate siempre, br si está brotli, zstd si está zstandard); el cuerpo se
+   descomprime a medida que llega. Cada respuesta lleva bytes_comprimidos / bytes_descomprimidos y,
+   si se pasa un ContadorBytes (contador_bytes.py), se acumulan por fase y por categoría.
+
+ClienteHttp.get() tiene la misma forma que requests.Session.get(), de modo que puede pasarse
+a cualquier función que antes recibía una sesión.
+
+crear_sesion() arma la sesión de una corrida: un pool de conexiones keep-alive de tamaño explícito
+(HTTPAdapter pool_connections / pool_maxsize), o la SesionHttp2 si se pide HTTP/2. Se crea una sola
+vez por corrida y se comparte entre la fase de listados y la de detalles.
+'''
+
+HEADERS_POR_DEFECTO = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+}
+
+TIMEOUT_POR_DEFECTO = (5, 30)  # (conexión, lectura) en segundos
+# Codificaciones que se pueden decodificar con los paquetes instalados (ej. "gzip,deflate,br,zstd")
+CODIFICACIONES_ACEPTADAS = ACCEPT_ENCODING
+
+# Conexiones keep-alive por host; debe ser >= al máximo de solicitudes en vuelo para no abrir y
+# descartar sockets cuando el pool se llena
+TAMANO_POOL_POR_DEFECTO = 16
+CODIGOS_TRANSITORIOS = {429, 500, 502, 503, 504}
+EXCEPCIONES_TRANSITORIAS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def crear_sesion(tamano_pool=TAMANO_POOL_POR_DEFECTO, http2=False):
+    """Sesión compartida de una corrida: pool keep-alive de `tamano_pool` conexiones por host, o HTTP/2"""
+    if http2:
+        if HTTP2_DISPONIBLE:
+            return SesionHttp2(max_conexiones=tamano_pool)
+        print("Advertencia: httpx/h2 no están instalados (pip install 'httpx[http2]'). Se usará HTTP/1.1 con requests.")
+    sesion = requests.Session()
+    # Los reintentos los maneja ClienteHttp (max_retries=0 en el adaptador)
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamano_pool, max_retries=0)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+
+class InterruptorCircuito:
+    """Circuit breaker de un host: cerrado -> abierto (pausa) -> semiabierto (una prueba) -> cerrado"""
+
+    def __init__(self, host, umbral_fallos=5, pausa_inicial=30.0, pausa_maxima=600.0):
+        self.host = host
+        self.umbral_fallos = umbral_fallos
+        self.pausa_inicial = float(pausa_inicial)
+        self.pausa_maxima = float(pausa_maxima)
+
+        self._estado = "cerrado"
+        self._fallos_seguidos = 0
+        self._pausa = self.pausa_inicial
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self._condicion = threading.Condition()
+
+    def _abrir(self, ahora):
+        self._estado = "abierto"
+        self._abierto_hasta = ahora + self._pausa
+        print(f"  Circuito abierto para {self.host}: pausando solicitudes {self._pausa:.0f} segundos")
+
+    def esperar_turno(self):
+        """Bloquea mientras el circuito del host esté abierto o haya una solicitud de prueba en curso"""
+        with self._condicion:
+            while True:
+                if self._estado == "cerrado":
+                    return
+                ahora = time.monotonic()
+                if self._estado == "abierto":
+                    if ahora < self._abierto_hasta:
+                        self._condicion.wait(self._abierto_hasta - ahora)
+                        continue
+                    self._estado = "semiabierto"
+                if not self._prueba_en_curso:
+                    self._prueba_en_curso = True
+                    return
+                self._condicion.wait()
+
+    def registrar_exito(self):
+        with self._condicion:
+            if self._estado != "cerrado":
+                print(f"  Circuito cerrado para {self.host}: el host volvió a responder")
+            self._estado = "cerrado"
+            self._fallos_seguidos = 0
+            self._pausa = self.pausa_inicial
+            self._prueba_en_curso = False
+            self._condicion.notify_all()
+
+    def liberar_prueba(self):
+        """Libera la solicitud de prueba sin cambiar de estado (ej. error no relacionado con el host)"""
+        with self._condicion:
+            self._prueba_en_curso = False
+            self._condicion.notify_all()
+
+    def registrar_fallo(self):
+        with self._condicion:
+            ahora = time.monotonic()
+            self._fallos_seguidos += 1
+            if self._estado == "semiabierto":
+                # La prueba falló: se reabre con una pausa mayor
+                self._pausa = min(self.pausa_maxima, self._pausa * 2)
+                self._abrir(ahora)
+            elif self._estado == "cerrado" and self._fallos_seguidos >= self.umbral_fallos:
+                self._abrir(ahora)
+            self._prueba_en_curso = False
+            self._condicion.notify_all()
+
+
+# Un interruptor por host, compartido por todos los clientes del proceso
+_interruptores = {}
+_interruptores_lock = threading.Lock()
+
+
+def obtener_interruptor(host):
+    """Devuelve (creándolo si no existe) el circuit breaker del host"""
+    with _interruptores_lock:
+        if host not in _interruptores:
+            _interruptores[host] = InterruptorCircuito(host)
+        return _interruptores[host]
+
+
+def _segundos_retry_after(response):
+    """Interpreta el encabezado Retry-After (solo en segundos); None si no existe o no es numérico"""
+    valor = response.headers.get("Retry-After")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        return None
+
+
+class ClienteHttp:
+    """Cliente HTTP con timeouts, reintentos con backoff, circuit breaker por host y limitador de tasa"""
+
+    def __init__(self, sesion=None, limitador=None, headers=None, timeout=TIMEOUT_POR_DEFECTO,
+                 max_reintentos=3, backoff_base=1.0, backoff_maximo=30.0, cache=None, cache_respuestas=None,
+                 contador=None, fase="general", categoria_de_url=None):
+        self.sesion = sesion if sesion is not None else crear_sesion()
+        self.limitador = limitador
+        self.cache = cache
+        self.cache_respuestas = cache_respuestas
+        self.headers = {"Accept-Encoding": CODIFICACIONES_ACEPTADAS, **(headers or HEADERS_POR_DEFECTO)}
+        self.contador = contador
+        self.fase = fase
+        self.categoria_de_url = categoria_de_url
+        self.timeout = timeout
+        self.max_reintentos = max_reintentos
+        self.backoff_base = backoff_base
+        self.backoff_maximo = backoff_maximo
+
+    def _espera_backoff(self, intento):
+        """Backoff exponencial con jitter completo: uniforme entre 0 y base * 2^intento (acotado)"""
+        return random.uniform(0, min(self.backoff_maximo, self.backoff_base * (2 ** intento)))
+
+    def get(self, url, headers=None, timeout=None, al_iniciar=None, **kwargs):
+        """
+        GET con reintentos. Devuelve la respuesta final (que puede no ser 200 si el error no es
+        transitorio o se agotaron los reintentos) o relanza la última excepción de red.
+        `al_iniciar()` se llama justo antes de cada intento en red (ya pasados el circuit breaker y el limitador).
+        """
+        if self.cache_respuestas is not None:
+            respuesta_guardada = self.cache_respuestas.obtener(url)
+            if respuesta_guardada is not None:
+                self._contabilizar(url, respuesta_guardada, origen="cache")
+                return respuesta_guardada
+            if self.cache_respuestas.solo_cache:
+                raise SinEntradaEnCache(f"{url} no está en la cache de respuestas (modo solo cache)")
+
+        cabeceras = {**self.headers, **(headers or {})}
+        timeout = timeout if timeout is not None else self.timeout
+        response = self._get_con_cache_condicional(url, cabeceras, timeout, al_iniciar, **kwargs)
+        self._contabilizar(url, response, origen="304" if ENCABEZADO_CACHE_CONDICIONAL in response.headers else "red")
+        if self.cache_respuestas is not None:
+            self.cache_respuestas.guardar(url, response)
+        return response
+
+    def _contabilizar(self, url, response, origen):
+        """Anota en la respuesta los bytes en red y descomprimidos, y los suma al contador si existe"""
+        descomprimidos = len(response.content)
+        if origen != "red":
+            comprimidos = 0
+        elif getattr(response, "bytes_comprimidos", None) is not None:
+            comprimidos = response.bytes_comprimidos  # SesionHttp2 ya lo informa
+        elif response.raw is not None and hasattr(response.raw, "tell"):
+            comprimidos = response.raw.tell()  # bytes leídos del socket, antes de descomprimir
+        else:
+            comprimidos = descomprimidos
+        response.bytes_comprimidos = comprimidos
+        response.bytes_descomprimidos = descomprimidos
+        if self.contador is not None:
+            categoria = self.categoria_de_url(url) if self.categoria_de_url else "sin_categoria"
+            self.contador.registrar(self.fase, categoria, comprimidos, descomprimidos,
+                                    response.headers.get("Content-Encoding", "identity"), origen)
+
+    def _get_con_cache_condicional(self, url, cabeceras, timeout, al_iniciar, **kwargs):
+        if self.cache is None:
+            return self._get_con_reintentos(url, cabeceras, timeout, al_iniciar, **kwargs)
+
+        condicionales = self.cache.encabezados_condicionales(url)
+        response = self._get_con_reintentos(url, {**cabeceras, **condicionales}, timeout, al_iniciar, **kwargs)
+        if response.status_code == 304:
+            respuesta_cache = self.cache.respuesta_desde_cache(url, response)
+            if respuesta_cache is not None:
+                return respuesta_cache
+            # La entrada desapareció entre la consulta y la respuesta: se pide la página completa
+            return self._get_con_reintentos(url, cabeceras, timeout, al_iniciar, **kwargs)
+        if response.status_code == 200:
+            self.cache.guardar(url, response)
+        return response
+
+    def _get_con_reintentos(self, url, cabeceras, timeout, al_iniciar=None, **kwargs):
+        interruptor = obtener_interruptor(urlparse(url).netloc)
+
+        for intento in range(self.max_reintentos + 1):
+            interruptor.esperar_turno()
+            if self.limitador is not None:
+                self.limitador.adquirir()
+            if al_iniciar is not None:
+                al_iniciar()
+            inicio = time.monotonic()
+            try:
+                response = self.sesion.get(url, headers=cabeceras, timeout=timeout, **kwargs)
+            except EXCEPCIONES_TRANSITORIAS as e:
+                if self.limitador is not None:
+                    self.limitador.registrar_respuesta(error=True)
+                interruptor.registrar_fallo()
+                if intento >= self.max_reintentos:
+                    raise
+                espera = self._espera_backoff(intento)
+                print(f"  Error transitorio en {url} ({type(e).__name__}). Reintento {intento + 1}/{self.max_reintentos} en {espera:.1f}s")
+            except Exception:
+                interruptor.liberar_prueba()
+                raise
+            else:
+                if self.limitador is not None:
+                    self.limitador.registrar_respuesta(status_code=response.status_code,
+                                                       latencia=time.monotonic() - inicio)
+                if response.status_code not in CODIGOS_TRANSITORIOS:
+                    interruptor.registrar_exito()
+                    return response
+                interruptor.registrar_fallo()
+                if intento >= self.max_reintentos:
+                    return response
+                retry_after = _segundos_retry_after(response)
+                espera = min(self.backoff_maximo, retry_after) if retry_after is not None else self._espera_backoff(intento)
+                if retry_after is not None and self.limitador is not None:
+                    self.limitador.pausar(espera)
+                print(f"  Respuesta HTTP {response.status_code} en {url}. Reintento {intento + 1}/{self.max_reintentos} en {espera:.1f}s")
+                response.close()
+            time.sleep(espera)
+
+    def close(self):
+        self.sesion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
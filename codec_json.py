@@ -0,0 +1,156 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+'''
+CODEC JSON ÚNICO PARA TODOS LOS SCRIPTS
+Cada página trae un __NEXT_DATA__ de cientos de KB que se decodifica, cada producto genera hasta cinco
+archivos JSON y combinar_raw_json.py / populate_sql.py cargan y escriben agregados de varios GB.
+Con el json de la librería estándar esa es una parte importante del tiempo de CPU y del disco.
+
+Este módulo elige el backend más rápido instalado, en este orden:
+1. orjson   (pip install orjson)
+2. msgspec  (pip install msgspec)
+3. json de la librería estándar
+y expone siempre la misma interfaz:
+
+- loads(datos): acepta bytes o str (response.content puede pasarse directo, sin decodificar).
+- dumps(obj, compacto=False) -> str  y  dumps_bytes(obj, compacto=False) -> bytes.
+- leer_archivo(ruta) / escribir_archivo(ruta, obj, compacto=False): E/S binaria en UTF-8.
+- EscritorLista(ruta, compacto=False): una lista JSON escrita elemento por elemento con agregar(obj),
+  para los resultados que llegan de a uno (tuberia.py). Al cerrarla, el archivo es idéntico al que
+  escribe escribir_archivo(ruta, lista) con los mismos elementos.
+- Los objetos con un método a_dict() (registros_productos.py) se serializan llamando a a_dict() al
+  escribirlos, en los tres backends.
+- JSONDecodeError: la misma clase de json, así los `except` existentes siguen funcionando con
+  cualquier backend.
+
+Formato de salida: UTF-8 sin escapar caracteres no ASCII (equivalente a ensure_ascii=False).
+- compacto=False: indentado con 2 espacios (el único indentado que ofrecen orjson y msgspec; la
+  librería estándar usa el mismo para que la salida no dependa del backend).
+- compacto=True: sin espacios ni saltos de línea; archivos bastante más chicos.
+
+Diferencias con la librería estándar que conviene conocer:
+- Si un backend rápido rechaza un documento (NaN/Infinity, claves no str al escribir, enteros de más
+  de 64 bits...), se reintenta con la librería estándar antes de fallar.
+- orjson convierte a float los enteros de más de 64 bits al leer.
+'''
+
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+
+def _serializar(obj):
+    """Serializador de tipos no JSON: registros con a_dict() (registros_productos.py)"""
+    a_dict = getattr(obj, "a_dict", None)
+    if a_dict is None:
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    return a_dict()
+
+
+if msgspec is not None:
+    _encoder_msgspec = msgspec.json.Encoder(enc_hook=_serializar)
+    _decoder_msgspec = msgspec.json.Decoder()
+
+
+def _loads_stdlib(datos):
+    return json.loads(datos)
+
+
+def _dumps_stdlib(obj, compacto):
+    if compacto:
+        texto = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_serializar)
+    else:
+        texto = json.dumps(obj, ensure_ascii=False, indent=2, default=_serializar)
+    return texto.encode("utf-8")
+
+
+def loads(datos):
+    """Decodifica un documento JSON desde bytes o str"""
+    if BACKEND == "orjson":
+        try:
+            return orjson.loads(datos)
+        except orjson.JSONDecodeError:
+            return _loads_stdlib(datos)
+    if BACKEND == "msgspec":
+        try:
+            return _decoder_msgspec.decode(datos.encode("utf-8") if isinstance(datos, str) else datos)
+        except msgspec.DecodeError:
+            return _loads_stdlib(datos)
+    return _loads_stdlib(datos)
+
+
+def dumps_bytes(obj, compacto=False):
+    """Codifica obj como JSON en UTF-8 (bytes)"""
+    if BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, default=_serializar, option=0 if compacto else orjson.OPT_INDENT_2)
+        except TypeError:
+            return _dumps_stdlib(obj, compacto)
+    if BACKEND == "msgspec":
+        try:
+            datos = _encoder_msgspec.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            return _dumps_stdlib(obj, compacto)
+        return datos if compacto else msgspec.json.format(datos, indent=2)
+    return _dumps_stdlib(obj, compacto)
+
+
+def dumps(obj, compacto=False):
+    """Codifica obj como JSON (str)"""
+    return dumps_bytes(obj, compacto).decode("utf-8")
+
+
+def leer_archivo(ruta):
+    """Carga un archivo JSON completo"""
+    with open(ruta, "rb") as f:
+        return loads(f.read())
+
+
+def escribir_archivo(ruta, obj, compacto=False):
+    """Escribe obj en un archivo JSON (UTF-8)"""
+    datos = dumps_bytes(obj, compacto)
+    with open(ruta, "wb") as f:
+        f.write(datos)
+
+
+class EscritorLista:
+    """Lista JSON escrita de a un elemento (mismo archivo que escribir_archivo con la lista completa)"""
+
+    def __init__(self, ruta, compacto=False):
+        self.ruta = ruta
+        self.compacto = compacto
+        self.cantidad = 0
+        self._archivo = open(ruta, "wb")
+
+    def agregar(self, obj):
+        datos = dumps_bytes(obj, self.compacto)
+        if self.compacto:
+            self._archivo.write(b"," if self.cantidad else b"[")
+        else:
+            # Un elemento de la lista va indentado un nivel más (los strings JSON no tienen saltos de línea)
+            self._archivo.write(b",\n  " if self.cantidad else b"[\n  ")
+            datos = datos.replace(b"\n", b"\n  ")
+        self._archivo.write(datos)
+        self.cantidad += 1
+
+    def close(self):
+        if self.cantidad == 0:
+            self._archivo.write(b"[]")
+        else:
+            self._archivo.write(b"]" if self.compacto else b"\n]")
+        self._archivo.close()
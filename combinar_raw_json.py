@@ -1,8 +1,9 @@
 import os
-import json
 import glob
 from datetime import datetime
 
+import codec_json
+
 '''
 SCRIPT PARA COMBINAR ARCHIVOS JSON CRUDOS (__NEXT_DATA__) EN UN SOLO ARCHIVO JSON.
 Este script busca todos los archivos JSON en la carpeta de JSONs crudos de productos,
@@ -14,6 +15,9 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RAW_JSON_INPUT_DIR = os.path.join(BASE_DIR, "Resultados_Unimarc", "RAW_JSON") # Carpeta de entrada modificada
 OUTPUT_DIR = os.path.join(BASE_DIR, "Resultados JSON Unificados") # Carpeta de salida modificada
 
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
 def generar_timestamp():
     """Genera un timestamp único para nombrar archivos"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -49,13 +53,12 @@ def listar_archivos_json():
 def validar_json_y_cargar(ruta_archivo):
     """Valida que un archivo contenga JSON válido y lo carga."""
     try:
-        with open(ruta_archivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = codec_json.leer_archivo(ruta_archivo)
         # Opcional: verificar si es un objeto (diccionario en Python)
         if not isinstance(data, dict):
             print(f"Advertencia: El archivo {os.path.basename(ruta_archivo)} contiene JSON válido, pero no es un objeto (diccionario). Se incluirá tal cual.")
         return data
-    except json.JSONDecodeError as e:
+    except codec_json.JSONDecodeError as e:
         print(f"Error de decodificación JSON en archivo {os.path.basename(ruta_archivo)}: {e}. Archivo excluido.")
         return None
     except Exception as e:
@@ -103,8 +106,7 @@ def guardar_json_combinado(datos_combinados):
     ruta_completa = os.path.join(OUTPUT_DIR, nombre_archivo)
     
     try:
-        with open(ruta_completa, 'w', encoding='utf-8') as f:
-            json.dump(datos_combinados, f, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(ruta_completa, datos_combinados, compacto=JSON_COMPACTO)
         print(f"JSON combinado guardado exitosamente en: {ruta_completa}")
         return ruta_completa
     except Exception as e:
@@ -0,0 +1,75 @@
+import threading
+from collections import Counter
+
+'''
+CONTABILIDAD DE BYTES TRANSFERIDOS POR CORRIDA
+ClienteHttp (cliente_http.py) registra aquí cada respuesta con los bytes que viajaron por la red
+(comprimidos, según Content-Encoding) y los bytes ya descomprimidos, agrupados por fase (listados,
+detalles...) y por categoría. Al final de main() se imprime resumen() para dimensionar el ancho
+de banda y comprobar que la compresión (gzip/br/zstd) realmente se negocia con el servidor.
+
+Origen de cada respuesta:
+- "red": descargada completa.
+- "304": servida por la cache condicional (solo viajaron encabezados).
+- "cache": servida por la cache de respuestas en disco (no hubo solicitud).
+'''
+
+
+def _formatear_bytes(cantidad):
+    for unidad in ("B", "KB", "MB", "GB"):
+        if cantidad < 1024 or unidad == "GB":
+            return f"{cantidad:.0f} {unidad}" if unidad == "B" else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+
+
+class ContadorBytes:
+    """Acumula solicitudes y bytes comprimidos/descomprimidos por (fase, categoría)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totales = {}  # (fase, categoria) -> [solicitudes, comprimidos, descomprimidos]
+        self._origenes = Counter()
+        self._codificaciones = Counter()
+
+    def registrar(self, fase, categoria, comprimidos, descomprimidos, codificacion="identity", origen="red"):
+        with self._lock:
+            totales = self._totales.setdefault((fase, categoria), [0, 0, 0])
+            totales[0] += 1
+            totales[1] += comprimidos
+            totales[2] += descomprimidos
+            self._origenes[origen] += 1
+            if origen == "red":
+                self._codificaciones[codificacion] += 1
+
+    def resumen(self):
+        """Tabla por fase y categoría, total por fase, total general y codificaciones recibidas"""
+        with self._lock:
+            totales = {clave: list(valores) for clave, valores in self._totales.items()}
+            origenes = dict(self._origenes)
+            codificaciones = dict(self._codificaciones)
+
+        lineas = [
+            "Resumen de transferencia (bytes en red vs. bytes descomprimidos):",
+            f"  {'Fase':<12}{'Categoría':<40}{'Solicitudes':>12}{'En red':>12}{'Descomprimido':>15}{'Ratio':>8}",
+        ]
+
+        def linea(fase, categoria, valores):
+            solicitudes, comprimidos, descomprimidos = valores
+            ratio = f"{descomprimidos / comprimidos:.1f}x" if comprimidos else "-"
+            return (f"  {fase:<12}{categoria[:39]:<40}{solicitudes:>12}{_formatear_bytes(comprimidos):>12}"
+                    f"{_formatear_bytes(descomprimidos):>15}{ratio:>8}")
+
+        total_general = [0, 0, 0]
+        for fase in dict.fromkeys(fase for fase, _ in totales):  # en el orden en que se ejecutaron
+            total_fase = [0, 0, 0]
+            for (fase_clave, categoria), valores in sorted(totales.items()):
+                if fase_clave != fase:
+                    continue
+                lineas.append(linea(fase, categoria, valores))
+                total_fase = [a + b for a, b in zip(total_fase, valores)]
+            lineas.append(linea(fase, "(total fase)", total_fase))
+            total_general = [a + b for a, b in zip(total_general, total_fase)]
+        lineas.append(linea("TOTAL", "", total_general))
+        lineas.append("  Origen de las respuestas: " + ", ".join(f"{k}={v}" for k, v in sorted(origenes.items())))
+        lineas.append("  Content-Encoding recibido: " + (", ".join(f"{k}={v}" for k, v in sorted(codificaciones.items())) or "-"))
+        return "\n".join(lineas)
@@ -0,0 +1,390 @@
+from extraccion import Campo, compilar, compilar_ruta
+from indice_queries import IndiceQueries
+from next_data_perezoso import NO_RESUELTO
+
+'''
+ESPECIFICACIONES DE EXTRACCIÓN DE UNIMARC (ver extraccion.py)
+Cada mapeo "campo de salida <- ruta en __NEXT_DATA__" vive aquí una sola vez y se compila al importar
+el módulo. Los scrapers solo ubican el nodo (producto, precio, priceDetail...) y llaman al extractor.
+Los nodos dentro de dehydratedState.queries se ubican con el índice de queries de la página
+(indexar_queries), armado una sola vez por página; sobre un NextDataPerezoso, indexar_queries_de()
+decodifica solo las queries que mencionan los campos buscados.
+
+Los nombres de salida de cada script se mantienen tal como estaban: main-scrap.py y
+scraper-detalles-precio.py comparten nombres, Scrap Unificado Unimarc.py usa los suyos (sufijo
+_UNIFICADO). Los campos derivados que no son una ruta (especificaciones, sellos) son funciones
+reutilizables definidas al final.
+'''
+
+RUTA_PAGE_PROPS = "props.pageProps"
+RUTA_QUERIES = "props.pageProps.dehydratedState.queries"
+RUTA_PRIMER_PRODUCTO = "props.pageProps.product.products.0"
+
+
+def _es_lista(valor):
+    return isinstance(valor, list)
+
+
+def _es_dict(valor):
+    return isinstance(valor, dict)
+
+
+def _url_imagen(imagen):
+    """La imagen de un listado puede ser una URL o un dict con 'imageUrl'"""
+    if isinstance(imagen, dict):
+        return imagen.get("imageUrl")
+    return imagen if isinstance(imagen, str) else None
+
+
+# --- Ubicación de nodos ---
+
+# Lista de queries de dehydratedState. Las búsquedas dentro de ellas usan el índice de la página
+# (indexar_queries(data), indice_queries.py) y los extractores *_QUERY se aplican a cada state.data.
+NODO_QUERIES = compilar_ruta(RUTA_QUERIES)
+
+
+def indexar_queries(data):
+    """IndiceQueries de pageProps.dehydratedState.queries (una vez por página)"""
+    return IndiceQueries(NODO_QUERIES(data, []))
+
+
+def indexar_queries_de(documento, *campos):
+    """
+    IndiceQueries para buscar `campos` en un NextDataPerezoso (next_data_perezoso.py): solo se
+    decodifican las queries que los mencionan; si no se puede, se indexa el documento completo.
+    """
+    queries = documento.elementos_con(RUTA_QUERIES, *campos)
+    if queries is NO_RESUELTO:
+        return indexar_queries(documento.completo())
+    return IndiceQueries(queries)
+
+
+PRODUCTO_PAGE_PROPS = Campo(f"{RUTA_PAGE_PROPS}.product").compilar()
+PRODUCTOS_PAGE_PROPS = Campo(f"{RUTA_PAGE_PROPS}.products", si=_es_lista).compilar()
+
+# Primer producto de pageProps.product.products (ahí están price, priceDetail y promotion)
+NODO_PRIMER_PRODUCTO = Campo(RUTA_PRIMER_PRODUCTO).compilar()
+
+PRODUCTO_QUERY = Campo("product", si=bool).compilar()
+PRIMER_PRODUCTO_QUERY = Campo("products.0").compilar()
+PRODUCTOS_LISTADO_QUERY = Campo("availableProducts", si=bool).compilar()
+
+# Scrap Unificado Unimarc.py: 'product', products[0] si parece un producto (tiene nameComplete) o
+# products[0].item
+PRODUCTO_UNIFICADO_QUERY = Campo(
+    "product",
+    Campo("products.0", si=lambda producto: _es_dict(producto) and "nameComplete" in producto),
+    Campo("products.0.item", si=_es_dict),
+).compilar()
+
+# Scrap Unificado Unimarc.py: products[0] si tiene price o priceDetail
+ITEM_PRECIO_UNIFICADO_QUERY = Campo(
+    "products.0",
+    si=lambda producto: _es_dict(producto) and ("price" in producto or "priceDetail" in producto),
+).compilar()
+
+PRODUCTOS_LISTADO_UNIFICADO_QUERY = Campo("availableProducts", "productSearch.products", si=_es_lista).compilar()
+
+# Tabla nutricional en una query: en data.response, en data, en products[0] o en products[0].item
+TABLAS_NUTRICIONALES_QUERY = Campo(
+    "data.response.nutritional_tables_sets",
+    "nutritional_tables_sets",
+    "products.0.nutritional_tables_sets",
+    "products.0.item.nutritional_tables_sets",
+).compilar()
+
+
+def nodo_producto(data, indice):
+    """Nodo producto de las páginas de detalle: pageProps.product o el primer 'product' no vacío de las queries"""
+    producto = PRODUCTO_PAGE_PROPS(data)
+    if producto is not None:
+        return producto
+    return indice.primero(PRODUCTO_QUERY, "product")
+
+
+def nodo_producto_unificado(data, indice):
+    """Scrap Unificado Unimarc.py: pageProps.product o el primer producto reconocible de las queries"""
+    return PRODUCTO_PAGE_PROPS(data) or indice.primero(PRODUCTO_UNIFICADO_QUERY, "product", "products")
+
+
+def nodo_item_precio_unificado(data, indice):
+    """Scrap Unificado Unimarc.py: item con los precios (pageProps o la primera query con price/priceDetail)"""
+    return NODO_PRIMER_PRODUCTO(data) or indice.primero(ITEM_PRECIO_UNIFICADO_QUERY, "products")
+
+
+def nodo_productos_listado(indice):
+    """Primera lista no vacía de productos (availableProducts) de una página de listado"""
+    return indice.primero(PRODUCTOS_LISTADO_QUERY, "availableProducts")
+
+
+def nodo_productos_listado_unificado(data, indice):
+    """Scrap Unificado Unimarc.py: availableProducts o productSearch.products de una query; si no, pageProps.products"""
+    return (indice.primero(PRODUCTOS_LISTADO_UNIFICADO_QUERY, "availableProducts", "productSearch")
+            or PRODUCTOS_PAGE_PROPS(data))
+
+
+def productos_listado_unificado_perezoso(documento):
+    """nodo_productos_listado_unificado sobre un NextDataPerezoso, sin decodificar la página completa"""
+    productos = indexar_queries_de(documento, "availableProducts", "productSearch").primero(
+        PRODUCTOS_LISTADO_UNIFICADO_QUERY, "availableProducts", "productSearch")
+    if productos:
+        return productos
+    productos = documento.valor_en_ruta(f"{RUTA_PAGE_PROPS}.products")
+    if productos is NO_RESUELTO:
+        return PRODUCTOS_PAGE_PROPS(documento.completo())
+    return productos if _es_lista(productos) else None
+
+
+def tablas_nutricionales_queries(indice):
+    """Primera tabla nutricional encontrada en las queries (main-scrap.py la busca antes en el producto)"""
+    return indice.primero(TABLAS_NUTRICIONALES_QUERY, "data", "nutritional_tables_sets", "products")
+
+
+# --- Listados ---
+
+PRODUCTO_LISTADO = compilar({
+    "nombre": "nameComplete",
+    "marca": "brand",
+    "sku": "itemId",
+    "precio": "sellers.0.price",
+    "url_imagen": "images.0",
+    "url_relativa": "detailUrl",
+})
+
+# Campos del listado que cambian cuando cambia el producto: su huella decide si main-scrap.py vuelve a
+# descargar el detalle en modo incremental (huellas_listado.py)
+HUELLA_LISTADO = compilar({
+    "sku": "itemId",
+    "precio": "sellers.0.price",
+    "imagenes": "images",
+    "nombre": "nameComplete",
+})
+
+# Campos de precio, promoción y stock de cada producto de availableProducts: instantánea de precios de
+# main-scrap.py (SOLO_PRECIOS), sin visitar las páginas de detalle. Se aceptan también los nombres
+# VTEX de commertialOffer
+PRECIO_LISTADO = compilar({
+    "sku": "itemId",
+    "nombre": "nameComplete",
+    "precio": Campo("sellers.0.price", "sellers.0.commertialOffer.Price"),
+    "precio_lista": Campo("sellers.0.listPrice", "sellers.0.commertialOffer.ListPrice"),
+    "precio_sin_descuento": "sellers.0.priceWithoutDiscount",
+    "ahorro": "sellers.0.saving",
+    "precio_unitario": "sellers.0.ppum",
+    "precio_unitario_lista": "sellers.0.ppumListPrice",
+    "tipo_promocion": "priceDetail.promotionType",
+    "porcentaje_descuento": "priceDetail.discountPercentage",
+    "mensaje_promocion": "priceDetail.promotionMessage",
+    "etiqueta_promocional": "priceDetail.promotionalTag.text",
+    "stock": Campo("sellers.0.availableQuantity", "sellers.0.commertialOffer.AvailableQuantity"),
+})
+
+PRODUCTO_LISTADO_UNIFICADO = compilar({
+    "nombre": Campo("nameComplete", "productName", como_or=True),
+    "marca": "brand",
+    "sku": Campo("itemId", "productId", como_or=True),
+    "precio_listado": Campo("sellers.0.commertialOffer.Price", "sellers.0.commertialOffer.price"),
+    "url_imagen": Campo("images.0", transformar=_url_imagen),
+    "url_relativa": Campo("linkText", "detailUrl", como_or=True),
+})
+
+# --- Datos generales del producto ---
+
+DATOS_BASICOS_PRODUCTO_SPEC = {
+    "nombre": Campo("nameComplete", "name", como_or=True),
+    "nombre_corto": "name",
+    "marca": "brand",
+    "sku": Campo("productId", "itemId", como_or=True),
+    "categoria": "categoryId",
+    "descripcion": "description",
+}
+DATOS_BASICOS_PRODUCTO = compilar(DATOS_BASICOS_PRODUCTO_SPEC)
+
+# scraper-detalles-dentro-producto.py toma el nombre solo de nameComplete
+DATOS_BASICOS_PRODUCTO_DETALLE = compilar({**DATOS_BASICOS_PRODUCTO_SPEC, "nombre": "nameComplete"})
+
+# get-detalles-nutri-precios-desc-etc.py guarda solo nombre, sku y descripción
+DATOS_RESUMEN_PRODUCTO = compilar({
+    campo: DATOS_BASICOS_PRODUCTO_SPEC[campo] for campo in ("nombre", "sku", "descripcion")
+})
+
+DATOS_GENERALES_UNIFICADO = compilar({
+    "nombre_completo": Campo("nameComplete", "productName", como_or=True),
+    "nombre_corto": "name",
+    "marca": Campo("brand", "brandName", como_or=True),
+    "sku_principal": Campo("productId", "itemId", como_or=True),
+    "id_item": "itemId",
+    "id_categoria": "categoryId",
+    "descripcion_corta": "description",
+})
+
+# Nombre e identificador del item para scraper-detalles-precio.py
+IDENTIFICACION_ITEM = compilar({
+    "nombre_producto": Campo("nameComplete", "name", como_or=True),
+    "id_producto": Campo("sku", "itemId", como_or=True),
+})
+
+# --- Precios y promociones ---
+
+PRECIO_BASE = compilar({
+    "precio_normal": "listPrice",
+    "precio_oferta": "price",
+    "precio_sin_descuento": "priceWithoutDiscount",
+    "ahorro": "saving",
+    "precio_unitario": "ppum",
+    "precio_unitario_lista": "ppumListPrice",
+})
+
+DETALLE_PROMOCION_SPEC = {
+    "tipo_promocion": "promotionType",
+    "nombre_promocion": "promotionName",
+    "id_promocion": "promotionId",
+    "codigo_tag_promocional": "promotionalTagCode",
+    "precio_lista": "listPrice",
+    "precio_unitario_lista": "ppumListPrice",
+    "precio_descuento": "discountPrice",
+    "precio_unitario_descuento": "discountPpumPrice",
+    "porcentaje_descuento": "discountPercentage",
+    "mensaje_promocion": "promotionMessage",
+    "items_requeridos": "itemsRequiredForPromotion",
+}
+DETALLE_PROMOCION = compilar(DETALLE_PROMOCION_SPEC)
+
+# Versión reducida que main-scrap.py usa cuando el precio sale de dehydratedState
+DETALLE_PROMOCION_RESUMIDO = compilar({
+    campo: DETALLE_PROMOCION_SPEC[campo] for campo in (
+        "tipo_promocion", "nombre_promocion", "id_promocion", "precio_lista",
+        "porcentaje_descuento", "mensaje_promocion",
+    )
+})
+
+ETIQUETA_PROMOCIONAL = compilar({
+    "id_campania": "campaignId",
+    "texto": "text",
+    "color_texto": "textColor",
+    "color_fondo": "color",
+})
+
+PROMOCION_ADICIONAL = compilar({
+    "tiene_ahorro": "hasSavings",
+    "nombre": "name",
+    "tipo": "type",
+    "codigo_descripcion": "descriptionCode",
+    "mensaje_descripcion": "descriptionMessage",
+    "precio": "price",
+    "mensaje_oferta": "offerMessage",
+    "ahorro": "saving",
+    "precio_unitario": "ppum",
+})
+
+PRECIO_BASE_UNIFICADO = compilar({
+    "precio_lista_base": "listPrice",
+    "precio_oferta_actual": "price",
+    "precio_sin_descuento_directo": "priceWithoutDiscount",
+    "ahorro_directo": "saving",
+    "precio_por_unidad_medida_oferta": "ppum",
+    "precio_por_unidad_medida_lista": "ppumListPrice",
+})
+
+DETALLE_PROMOCION_UNIFICADO = compilar({
+    "tipo_promocion": "promotionType",
+    "nombre_promocion": "promotionName",
+    "id_promocion": "promotionId",
+    "codigo_tag_promocional": "promotionalTagCode",
+    "precio_lista_promo": "listPrice",
+    "precio_descuento_promo": "discountPrice",
+    "ppum_lista_promo": "ppumListPrice",
+    "ppum_descuento_promo": "discountPpumPrice",
+    "porcentaje_descuento_promo": "discountPercentage",
+    "mensaje_promocion": "promotionMessage",
+    "items_requeridos_promo": "itemsRequiredForPromotion",
+})
+
+ETIQUETA_PROMOCIONAL_UNIFICADA = compilar({
+    "id_campania": "campaignId",
+    "texto_etiqueta": "text",
+    "color_texto": "textColor",
+    "color_fondo": "color",
+})
+
+PROMOCION_ADICIONAL_UNIFICADA = compilar({
+    "tiene_ahorro": "hasSavings",
+    "nombre_promo_adicional": "name",
+    "tipo_promo_adicional": "type",
+    "codigo_descripcion": "descriptionCode",
+    "mensaje_descripcion": "descriptionMessage",
+    "precio_promo_adicional": "price",
+    "mensaje_oferta_adicional": "offerMessage",
+    "ahorro_promo_adicional": "saving",
+    "ppum_promo_adicional": "ppum",
+})
+
+# Precio y disponibilidad VTEX del primer vendedor (items[0].sellers[0].commertialOffer)
+NODO_PRIMER_VENDEDOR = Campo("items.0.sellers.0").compilar()
+OFERTA_COMERCIAL = compilar({
+    "precio": "commertialOffer.Price",
+    "precio_lista": "commertialOffer.ListPrice",
+    "cantidad_disponible": Campo("commertialOffer.AvailableQuantity", por_defecto=0),
+})
+
+
+# --- Campos derivados ---
+
+def indexar_especificaciones(producto):
+    """
+    {nombre: [especificaciones con ese nombre]} de specificationGroups, en orden de aparición.
+    Se arma en una pasada por producto; buscar cada nombre de allSpecifications recorriendo todos los
+    grupos costaba nombres x grupos x especificaciones (vinos y suplementos traen decenas de cada uno).
+    """
+    indice = {}
+    for grupo in producto.get("specificationGroups") or []:
+        if not isinstance(grupo, dict):
+            continue
+        for especificacion in grupo.get("specifications") or []:
+            if not isinstance(especificacion, dict):
+                continue
+            try:
+                indice.setdefault(especificacion.get("name"), []).append(especificacion)
+            except TypeError:
+                # Nombre no hasheable: no puede coincidir con un nombre de allSpecifications
+                continue
+    return indice
+
+
+def _con_nombre(indice, nombre):
+    try:
+        return indice.get(nombre, ())
+    except TypeError:
+        return ()
+
+
+def especificaciones_listadas(producto, indice=None):
+    """Primer valor de cada especificación nombrada en allSpecifications (formato de main-scrap.py)"""
+    nombres = producto.get("allSpecifications") or []
+    if not nombres:
+        return []
+    if indice is None:
+        indice = indexar_especificaciones(producto)
+    especificaciones = []
+    for nombre_especificacion in nombres:
+        for especificacion in _con_nombre(indice, nombre_especificacion):
+            valores = especificacion.get("values")
+            especificaciones.append({
+                "nombre": nombre_especificacion,
+                "valor": valores[0] if valores else None,
+            })
+    return especificaciones
+
+
+def nombres_sellos(producto):
+    """Nombres de los sellos de advertencia (warnings) del producto"""
+    return [sello.get("name") for sello in producto.get("warnings") or []]
+
+
+def buscar_especificacion(producto, nombre):
+    """Primera especificación con ese nombre en specificationGroups (dict con 'name' y 'values'), o None"""
+    for grupo in producto.get("specificationGroups") or []:
+        for especificacion in grupo.get("specifications") or []:
+            if especificacion.get("name") == nombre:
+                return especificacion
+    return None
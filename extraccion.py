@@ -0,0 +1,192 @@
+from recorrido_json import COMODIN
+
+'''
+EXTRACCIÓN DECLARATIVA DE CAMPOS DESDE __NEXT_DATA__
+Los scrapers repetían los mismos mapeos (campo de salida <- ruta en el JSON) como cadenas de .get()
+con alternativas escritas a mano. Aquí cada mapeo se declara una sola vez como una especificación:
+
+    {"campo_salida": "ruta.en.el.json",
+     "otro_campo": Campo("ruta.preferida", "ruta.alternativa", como_or=True),
+     "sub_objeto": {...otra especificación sobre el mismo nodo...}}
+
+compilar(especificacion) la convierte UNA vez en funciones de acceso (closures) y devuelve un
+extractor: extractor(nodo) -> dict. Las especificaciones de Unimarc están en especificaciones_unimarc.py.
+
+Rutas:
+- Texto con segmentos separados por punto: "props.pageProps.product.products.0.item". Los segmentos
+  numéricos son índices de lista; también se acepta una tupla/lista de segmentos. "" es el propio nodo.
+- "*" recorre todos los elementos de una lista (o valores de un diccionario) y se queda con el primer
+  resultado no None: "props.pageProps.dehydratedState.queries.*.state.data.product".
+- Una ruta inexistente (clave ausente, índice fuera de rango, tipo distinto) vale None, como
+  safe_get() o .get() encadenados, sin lanzar excepciones.
+
+Campo(*rutas): rutas candidatas en orden de preferencia; gana la primera con valor no None. Una
+candidata también puede ser un EnCada(ruta_lista, campo): prueba `campo` en cada elemento de la lista
+(todas sus rutas en el primer elemento, luego en el segundo...) y devuelve el primer resultado.
+- como_or=True reproduce `a.get(x) or a.get(y)`: gana el primer valor verdadero y, si ninguno lo es,
+  queda el de la última ruta.
+- si=predicado: una candidata solo se acepta si predicado(valor) es verdadero.
+- transformar=funcion: se aplica al valor elegido si no es None (por ejemplo otro extractor compilado,
+  para anidar una especificación bajo una ruta).
+- por_defecto: valor cuando ninguna candidata da resultado.
+
+extraer_lote(extractor, documentos) aplica un extractor a muchos documentos ya decodificados.
+'''
+
+_FALTA = object()
+
+
+def _segmentos(ruta):
+    """Normaliza una ruta ("a.b.0", tupla o lista) a una tupla de segmentos (str o int)"""
+    if isinstance(ruta, (tuple, list)):
+        return tuple(ruta)
+    if ruta == "":
+        return ()
+    return tuple(int(segmento) if segmento.isdigit() else segmento for segmento in ruta.split("."))
+
+
+def _compilar_tramo(segmentos):
+    """Acceso sin comodines: recorre los segmentos y devuelve _FALTA si alguno no existe"""
+    if not segmentos:
+        return lambda nodo: nodo
+    if len(segmentos) == 1 and not isinstance(segmentos[0], int):
+        clave = segmentos[0]
+        return lambda nodo: nodo.get(clave, _FALTA) if type(nodo) is dict else _FALTA
+
+    def acceder(nodo):
+        for segmento in segmentos:
+            if type(segmento) is int:
+                if type(nodo) is not list or not 0 <= segmento < len(nodo):
+                    return _FALTA
+                nodo = nodo[segmento]
+            else:
+                if type(nodo) is not dict:
+                    return _FALTA
+                nodo = nodo.get(segmento, _FALTA)
+                if nodo is _FALTA:
+                    return _FALTA
+        return nodo
+    return acceder
+
+
+def _compilar_segmentos(segmentos):
+    if COMODIN not in segmentos:
+        return _compilar_tramo(segmentos)
+    posicion = segmentos.index(COMODIN)
+    hasta_comodin = _compilar_tramo(segmentos[:posicion])
+    resto = _compilar_segmentos(segmentos[posicion + 1:])
+
+    def acceder(nodo):
+        contenedor = hasta_comodin(nodo)
+        if type(contenedor) is dict:
+            elementos = contenedor.values()
+        elif type(contenedor) is list:
+            elementos = contenedor
+        else:
+            return _FALTA
+        for elemento in elementos:
+            valor = resto(elemento)
+            if valor is not _FALTA and valor is not None:
+                return valor
+        return _FALTA
+    return acceder
+
+
+def compilar_ruta(ruta):
+    """Función de acceso a una ruta: acceso(nodo, por_defecto=None)"""
+    acceder = _compilar_segmentos(_segmentos(ruta))
+
+    def acceso(nodo, por_defecto=None):
+        valor = acceder(nodo)
+        return por_defecto if valor is _FALTA else valor
+    return acceso
+
+
+class Campo:
+    """Campo de salida con rutas candidatas en orden de preferencia"""
+
+    def __init__(self, *rutas, como_or=False, si=None, transformar=None, por_defecto=None):
+        self.rutas = rutas or ("",)
+        self.como_or = como_or
+        self.si = si
+        self.transformar = transformar
+        self.por_defecto = por_defecto
+
+    def compilar(self):
+        accesos = [ruta.compilar() if hasattr(ruta, "compilar") else _compilar_segmentos(_segmentos(ruta))
+                   for ruta in self.rutas]
+        como_or, si, transformar, por_defecto = self.como_or, self.si, self.transformar, self.por_defecto
+
+        if len(accesos) == 1 and si is None and transformar is None:
+            acceder = accesos[0]
+
+            def extraer_simple(nodo):
+                valor = acceder(nodo)
+                return por_defecto if valor is _FALTA or valor is None else valor
+            return extraer_simple
+
+        def extraer(nodo):
+            valor = None
+            for acceder in accesos:
+                candidato = acceder(nodo)
+                if candidato is _FALTA:
+                    candidato = None
+                if si is not None and candidato is not None and not si(candidato):
+                    candidato = None
+                valor = candidato
+                if (candidato if como_or else candidato is not None):
+                    break
+            if valor is None:
+                return por_defecto
+            return transformar(valor) if transformar is not None else valor
+        return extraer
+
+
+class EnCada:
+    """Para cada elemento de la lista en `ruta`, aplica `valor` (ruta, Campo...) y devuelve el primer resultado no None"""
+
+    def __init__(self, ruta, valor):
+        self.ruta = ruta
+        self.valor = valor
+
+    def compilar(self):
+        acceder_contenedor = _compilar_segmentos(_segmentos(self.ruta))
+        extraer = _compilar_valor(self.valor)
+
+        def extraer_en_cada(nodo):
+            contenedor = acceder_contenedor(nodo)
+            if type(contenedor) is not list:
+                return None
+            for elemento in contenedor:
+                valor = extraer(elemento)
+                if valor is not None:
+                    return valor
+            return None
+        return extraer_en_cada
+
+
+def _compilar_valor(valor):
+    if isinstance(valor, (Campo, EnCada)):
+        return valor.compilar()
+    if isinstance(valor, dict):
+        return compilar(valor)
+    if callable(valor):
+        return valor
+    return Campo(valor).compilar()
+
+
+def compilar(especificacion):
+    """Compila una especificación {campo: ruta | Campo | especificación anidada} en un extractor"""
+    campos = tuple((nombre, _compilar_valor(valor)) for nombre, valor in especificacion.items())
+
+    def extractor(nodo):
+        return {nombre: extraer(nodo) for nombre, extraer in campos}
+    extractor.campos = tuple(nombre for nombre, _ in campos)
+    return extractor
+
+
+def extraer_lote(extractor, documentos):
+    """Aplica un extractor (o una especificación sin compilar) a varios documentos"""
+    if isinstance(extractor, dict):
+        extractor = compilar(extractor)
+    return [extractor(documento) for documento in documentos]
@@ -0,0 +1,166 @@
+import sqlite3
+import threading
+import time
+
+'''
+FRONTERA PERSISTENTE DEL RECORRIDO (REANUDAR CORRIDAS)
+Si una corrida de varias horas se cortaba en el producto 3.000 de 5.000, la siguiente empezaba de
+nuevo desde urls_con_filtros.txt: no quedaba registro de qué listados y productos ya estaban hechos.
+
+Frontera guarda en SQLite (journal WAL) cada URL de listado y de producto con su estado, intentos y
+fechas. Los scrapers la actualizan mientras avanzan:
+
+- listado / detalle: tipos de URL. Un listado (URL con filtro de sellos) se reanuda como unidad: sus
+  páginas se descargan juntas y el JSON del listado necesita todas. Las URLs de detalle se agregan
+  como pendientes apenas las entrega su página, antes de marcar el listado como hecho.
+- Estados: pendiente, en_vuelo (entregada a la descarga), hecha, fallida. `intentos` cuenta los
+  resultados registrados; `error` guarda el motivo de la última falla.
+- preparar(urls_listado): si la corrida anterior terminó (nada pendiente ni en vuelo), se vacía y
+  empieza una nueva: los productos que fallaron se reintentan al recorrer de nuevo los listados. Si
+  se cortó, se reanuda: se omiten los listados ya hechos y los productos pendientes, en vuelo al
+  cortarse o fallidos con menos de `max_intentos` se vuelven a descargar primero. Con
+  solo_fallidas=True solo se reintentan las URLs fallidas (sin importar los intentos), sin volver a
+  recorrer los listados.
+- despachar(urls) omite las URLs de detalle ya hechas y marca en vuelo las que entrega;
+  registrar_resultado(url, resultado) las deja hechas o fallidas según haya resultado.
+
+El consolidado de una corrida reanudada contiene lo procesado en esa corrida; los archivos por
+producto de la corrida anterior siguen en sus carpetas.
+'''
+
+PENDIENTE = "pendiente"
+EN_VUELO = "en_vuelo"
+HECHA = "hecha"
+FALLIDA = "fallida"
+
+LISTADO = "listado"
+DETALLE = "detalle"
+
+MAX_INTENTOS_POR_DEFECTO = 3
+
+
+class Frontera:
+    """Estado persistente de las URLs de listado y de detalle de una corrida"""
+
+    def __init__(self, ruta_db, max_intentos=MAX_INTENTOS_POR_DEFECTO):
+        self.ruta_db = ruta_db
+        self.max_intentos = max_intentos
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS frontera (
+                url TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                intentos INTEGER NOT NULL DEFAULT 0,
+                origen TEXT,
+                error TEXT,
+                creada REAL NOT NULL,
+                actualizada REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontera_tipo_estado ON frontera (tipo, estado);
+            """
+        )
+        self._conexion.commit()
+
+    def _por_terminar(self):
+        """
+        Cantidad de URLs sin terminar: pendientes o en vuelo. Las fallidas no cuentan: una corrida que
+        terminó con algunos productos fallidos (404, página sin __NEXT_DATA__) no se cortó, y tomarla
+        como corrida a reanudar omitiría todos sus listados hechos en las corridas siguientes
+        """
+        return self._conexion.execute(
+            "SELECT COUNT(*) FROM frontera WHERE estado IN (?, ?)", (PENDIENTE, EN_VUELO)
+        ).fetchone()[0]
+
+    def preparar(self, urls_listado, solo_fallidas=False):
+        """
+        Deja lista la frontera para una corrida y devuelve (listados a recorrer, URLs de detalle a
+        descargar antes que las que entreguen los listados)
+        """
+        with self._lock:
+            if solo_fallidas:
+                listados = self._urls(LISTADO, "estado = ?", (FALLIDA,))
+                detalles = self._urls(DETALLE, "estado = ?", (FALLIDA,))
+                print(f"Frontera: reintentando solo fallidas ({len(listados)} listados, {len(detalles)} productos)")
+                return listados, detalles
+
+            if self._por_terminar() == 0:
+                # Corrida anterior terminada (o primera corrida): se empieza de cero
+                self._conexion.execute("DELETE FROM frontera")
+            ahora = time.time()
+            self._conexion.executemany(
+                "INSERT OR IGNORE INTO frontera (url, tipo, estado, creada, actualizada) VALUES (?, ?, ?, ?, ?)",
+                ((url, LISTADO, PENDIENTE, ahora, ahora) for url in urls_listado),
+            )
+            self._conexion.commit()
+            hechos = set(self._urls(LISTADO, "estado = ?", (HECHA,)))
+            listados = [url for url in urls_listado if url not in hechos]
+            detalles = self._urls(DETALLE, "estado IN (?, ?) OR (estado = ? AND intentos < ?)",
+                                  (PENDIENTE, EN_VUELO, FALLIDA, self.max_intentos))
+        if hechos or detalles:
+            print(f"Frontera: reanudando corrida anterior ({len(hechos)} listados ya hechos, "
+                  f"{len(detalles)} productos por descargar)")
+        return listados, detalles
+
+    def _urls(self, tipo, condicion, parametros):
+        return [fila[0] for fila in self._conexion.execute(
+            f"SELECT url FROM frontera WHERE tipo = ? AND ({condicion}) ORDER BY rowid", (tipo,) + parametros
+        )]
+
+    def agregar(self, tipo, urls, origen=None):
+        """Agrega URLs como pendientes (las que ya están en la frontera no cambian)"""
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR IGNORE INTO frontera (url, tipo, estado, origen, creada, actualizada) VALUES (?, ?, ?, ?, ?, ?)",
+                ((url, tipo, PENDIENTE, origen, ahora, ahora) for url in urls if url),
+            )
+            self._conexion.commit()
+
+    def _marcar(self, url, estado, intento, error=None):
+        with self._lock:
+            self._conexion.execute(
+                "UPDATE frontera SET estado = ?, intentos = intentos + ?, error = ?, actualizada = ? WHERE url = ?",
+                (estado, intento, error, time.time(), url),
+            )
+            self._conexion.commit()
+
+    def en_vuelo(self, url):
+        self._marcar(url, EN_VUELO, 0)
+
+    def registrar_resultado(self, url, resultado, error="sin resultado"):
+        """Marca la URL como hecha si hubo resultado, si no como fallida"""
+        if resultado:
+            self._marcar(url, HECHA, 1)
+        else:
+            self._marcar(url, FALLIDA, 1, error)
+
+    def esta_hecha(self, url):
+        with self._lock:
+            fila = self._conexion.execute("SELECT estado FROM frontera WHERE url = ?", (url,)).fetchone()
+        return fila is not None and fila[0] == HECHA
+
+    def despachar(self, urls):
+        """Omite las URLs ya hechas y marca en vuelo cada una al entregarla"""
+        for url in urls:
+            if self.esta_hecha(url):
+                continue
+            self.en_vuelo(url)
+            yield url
+
+    def resumen(self):
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT tipo, estado, COUNT(*) FROM frontera GROUP BY tipo, estado ORDER BY tipo, estado"
+            ).fetchall()
+        conteos = ", ".join(f"{tipo} {estado}={cantidad}" for tipo, estado, cantidad in filas)
+        return f"Frontera: {conteos or 'vacía'}"
+
+    def close(self):
+        with self._lock:
+            self._conexion.close()
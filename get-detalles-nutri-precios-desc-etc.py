@@ -1,10 +1,11 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import os
 from datetime import datetime
-import time
-import random
+
+import codec_json
+from cliente_http import ClienteHttp
+from especificaciones_unimarc import DATOS_RESUMEN_PRODUCTO, buscar_especificacion, indexar_queries, nodo_producto
+from limitador_tasa import LimitadorAIMD
+from next_data import extraer_next_data
 
 '''
 Este script extrae información detallada de productos de Unimarc a partir de URLs de productos individuales.
@@ -35,6 +36,9 @@ headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
 }
 
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
 def leer_urls_desde_archivo(archivo):
     """Lee las URLs de productos desde un archivo de texto"""
     urls = []
@@ -58,40 +62,96 @@ def leer_urls_desde_archivo(archivo):
     
     return urls
 
-def extract_and_save_raw_json(soup, product_id, timestamp):
+def extract_and_save_raw_json(html, product_id, timestamp):
     """Extrae y guarda el JSON completo de __NEXT_DATA__"""
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+    json_data_string = extraer_next_data(html)
     
-    if not script_tag or not script_tag.string:
+    if not json_data_string:
         print("No se encontró el JSON __NEXT_DATA__ o está vacío.")
         return None
     
+    try:
+        # Se decodifica para validarlo y se guarda indentado (o compacto según JSON_COMPACTO)
+        json_data = codec_json.loads(json_data_string)
+    except codec_json.JSONDecodeError:
+        print("Error al decodificar el JSON de __NEXT_DATA__.")
+        return None
+    return guardar_raw_json(json_data, product_id, timestamp)
+
+def guardar_raw_json(json_data, product_id, timestamp):
+    """Guarda el __NEXT_DATA__ ya decodificado; devuelve json_data o None si no se pudo escribir"""
     try:
         # Crear directorio para guardar los JSONs
         json_raw_folder = "RAW_JSON_Productos_Unimarc"
         os.makedirs(json_raw_folder, exist_ok=True)
         
-        # Formatear el JSON para mejor legibilidad
-        json_data = json.loads(script_tag.string)
-        json_formatted = json.dumps(json_data, ensure_ascii=False, indent=4)
-        
         # Guardar el JSON completo
         json_filename = f"raw_json_producto_{product_id}_{timestamp}.json"
         json_path = os.path.join(json_raw_folder, json_filename)
         
-        with open(json_path, "w", encoding="utf-8") as f:
-            f.write(json_formatted)
+        codec_json.escribir_archivo(json_path, json_data, compacto=JSON_COMPACTO)
         
         print(f"JSON completo de __NEXT_DATA__ guardado como: {json_path}")
         return json_data
-    except json.JSONDecodeError:
-        print("Error al decodificar el JSON de __NEXT_DATA__.")
-        return None
     except Exception as e:
         print(f"Error al guardar el JSON completo: {e}")
         return None
 
-def extract_product_details(soup, url):
+def _completar_desde_next_data(data, product_details):
+    """Completa product_details con la información nutricional y la descripción del __NEXT_DATA__"""
+    try:
+        # Extraer solo información básica, nutricional y descripción completa
+        
+        # Índice de dehydratedState.queries (una sola pasada por página)
+        indice = indexar_queries(data)
+        
+        # Nodo del producto: pageProps.product o el primer 'product' de dehydratedState
+        product_data = nodo_producto(data, indice)
+        
+        # Extraer información nutricional y descripción desde dehydratedState
+        nutritional_info = {}
+        full_description = None
+        
+        # Solo las queries cuyo state.data tiene 'data'; gana la última que trae cada campo
+        for state_data in indice.datos_con("data"):
+            # Buscar datos nutricionales en diferentes estructuras
+            if "response" in state_data.get("data", {}):
+                response_data = state_data["data"]["response"]
+                
+                # Extraer descripción completa si existe
+                if "full_description" in response_data:
+                    full_description = response_data["full_description"]
+                
+                # Extraer información de ingredientes/nutricional
+                if "nutritional_tables_sets" in response_data:
+                    nutritional_tables_sets = response_data["nutritional_tables_sets"]
+                    nutritional_info["nutritional_tables_sets"] = nutritional_tables_sets
+
+        # Información básica del producto
+        if product_data:
+            product_details.update(DATOS_RESUMEN_PRODUCTO(product_data))
+            
+            # Buscar información nutricional en allSpecifications
+            if "Información nutricional" in (product_data.get("allSpecifications") or []):
+                nutritional_info["tiene_informacion_nutricional"] = True
+                
+                # Valores específicos de información nutricional
+                especificacion = buscar_especificacion(product_data, "Información nutricional")
+                if especificacion is not None:
+                    nutritional_info["valores"] = especificacion.get("values", [])
+        
+        # Guardar la información nutricional encontrada
+        if nutritional_info:
+            product_details["informacion_nutricional"] = nutritional_info
+        
+        # Guardar descripción completa
+        if full_description:
+            product_details["descripcion_completa"] = full_description
+        
+    except (KeyError, IndexError, TypeError) as e:
+        print(f"Error al navegar la estructura JSON de __NEXT_DATA__: {e}")
+
+def extract_product_details(html, url):
     """Extrae detalles de un producto individual enfocándose en información nutricional y descripción"""
     product_details = {
         "url": url,
@@ -99,84 +159,16 @@ def extract_product_details(soup, url):
     }
     
     print(f"Extrayendo datos detallados del producto desde {url}")
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+    json_data_string = extraer_next_data(html)
 
-    if script_tag:
-        json_data_string = script_tag.string
+    if json_data_string is not None:
         if json_data_string:
             try:
-                data = json.loads(json_data_string)
-                
-                # Extraer solo información básica, nutricional y descripción completa
-                
-                # Intentar extraer detalles del producto desde diferentes rutas en el JSON
-                product_data = None
-                pageProps = data.get("props", {}).get("pageProps", {})
-                
-                # Buscar en diferentes ubicaciones posibles del JSON
-                if "product" in pageProps:
-                    product_data = pageProps.get("product")
-                elif "dehydratedState" in pageProps:
-                    queries = pageProps.get("dehydratedState", {}).get("queries", [])
-                    for query in queries:
-                        if query.get("state", {}).get("data", {}).get("product"):
-                            product_data = query["state"]["data"]["product"]
-                            break
-                
-                # Extraer información nutricional y descripción desde dehydratedState
-                nutritional_info = {}
-                full_description = None
-                
-                if "dehydratedState" in pageProps:
-                    queries = pageProps.get("dehydratedState", {}).get("queries", [])
-                    for query in queries:
-                        state_data = query.get("state", {}).get("data", {})
-                        
-                        # Buscar datos nutricionales en diferentes estructuras
-                        if "data" in state_data and "response" in state_data.get("data", {}):
-                            response_data = state_data["data"]["response"]
-                            
-                            # Extraer descripción completa si existe
-                            if "full_description" in response_data:
-                                full_description = response_data["full_description"]
-                            
-                            # Extraer información de ingredientes/nutricional
-                            if "nutritional_tables_sets" in response_data:
-                                nutritional_tables_sets = response_data["nutritional_tables_sets"]
-                                nutritional_info["nutritional_tables_sets"] = nutritional_tables_sets
-
-                # Información básica del producto
-                if product_data:
-                    product_details["nombre"] = product_data.get("nameComplete") or product_data.get("name")
-                    product_details["sku"] = product_data.get("productId") or product_data.get("itemId")
-                    product_details["descripcion"] = product_data.get("description")
-                    
-                    # Buscar información nutricional en allSpecifications
-                    if "allSpecifications" in product_data:
-                        specs = product_data.get("allSpecifications", [])
-                        if "Información nutricional" in specs:
-                            nutritional_info["tiene_informacion_nutricional"] = True
-                            
-                            # Buscar los valores específicos de información nutricional
-                            spec_groups = product_data.get("specificationGroups", [])
-                            for group in spec_groups:
-                                for spec in group.get("specifications", []):
-                                    if spec.get("name") == "Información nutricional":
-                                        nutritional_info["valores"] = spec.get("values", [])
-                                        break
-                
-                # Guardar la información nutricional encontrada
-                if nutritional_info:
-                    product_details["informacion_nutricional"] = nutritional_info
-                
-                # Guardar descripción completa
-                if full_description:
-                    product_details["descripcion_completa"] = full_description
-                
-            except json.JSONDecodeError:
+                data = codec_json.loads(json_data_string)
+            except codec_json.JSONDecodeError:
                 print("Error al decodificar el JSON de __NEXT_DATA__.")
-            except (KeyError, IndexError, TypeError) as e:
-                print(f"Error al navegar la estructura JSON de __NEXT_DATA__: {e}")
+            else:
+                _completar_desde_next_data(data, product_details)
         else:
             print("La etiqueta <script id='__NEXT_DATA__'> no tiene contenido.")
     else:
@@ -184,6 +176,16 @@ def extract_product_details(soup, url):
 
     return product_details
 
+def extract_product_details_from_json(data, url):
+    """Como extract_product_details, con el __NEXT_DATA__ ya decodificado (None si la página no lo trae)"""
+    product_details = {
+        "url": url,
+        "fecha_extraccion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if data is not None:
+        _completar_desde_next_data(data, product_details)
+    return product_details
+
 def save_individual_product_json(product_details, product_id):
     """Guarda los detalles de un producto individual en un archivo JSON separado"""
     try:
@@ -199,8 +201,7 @@ def save_individual_product_json(product_details, product_id):
         json_path = os.path.join(json_individual_folder, json_filename)
         
         # Guardar los detalles en formato JSON
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(product_details, f, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(json_path, product_details, compacto=JSON_COMPACTO)
         
         print(f"Detalles del producto guardados en archivo individual: {json_path}")
         return True
@@ -208,23 +209,43 @@ def save_individual_product_json(product_details, product_id):
         print(f"Error al guardar archivo JSON individual para producto {product_id}: {e}")
         return False
 
-def scrape_product_details(urls_list):
+def procesar_documento(url, data, html):
+    """
+    Extractor de información nutricional y descripción para scraper-detalles-todos.py: recibe el
+    __NEXT_DATA__ ya decodificado (None si la página no lo trae) y guarda el archivo individual.
+    """
+    product_details = extract_product_details_from_json(data, url)
+    product_id = url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1]
+    save_individual_product_json(product_details, product_id)
+    return product_details
+
+def procesar_raw_json(url, data, html):
+    """Extractor para scraper-detalles-todos.py: guarda el __NEXT_DATA__ completo del producto"""
+    if data is None:
+        return None
+    product_id = url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1]
+    guardar_raw_json(data, product_id, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    return None
+
+def scrape_product_details(urls_list, cliente=None):
     """Procesa cada URL de producto y extrae sus detalles"""
     all_products_details = []
     total_urls = len(urls_list)
+    if cliente is None:
+        cliente = ClienteHttp(limitador=LimitadorAIMD(), headers=headers)
     
     for idx, url in enumerate(urls_list, 1):
         try:
             print(f"\n[{idx}/{total_urls}] Procesando URL: {url}")
-            response = requests.get(url, headers=headers)
+            response = cliente.get(url)
             
             if response.status_code != 200:
                 print(f"Error al acceder a la URL {url}: {response.status_code}")
                 continue
 
-            soup = BeautifulSoup(response.text, "html.parser")
+            html = response.content
             
-            # Guardar el HTML para depuración si es necesario
+            # Guardar el HTML para depuración si es necesario (tal como llegó)
             product_id = url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1]
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             html_folder = "HTML_Productos_Unimarc"
@@ -233,14 +254,17 @@ def scrape_product_details(urls_list):
             html_filename = f"producto_{product_id}_{timestamp}.html"
             html_path = os.path.join(html_folder, html_filename)
             
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(soup.prettify())
+            with open(html_path, "wb") as f:
+                f.write(html)
             
-            # Extraer y guardar el JSON completo de __NEXT_DATA__
-            extract_and_save_raw_json(soup, product_id, timestamp)
+            # Extraer y guardar el JSON completo de __NEXT_DATA__ (el documento decodificado se reutiliza)
+            json_data = extract_and_save_raw_json(html, product_id, timestamp)
                 
             # Extraer detalles del producto
-            product_details = extract_product_details(soup, url)
+            if json_data is not None:
+                product_details = extract_product_details_from_json(json_data, url)
+            else:
+                product_details = extract_product_details(html, url)
             
             if product_details:
                 # Guardar en archivo JSON individual para este producto
@@ -250,21 +274,30 @@ def scrape_product_details(urls_list):
                 all_products_details.append(product_details)
                 print(f"Detalles extraídos para producto: {product_details.get('nombre', 'Nombre no disponible')}")
             
-            # Espera aleatoria para evitar bloqueos
-            wait_time = random.uniform(1.0, 3.0)
-            print(f"Esperando {wait_time:.2f} segundos antes de la siguiente solicitud...")
-            time.sleep(wait_time)
-            
         except Exception as e:
             print(f"Error al procesar la URL {url}: {e}")
     
     return all_products_details
 
-def main():
-    # Crear directorios necesarios
+def guardar_consolidado(productos_detalles, nombre_base="detalles_productos_unimarc"):
+    """Guarda los detalles de todos los productos en un archivo JSON consolidado"""
     json_folder = "JSON_Productos_Unimarc"
     os.makedirs(json_folder, exist_ok=True)
     
+    if productos_detalles:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"{nombre_base}_{len(productos_detalles)}_productos_{timestamp}.json"
+        json_path = os.path.join(json_folder, json_filename)
+        
+        codec_json.escribir_archivo(json_path, productos_detalles, compacto=JSON_COMPACTO)
+        
+        print(f"\nTotal de productos detallados extraídos: {len(productos_detalles)}")
+        print(f"Archivo JSON consolidado guardado como: {json_path}")
+        print(f"Además, cada producto ha sido guardado en su propio archivo JSON en la carpeta JSON_Individual_Productos_Unimarc")
+    else:
+        print("\nNo se lograron extraer detalles de productos.")
+
+def main():
     # Definir archivo de entrada
     archivo_urls = "Detail URLs Unimarc/urls-productos.txt"
     
@@ -283,19 +316,7 @@ def main():
     productos_detalles = scrape_product_details(urls_productos)
     
     # Guardar resultados consolidados en formato JSON (opcional, ya que ahora cada producto tiene su propio archivo)
-    if productos_detalles:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        json_filename = f"detalles_productos_unimarc_{len(productos_detalles)}_productos_{timestamp}.json"
-        json_path = os.path.join(json_folder, json_filename)
-        
-        with open(json_path, "w", encoding="utf-8") as f_json:
-            json.dump(productos_detalles, f_json, ensure_ascii=False, indent=4)
-        
-        print(f"\nTotal de productos detallados extraídos: {len(productos_detalles)}")
-        print(f"Archivo JSON consolidado guardado como: {json_path}")
-        print(f"Además, cada producto ha sido guardado en su propio archivo JSON en la carpeta JSON_Individual_Productos_Unimarc")
-    else:
-        print("\nNo se lograron extraer detalles de productos.")
+    guardar_consolidado(productos_detalles)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import codec_json
+
+'''
+MODO INCREMENTAL: HUELLAS DE LOS PRODUCTOS EN LOS LISTADOS
+Las páginas de listado ya traen, para 50 productos por solicitud, los campos que cambian cuando cambia
+un producto (itemId, sellers[0].price, images, nameComplete), y aun así cada corrida volvía a
+descargar la página de detalle de todos los productos.
+
+HuellasListado guarda en SQLite, por URL de detalle, la huella de esos campos (HUELLA_LISTADO en
+especificaciones_unimarc.py) con la que se descargó el detalle por última vez, y la fecha:
+
+- necesita_detalle(url, huella): True si el producto es nuevo, si su huella cambió, si no tiene
+  huella (no se puede comparar) o si el último detalle tiene más de `edad_maxima` segundos. La
+  decisión se toma una vez por URL y corrida (el mismo producto aparece en varios listados).
+- registrar_detalle(url, huella): se llama solo cuando el detalle se extrajo bien, así un detalle
+  fallido se vuelve a pedir en la corrida siguiente aunque el listado no haya cambiado.
+- Un cambio de SKU cambia la huella (itemId es parte de ella).
+
+En modo incremental, los consolidados de la corrida contienen solo los productos descargados en ella;
+los archivos de los demás siguen en las carpetas de corridas anteriores.
+'''
+
+EDAD_MAXIMA_POR_DEFECTO = 7 * 24 * 3600  # segundos
+
+
+def huella(campos):
+    """SHA-1 (hex) de los campos del listado en JSON compacto"""
+    return hashlib.sha1(codec_json.dumps_bytes(campos, compacto=True)).hexdigest()
+
+
+class HuellasListado:
+    """Huella del listado y fecha del último detalle descargado, por URL de detalle"""
+
+    def __init__(self, ruta_db, edad_maxima=EDAD_MAXIMA_POR_DEFECTO):
+        self.ruta_db = ruta_db
+        self.edad_maxima = edad_maxima
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS huellas (url TEXT PRIMARY KEY, huella TEXT NOT NULL, detalle REAL NOT NULL)"
+        )
+        self._conexion.commit()
+        self._decisiones = {}
+        self.nuevos = 0
+        self.cambiados = 0
+        self.vencidos = 0
+        self.sin_cambios = 0
+
+    def necesita_detalle(self, url, huella_actual):
+        """¿Hay que descargar el detalle de esta URL? (nuevo, cambiado, sin huella o vencido)"""
+        with self._lock:
+            decision = self._decisiones.get(url)
+            if decision is not None:
+                return decision
+            fila = self._conexion.execute("SELECT huella, detalle FROM huellas WHERE url = ?", (url,)).fetchone()
+            if fila is None or huella_actual is None:
+                self.nuevos += 1
+                decision = True
+            elif fila[0] != huella_actual:
+                self.cambiados += 1
+                decision = True
+            elif time.time() - fila[1] > self.edad_maxima:
+                self.vencidos += 1
+                decision = True
+            else:
+                self.sin_cambios += 1
+                decision = False
+            self._decisiones[url] = decision
+        return decision
+
+    def registrar_detalle(self, url, huella_actual):
+        """Guarda la huella con la que se descargó bien el detalle de la URL"""
+        if huella_actual is None:
+            return
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO huellas VALUES (?, ?, ?)", (url, huella_actual, time.time())
+            )
+            self._conexion.commit()
+
+    def resumen(self):
+        return (f"Modo incremental: {self.nuevos + self.cambiados + self.vencidos} detalles a descargar "
+                f"({self.nuevos} nuevos, {self.cambiados} con cambios, {self.vencidos} vencidos), "
+                f"{self.sin_cambios} sin cambios omitidos")
+
+    def close(self):
+        with self._lock:
+            self._conexion.close()
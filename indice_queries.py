@@ -0,0 +1,87 @@
+'''
+ÍNDICE DE dehydratedState.queries
+Cada página de Next.js trae en pageProps.dehydratedState.queries la lista de consultas de React Query
+({"queryKey": [nombre, argumentos...], "state": {"status": ..., "data": {...}}}). Los extractores
+recorrían esa lista varias veces por producto (producto, tabla nutricional, precio de respaldo, total
+de productos...) y populate_sql.py la recorre por cada producto para encontrar getProductDetailByEan.
+
+IndiceQueries(queries) la recorre UNA vez y deja:
+- query(nombre, *argumentos, status=None): primera query cuyo queryKey empieza con
+  [nombre, *argumentos] (y con ese state.status, si se indica). datos_query(...) devuelve su state.data.
+- datos: los state.data de todas las queries, en orden (para búsquedas en profundidad).
+- datos_con(*campos): los state.data (diccionarios) que tienen alguno de esos campos, en el orden de
+  las queries. valor(campo) es el valor del primero que lo tiene.
+- primero(extractor, *campos): primer resultado no None de extractor(state.data) entre los que
+  tienen alguno de los campos (reemplaza un for sobre las queries con break).
+
+Las queries, states o queryKey con forma inesperada (None, tipos distintos) simplemente no se indexan.
+'''
+
+
+class IndiceQueries:
+    """Índice de pageProps.dehydratedState.queries por queryKey[0] y por campos de state.data"""
+
+    def __init__(self, queries):
+        self._por_nombre = {}
+        self._por_campo = {}
+        self._datos_dict = []
+        self.datos = []
+        for query in queries if type(queries) is list else ():
+            if type(query) is not dict:
+                continue
+            estado = query.get("state")
+            estado = estado if type(estado) is dict else {}
+            clave = query.get("queryKey")
+            if type(clave) is list and clave and type(clave[0]) is str:
+                self._por_nombre.setdefault(clave[0], []).append((clave, estado))
+
+            datos = estado.get("data")
+            if datos is None:
+                continue
+            self.datos.append(datos)
+            if type(datos) is dict:
+                posicion = len(self._datos_dict)
+                self._datos_dict.append(datos)
+                for campo in datos:
+                    self._por_campo.setdefault(campo, []).append(posicion)
+
+    def __len__(self):
+        return len(self.datos)
+
+    def query(self, nombre, *argumentos, status=None):
+        """Primera query (queryKey y state) con ese nombre y argumentos, o None"""
+        for clave, estado in self._por_nombre.get(nombre, ()):
+            if argumentos and tuple(clave[1:1 + len(argumentos)]) != argumentos:
+                continue
+            if status is not None and estado.get("status") != status:
+                continue
+            return {"queryKey": clave, "state": estado}
+        return None
+
+    def datos_query(self, nombre, *argumentos, status=None):
+        """state.data de la primera query con ese nombre y argumentos, o None"""
+        query = self.query(nombre, *argumentos, status=status)
+        return query["state"].get("data") if query is not None else None
+
+    def datos_con(self, *campos):
+        """state.data que contienen alguno de los campos, en el orden de las queries"""
+        if len(campos) == 1:
+            posiciones = self._por_campo.get(campos[0], ())
+        else:
+            posiciones = sorted({posicion for campo in campos for posicion in self._por_campo.get(campo, ())})
+        return [self._datos_dict[posicion] for posicion in posiciones]
+
+    def valor(self, campo, por_defecto=None):
+        """Valor de `campo` en el primer state.data que lo contiene"""
+        posiciones = self._por_campo.get(campo)
+        if not posiciones:
+            return por_defecto
+        return self._datos_dict[posiciones[0]][campo]
+
+    def primero(self, extractor, *campos):
+        """Primer resultado no None de extractor(state.data) entre los que tienen alguno de los campos"""
+        for datos in self.datos_con(*campos):
+            valor = extractor(datos)
+            if valor is not None:
+                return valor
+        return None
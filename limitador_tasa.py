@@ -0,0 +1,108 @@
+import threading
+import time
+
+'''
+LIMITADOR DE TASA ADAPTATIVO (AIMD) PARA LAS SOLICITUDES A UNIMARC
+Reemplaza las esperas aleatorias fijas (espera_aleatoria / random.uniform + time.sleep) por un
+"token bucket" cuya tasa se ajusta según la salud de las respuestas:
+
+- Aumento aditivo: mientras las respuestas son sanas, la tasa sube ~`incremento` solicitudes/s
+  por cada segundo de tráfico.
+- Disminución multiplicativa: ante 429/503, timeouts/errores de conexión o una latencia que sube
+  por sobre `factor_latencia` veces la latencia base, la tasa se multiplica por `factor_reduccion`.
+
+Una misma instancia es segura entre hilos y debe compartirse entre la fase de listados y la fase
+de detalles, para que ambas respeten el mismo presupuesto de solicitudes.
+'''
+
+CODIGOS_SOBRECARGA = {429, 503}
+
+
+class LimitadorAIMD:
+    """Token bucket con tasa adaptativa (aumento aditivo, disminución multiplicativa)"""
+
+    def __init__(self, tasa_inicial=1.0, tasa_minima=0.2, tasa_maxima=10.0, incremento=0.2,
+                 factor_reduccion=0.5, rafaga=1.0, factor_latencia=2.0, enfriamiento=2.0):
+        self.tasa = float(tasa_inicial)
+        self.tasa_minima = float(tasa_minima)
+        self.tasa_maxima = float(tasa_maxima)
+        self.incremento = float(incremento)
+        self.factor_reduccion = float(factor_reduccion)
+        self.rafaga = float(rafaga)
+        self.factor_latencia = float(factor_latencia)
+        self.enfriamiento = float(enfriamiento)  # Segundos mínimos entre dos reducciones seguidas
+
+        self._tokens = self.rafaga
+        self._ultimo_relleno = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._ultima_reduccion = 0.0
+        self._latencia_ewma = None
+        self._latencia_base = None
+        self._lock = threading.Lock()
+
+    def _rellenar(self, ahora):
+        """Agrega los tokens acumulados desde el último relleno (debe llamarse con el lock tomado)"""
+        transcurrido = ahora - self._ultimo_relleno
+        self._tokens = min(self.rafaga, self._tokens + transcurrido * self.tasa)
+        self._ultimo_relleno = ahora
+
+    def adquirir(self):
+        """Bloquea hasta que haya un token disponible para realizar una solicitud"""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                if ahora < self._pausa_hasta:
+                    espera = self._pausa_hasta - ahora
+                else:
+                    self._rellenar(ahora)
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    espera = (1.0 - self._tokens) / self.tasa
+            time.sleep(espera)
+
+    def pausar(self, segundos):
+        """Detiene la emisión de tokens durante `segundos` (ej. por un encabezado Retry-After)"""
+        with self._lock:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + float(segundos))
+
+    def _reducir(self, ahora, motivo):
+        """Disminución multiplicativa, como máximo una vez por periodo de enfriamiento"""
+        if ahora - self._ultima_reduccion < self.enfriamiento:
+            return
+        tasa_anterior = self.tasa
+        self.tasa = max(self.tasa_minima, self.tasa * self.factor_reduccion)
+        self._tokens = min(self._tokens, 0.0)
+        self._ultima_reduccion = ahora
+        print(f"  Limitador: {motivo}. Tasa reducida de {tasa_anterior:.2f} a {self.tasa:.2f} solicitudes/s")
+
+    def registrar_respuesta(self, status_code=None, latencia=None, error=False):
+        """
+        Informa el resultado de una solicitud para ajustar la tasa.
+        `error=True` indica timeout o error de conexión (sin status HTTP).
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            if error:
+                self._reducir(ahora, "timeout o error de conexión")
+                return
+            if status_code in CODIGOS_SOBRECARGA:
+                self._reducir(ahora, f"respuesta HTTP {status_code}")
+                return
+
+            if latencia is not None:
+                if self._latencia_ewma is None:
+                    self._latencia_ewma = latencia
+                    self._latencia_base = latencia
+                else:
+                    self._latencia_ewma = 0.8 * self._latencia_ewma + 0.2 * latencia
+                    # La base sigue a la mínima observada y se adapta lentamente si el servidor cambia
+                    self._latencia_base = min(self._latencia_ewma,
+                                              self._latencia_base + 0.01 * (self._latencia_ewma - self._latencia_base))
+                if self._latencia_ewma > self.factor_latencia * self._latencia_base:
+                    self._reducir(ahora, f"latencia en aumento ({self._latencia_ewma:.2f}s)")
+                    return
+
+            # Aumento aditivo: ~`incremento` solicitudes/s por segundo de tráfico sano
+            self.tasa = min(self.tasa_maxima, self.tasa + self.incremento / max(self.tasa, 1.0))
+
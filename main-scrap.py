@@ -1,10 +1,30 @@
 import requests
-from bs4 import BeautifulSoup
-import json
 import os
+import sqlite3
 from datetime import datetime
-import time
-import random
+
+import codec_json
+from cache_condicional import CacheCondicional
+from cliente_http import ClienteHttp, crear_sesion
+from contador_bytes import ContadorBytes
+from especificaciones_unimarc import (
+    DATOS_BASICOS_PRODUCTO, DETALLE_PROMOCION, DETALLE_PROMOCION_RESUMIDO, ETIQUETA_PROMOCIONAL,
+    HUELLA_LISTADO, NODO_PRIMER_PRODUCTO, PRECIO_BASE, PRECIO_LISTADO, PRIMER_PRODUCTO_QUERY, PRODUCTO_LISTADO,
+    especificaciones_listadas, indexar_queries, indexar_queries_de, nodo_producto, nodo_productos_listado,
+    nombres_sellos, tablas_nutricionales_queries,
+)
+from extraccion import extraer_lote
+from frontera import DETALLE, Frontera
+from huellas_listado import HuellasListado, huella
+from limitador_tasa import LimitadorAIMD
+from memo_extraccion import MemoExtraccion, memorizar
+from motor_descargas import PoliticaCobertura, descargar_y_procesar, descargar_y_procesar_flujo
+from next_data import extraer_next_data
+from next_data_perezoso import PEREZOSA_POR_DEFECTO, NextDataPerezoso
+from tuberia import ejecutar_tuberia
+from registros_productos import (
+    DetallePromocion, EtiquetaPromocional, NutricionProducto, PrecioProducto, ProductoDetallado,
+)
 
 '''
 SCRIPT UNIFICADO DE SCRAPING UNIMARC
@@ -14,7 +34,8 @@ Este script combina todas las funcionalidades de scraping para productos Unimarc
 3. Extracción de tablas nutricionales
 4. Extracción de detalles de precios y promociones
 
-Todo en un único flujo de proceso automatizado.
+Todo en un único flujo de proceso automatizado. Con SOLO_PRECIOS = True solo se recorren los listados
+y se guarda una instantánea de precios, promociones y stock de cada producto.
 '''
 
 # Configuración global
@@ -22,6 +43,34 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
 }
 
+# Máximo de solicitudes de detalle simultáneas (reemplaza la espera fija entre productos)
+MAX_EN_VUELO = 8
+# Máximo de páginas de un mismo listado descargadas en paralelo
+MAX_EN_VUELO_LISTADOS = 4
+# Productos por página en los listados de Unimarc
+PRODUCTOS_POR_PAGINA = 50
+# Transporte HTTP/2 (httpx + h2): las solicitudes en vuelo comparten una conexión multiplexada.
+# Si httpx/h2 no están instalados o el servidor no ofrece h2, se usa HTTP/1.1
+USAR_HTTP2 = False
+# Cobertura de latencia (hedged requests) en la fase de detalles: si una descarga supera el
+# percentil de latencia observado se envía un duplicado; como máximo una fracción del total
+USAR_COBERTURA = True
+COBERTURA_PERCENTIL = 0.95
+COBERTURA_FRACCION_MAXIMA = 0.05
+# Listados: decodificar de __NEXT_DATA__ solo las queries con availableProducts/totalProducts
+# (next_data_perezoso.py) en vez del documento completo. Solo conviene sin orjson/msgspec
+# (benchmark_next_data_perezoso.py)
+DECODIFICACION_PEREZOSA = PEREZOSA_POR_DEFECTO
+# Procesos de parseo de los detalles (motor_descargas.py): el parseo y la extracción de cada producto
+# corren en otros procesos y no le quitan el GIL a las descargas. 0 = en hilos del proceso principal.
+# Los procesos leen la configuración de este archivo (no ven cambios hechos en tiempo de ejecución)
+PROCESOS_PARSEO = max(0, (os.cpu_count() or 1) - 1)
+# Tubería continua (tuberia.py): cada producto se descarga apenas su página de listado entrega la URL,
+# sin esperar a que terminen todos los listados. False = primero todos los listados, después los detalles
+TUBERIA_CONTINUA = True
+# URLs de detalle que pueden esperar entre los listados y los detalles (con la cola llena, los listados esperan)
+TAMANO_COLA_TUBERIA = 256
+
 # Directorios para guardar resultados
 BASE_DIR = "Resultados_Unimarc"
 HTML_DIR = os.path.join(BASE_DIR, "HTML")
@@ -31,9 +80,42 @@ PRECIOS_DIR = os.path.join(BASE_DIR, "Precios")
 NUTRI_DIR = os.path.join(BASE_DIR, "Nutricional")
 LISTADO_DIR = os.path.join(BASE_DIR, "Listados")
 
-def crear_directorios():
-    """Crea la estructura de directorios necesaria para guardar resultados"""
-    directorios = [
+# Cache de ETag/Last-Modified de las páginas de producto: en corridas repetidas los productos
+# sin cambios responden 304 y se procesan desde el __NEXT_DATA__ almacenado
+USAR_CACHE_CONDICIONAL = True
+CACHE_CONDICIONAL_DB = os.path.join(BASE_DIR, "cache_condicional.sqlite")
+
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
+# Memo de extracción (memo_extraccion.py): un __NEXT_DATA__ idéntico al de una corrida anterior no se
+# vuelve a decodificar ni a extraer. Subir VERSION_EXTRACCION al cambiar lo que extrae el script
+USAR_MEMO_EXTRACCION = True
+MEMO_EXTRACCION_DB = os.path.join(BASE_DIR, "memo_extraccion.sqlite")
+VERSION_EXTRACCION = 1
+
+# Frontera persistente (frontera.py): estado de cada listado y producto en SQLite. Si una corrida se corta,
+# la siguiente retoma donde quedó. SOLO_FALLIDAS = True solo reintenta las URLs que fallaron
+USAR_FRONTERA = True
+FRONTERA_DB = os.path.join(BASE_DIR, "frontera.sqlite")
+FRONTERA_MAX_INTENTOS = 3
+SOLO_FALLIDAS = False
+
+# Modo incremental (huellas_listado.py): solo se descargan los detalles de productos nuevos, con cambios en
+# su listado (itemId, precio, imágenes, nombre) o cuyo último detalle tiene más de EDAD_MAXIMA_DETALLE_DIAS.
+# El consolidado de resultados contiene solo los productos descargados en la corrida
+MODO_INCREMENTAL = False
+HUELLAS_LISTADO_DB = os.path.join(BASE_DIR, "huellas_listado.sqlite")
+EDAD_MAXIMA_DETALLE_DIAS = 7
+
+# Instantánea de precios: solo se recorren los listados (hasta 50 productos por solicitud) y se guardan
+# precio, precio lista, promociones y stock de cada producto en un JSON compacto en Precios/, sin
+# visitar las páginas de detalle
+SOLO_PRECIOS = False
+
+def crear_directorios(solo_precios=False):
+    """Crea la estructura de directorios necesaria para guardar resultados (la instantánea de precios solo usa Precios/)"""
+    directorios = [PRECIOS_DIR] if solo_precios else [
         HTML_DIR, JSON_DIR, RAW_JSON_DIR, PRECIOS_DIR,
         NUTRI_DIR, LISTADO_DIR
     ]
@@ -45,12 +127,6 @@ def generar_timestamp():
     """Genera un timestamp único para nombrar archivos"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
-def espera_aleatoria(min_seg=1.0, max_seg=3.0):
-    """Espera un tiempo aleatorio entre solicitudes para evitar bloqueos"""
-    wait_time = random.uniform(min_seg, max_seg)
-    print(f"Esperando {wait_time:.2f} segundos antes de la siguiente solicitud...")
-    time.sleep(wait_time)
-
 def leer_urls_desde_archivo(archivo):
     """Lee las URLs desde un archivo de texto"""
     urls = []
@@ -93,70 +169,64 @@ def get_categoria_from_url(url):
     except:
         return "categoria_desconocida"
 
-def get_total_products(soup):
+def indexar_queries_listado(json_data_string, *campos):
+    """Índice de queries de una página de listado para buscar `campos` (ver DECODIFICACION_PEREZOSA)"""
+    if DECODIFICACION_PEREZOSA:
+        return indexar_queries_de(NextDataPerezoso(json_data_string), *campos)
+    return indexar_queries(codec_json.loads(json_data_string))
+
+def get_total_products(html):
     """Extrae el número total de productos disponibles"""
     try:
-        script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
-        if script_tag and script_tag.string:
-            data = json.loads(script_tag.string)
-            queries = data.get("props", {}).get("pageProps", {}).get("dehydratedState", {}).get("queries", [])
-            for query in queries:
-                if "totalProducts" in query.get("state", {}).get("data", {}):
-                    return query["state"]["data"]["totalProducts"]
+        json_data_string = extraer_next_data(html)
+        if json_data_string:
+            return indexar_queries_listado(json_data_string, "totalProducts").valor("totalProducts")
     except Exception as e:
         print(f"Error al obtener total de productos: {e}")
     return None
 
-def extract_products_from_page(soup, sellos_tipo, categoria):
-    """Extrae productos de una página de listado"""
+def extract_products_from_page(html, sellos_tipo, categoria, huellas=None, precios=None):
+    """
+    Extrae productos de una página de listado. Si se indica el dict `huellas`, guarda en él la huella
+    de los campos del listado de cada URL de detalle (modo incremental); si se indica la lista
+    `precios`, le agrega los campos de precio de cada producto (instantánea de precios)
+    """
     extracted_products = []
     product_detail_urls = []
     print("Extrayendo datos de productos desde __NEXT_DATA__...")
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+    json_data_string = extraer_next_data(html)
 
-    if script_tag:
-        json_data_string = script_tag.string
+    if json_data_string is not None:
         if json_data_string:
             try:
-                data = json.loads(json_data_string)
-                products_list_json = data.get("props", {}).get("pageProps", {}).get("dehydratedState", {}).get("queries", [])
-                
-                found_products_array = None
-                for query_item in products_list_json:
-                    if query_item.get("state", {}).get("data", {}).get("availableProducts"):
-                        found_products_array = query_item["state"]["data"]["availableProducts"]
-                        break
+                found_products_array = nodo_productos_listado(
+                    indexar_queries_listado(json_data_string, "availableProducts"))
                 
                 if found_products_array:
-                    for product_json in found_products_array:
-                        nombre = product_json.get("nameComplete")
-                        marca = product_json.get("brand")
-                        sku = product_json.get("itemId")
-
-                        precio = None
-                        sellers = product_json.get("sellers", [])
-                        if sellers and len(sellers) > 0:
-                            precio = sellers[0].get("price")
-
-                        url_imagen = None
-                        images = product_json.get("images", [])
-                        if images and len(images) > 0:
-                            url_imagen = images[0]
-                        
-                        url_producto_relativo = product_json.get("detailUrl")
+                    productos_listado = extraer_lote(PRODUCTO_LISTADO, found_products_array)
+                    for product_json, product_raw in zip(productos_listado, found_products_array):
+                        url_producto_relativo = product_json["url_relativa"]
                         url_producto_absoluto = None
                         if url_producto_relativo:
                             url_producto_absoluto = f"https://www.unimarc.cl{url_producto_relativo}"
                             # Agregar a la lista de URLs de detalle
-                            if url_producto_absoluto:
-                                product_detail_urls.append(url_producto_absoluto)
+                            product_detail_urls.append(url_producto_absoluto)
+                            if huellas is not None:
+                                huellas[url_producto_absoluto] = huella(HUELLA_LISTADO(product_raw))
+                        if precios is not None:
+                            precios.append({
+                                **PRECIO_LISTADO(product_raw),
+                                "url_producto": url_producto_absoluto,
+                                "sellos_advertencia": sellos_tipo,
+                                "categoria": categoria,
+                            })
 
                         extracted_products.append({
-                            "nombre": nombre,
-                            "marca": marca,
-                            "sku": sku,
-                            "precio": precio,
-                            "url_imagen": url_imagen,
+                            "nombre": product_json["nombre"],
+                            "marca": product_json["marca"],
+                            "sku": product_json["sku"],
+                            "precio": product_json["precio"],
+                            "url_imagen": product_json["url_imagen"],
                             "url_producto": url_producto_absoluto,
                             "sellos_advertencia": sellos_tipo,
                             "categoria": categoria
@@ -164,7 +234,7 @@ def extract_products_from_page(soup, sellos_tipo, categoria):
                 else:
                     print("No se encontró la clave 'availableProducts' en la ruta esperada.")
 
-            except json.JSONDecodeError:
+            except codec_json.JSONDecodeError:
                 print("Error al decodificar el JSON de __NEXT_DATA__.")
             except (KeyError, IndexError, TypeError) as e:
                 print(f"Error al navegar la estructura JSON de __NEXT_DATA__: {e}")
@@ -175,8 +245,60 @@ def extract_products_from_page(soup, sellos_tipo, categoria):
 
     return extracted_products, product_detail_urls
 
-def scrape_product_listings(base_url):
-    """Procesa todas las páginas de un listado de productos"""
+def procesar_pagina_listado(response, page, sellos_tipo, categoria, huellas=None, precios=None, guardar_archivos=True):
+    """
+    Guarda el HTML de una página de listado ya descargada (salvo con guardar_archivos=False) y extrae
+    sus productos y URLs de detalle
+    """
+    if response.status_code != 200:
+        print(f"Error al acceder a la página {page}: {response.status_code}")
+        return None
+
+    html = response.content
+
+    # Guardar HTML (tal como llegó, sin reformatear)
+    if guardar_archivos:
+        timestamp = generar_timestamp()
+        html_filename = f"listado_{categoria}_{sellos_tipo}_page{page}_{timestamp}.html"
+        html_path = os.path.join(HTML_DIR, html_filename)
+        
+        with open(html_path, "wb") as f:
+            f.write(html)
+        print(f"HTML de página {page} guardado como: {html_path}")
+
+    # Extraer productos y URLs
+    products_in_page, urls_in_page = extract_products_from_page(html, sellos_tipo, categoria, huellas, precios)
+    return html, products_in_page, urls_in_page
+
+def scrape_listing_pages_concurrently(base_url, pages, sellos_tipo, categoria, cliente, al_extraer_pagina=None,
+                                      huellas=None, precios=None, guardar_archivos=True):
+    """Descarga concurrentemente las páginas indicadas de un listado y devuelve sus resultados en orden de página"""
+    urls_paginas = [f"{base_url}&page={page}" for page in pages]
+    page_by_url = dict(zip(urls_paginas, pages))
+
+    def procesar(url, response):
+        resultado = procesar_pagina_listado(response, page_by_url[url], sellos_tipo, categoria, huellas, precios,
+                                            guardar_archivos)
+        if al_extraer_pagina is not None and resultado is not None and resultado[1]:
+            al_extraer_pagina(resultado[1], resultado[2])
+        return resultado
+
+    resultados = descargar_y_procesar(
+        urls_paginas, procesar, cliente=cliente, max_en_vuelo=MAX_EN_VUELO_LISTADOS
+    )
+    return list(zip(pages, resultados))
+
+def scrape_product_listings(base_url, cliente=None, al_extraer_pagina=None, huellas=None, precios=None,
+                            guardar_archivos=True):
+    """
+    Procesa todas las páginas de un listado de productos. al_extraer_pagina(productos, urls), si se
+    indica, recibe los productos y URLs de detalle de cada página apenas se extraen; `huellas`, si se
+    indica, recibe la huella del listado de cada URL de detalle, y `precios` los campos de precio de
+    cada producto. Con guardar_archivos=False no se escriben el HTML de las páginas, el JSON de
+    productos ni las URLs de detalle del listado (instantánea de precios)
+    """
+    if cliente is None:
+        cliente = ClienteHttp(headers=HEADERS)
     sellos_tipo = get_tipo_sello_from_url(base_url)
     categoria = get_categoria_from_url(base_url)
     
@@ -188,36 +310,30 @@ def scrape_product_listings(base_url):
     all_product_detail_urls = []
     page = 1
     total_products = None
+    expected_pages = None
     
     while True:
         url = f"{base_url}&page={page}"
         print(f"\nRealizando solicitud a URL - Página {page}: {url}")
-        response = requests.get(url, headers=HEADERS)
+        try:
+            response = cliente.get(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Error HTTP al acceder a la página {page}: {e}")
+            break
         
-        if response.status_code != 200:
-            print(f"Error al acceder a la página {page}: {response.status_code}")
+        resultado_pagina = procesar_pagina_listado(response, page, sellos_tipo, categoria, huellas, precios,
+                                                   guardar_archivos)
+        if resultado_pagina is None:
             break
-
-        soup = BeautifulSoup(response.text, "html.parser")
+        html, products_in_page, urls_in_page = resultado_pagina
         
         if page == 1:
-            total_products = get_total_products(soup)
+            total_products = get_total_products(html)
             if total_products:
                 print(f"Total de productos encontrados para {sellos_tipo}: {total_products}")
-                expected_pages = (total_products + 49) // 50
+                expected_pages = (total_products + PRODUCTOS_POR_PAGINA - 1) // PRODUCTOS_POR_PAGINA
                 print(f"Número esperado de páginas: {expected_pages}")
 
-        # Guardar HTML
-        timestamp = generar_timestamp()
-        html_filename = f"listado_{categoria}_{sellos_tipo}_page{page}_{timestamp}.html"
-        html_path = os.path.join(HTML_DIR, html_filename)
-        
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(soup.prettify())
-        print(f"HTML de página {page} guardado como: {html_path}")
-
-        # Extraer productos y URLs
-        products_in_page, urls_in_page = extract_products_from_page(soup, sellos_tipo, categoria)
         if not products_in_page:
             print(f"No se encontraron más productos en la página {page}")
             break
@@ -225,27 +341,44 @@ def scrape_product_listings(base_url):
         all_products.extend(products_in_page)
         all_product_detail_urls.extend(urls_in_page)
         print(f"Extraídos {len(products_in_page)} productos de la página {page}")
+        if al_extraer_pagina is not None:
+            al_extraer_pagina(products_in_page, urls_in_page)
+        
+        # Con el número de páginas conocido desde la página 1, las páginas 2..N se piden en paralelo
+        if page == 1 and expected_pages is not None:
+            if expected_pages > 1:
+                paginas_restantes = list(range(2, expected_pages + 1))
+                print(f"Descargando páginas 2 a {expected_pages} de forma concurrente...")
+                for page_num, resultado in scrape_listing_pages_concurrently(base_url, paginas_restantes, sellos_tipo, categoria,
+                                                                             cliente, al_extraer_pagina, huellas,
+                                                                             precios, guardar_archivos):
+                    if resultado is None or not resultado[1]:
+                        print(f"No se obtuvieron productos de la página {page_num}")
+                        continue
+                    _, products_in_page, urls_in_page = resultado
+                    all_products.extend(products_in_page)
+                    all_product_detail_urls.extend(urls_in_page)
+                    print(f"Extraídos {len(products_in_page)} productos de la página {page_num}")
+            break
         
-        # Si hay menos de 50 productos, probablemente sea la última página
-        if len(products_in_page) < 50:
+        # Sin total conocido: si hay menos de 50 productos, probablemente sea la última página
+        if len(products_in_page) < PRODUCTOS_POR_PAGINA:
             break
             
         page += 1
-        espera_aleatoria()
 
     # Guardar JSON de productos extraídos
-    if all_products:
+    if all_products and guardar_archivos:
         timestamp = generar_timestamp()
         json_filename = f"productos_{categoria}_{sellos_tipo}_{len(all_products)}_productos_{timestamp}.json"
         json_path = os.path.join(LISTADO_DIR, json_filename)
         
-        with open(json_path, "w", encoding="utf-8") as f_json:
-            json.dump(all_products, f_json, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(json_path, all_products, compacto=JSON_COMPACTO)
         print(f"\nTotal de productos guardados para {sellos_tipo}: {len(all_products)}")
         print(f"Archivo JSON guardado como: {json_path}")
 
     # Guardar URLs de detalle
-    if all_product_detail_urls:
+    if all_product_detail_urls and guardar_archivos:
         timestamp = generar_timestamp()
         urls_filename = f"detalle_urls_{categoria}_{sellos_tipo}_{len(all_product_detail_urls)}_productos_{timestamp}.txt"
         urls_path = os.path.join(LISTADO_DIR, urls_filename)
@@ -259,266 +392,198 @@ def scrape_product_listings(base_url):
 
     return all_products, all_product_detail_urls
 
-def extract_and_save_raw_json(soup, product_id):
-    """Extrae y guarda el JSON completo de __NEXT_DATA__"""
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+def extract_and_save_raw_json(html, product_id, memo=None):
+    """Extrae y guarda el JSON completo de __NEXT_DATA__; devuelve la ruta del archivo o None"""
+    json_data_string = extraer_next_data(html)
     
-    if not script_tag or not script_tag.string:
+    if not json_data_string:
         print("No se encontró el JSON __NEXT_DATA__ o está vacío.")
         return None
     
     try:
-        # Formatear el JSON para mejor legibilidad
-        json_data = json.loads(script_tag.string)
-        json_formatted = json.dumps(json_data, ensure_ascii=False, indent=4)
+        # Se decodifica para validarlo y se guarda indentado (o compacto según JSON_COMPACTO). Con la
+        # memo de extracción, un __NEXT_DATA__ ya visto se escribe sin decodificarlo de nuevo
+        json_bytes = memorizar(memo, "raw_json", json_data_string, lambda: codec_json.dumps_bytes(
+            codec_json.loads(json_data_string), compacto=JSON_COMPACTO))
         
         # Guardar el JSON completo
         timestamp = generar_timestamp()
         json_filename = f"raw_json_producto_{product_id}_{timestamp}.json"
         json_path = os.path.join(RAW_JSON_DIR, json_filename)
         
-        with open(json_path, "w", encoding="utf-8") as f:
-            f.write(json_formatted)
+        with open(json_path, "wb") as f:
+            f.write(json_bytes)
         
         print(f"JSON completo guardado: {json_path}")
-        return json_data
-    except json.JSONDecodeError:
+        return json_path
+    except codec_json.JSONDecodeError:
         print("Error al decodificar el JSON de __NEXT_DATA__.")
         return None
     except Exception as e:
         print(f"Error al guardar el JSON completo: {e}")
         return None
 
-def extract_product_details(soup, url, product_id):
+def extract_product_details(html, url, product_id, memo=None):
     """Extrae detalles completos de un producto individual"""
     print(f"Extrayendo detalles del producto: {url}")
     
-    # Inicializar objeto de resultado
-    product_details = {
-        "url": url,
-        "id_producto": product_id,
-        "fecha_extraccion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    # Inicializar objeto de resultado (registro compacto, ver registros_productos.py)
+    product_details = ProductoDetallado(
+        url=url,
+        id_producto=product_id,
+        fecha_extraccion=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
     
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
-    if not script_tag or not script_tag.string:
+    json_data_string = extraer_next_data(html)
+    if not json_data_string:
         print("No se encontró el JSON __NEXT_DATA__ o está vacío.")
         return None
     
     try:
-        data = json.loads(script_tag.string)
-        
-        # 1. Extraer datos básicos del producto
-        # Buscar en diferentes ubicaciones posibles del JSON
-        product_data = None
-        pageProps = data.get("props", {}).get("pageProps", {})
-        
-        if "product" in pageProps:
-            product_data = pageProps.get("product")
-        elif "dehydratedState" in pageProps:
-            queries = pageProps.get("dehydratedState", {}).get("queries", [])
-            for query in queries:
-                if query.get("state", {}).get("data", {}).get("product"):
-                    product_data = query["state"]["data"]["product"]
-                    break
-        
-        if product_data:
-            # Datos básicos
-            product_details["nombre"] = product_data.get("nameComplete") or product_data.get("name")
-            product_details["nombre_corto"] = product_data.get("name")
-            product_details["marca"] = product_data.get("brand")
-            product_details["sku"] = product_data.get("productId") or product_data.get("itemId")
-            product_details["categoria"] = product_data.get("categoryId")
-            product_details["descripcion"] = product_data.get("description")
-            
-            # Extraer imágenes
-            images = product_data.get("images", [])
-            if images:
-                product_details["imagenes"] = images
-                product_details["imagen_principal"] = images[0] if images else None
-            
-            # Extraer especificaciones
-            specs = []
-            if "allSpecifications" in product_data:
-                specs_list = product_data.get("allSpecifications", [])
-                for spec_name in specs_list:
-                    spec_values = product_data.get("specificationGroups", [])
-                    for group in spec_values:
-                        for spec in group.get("specifications", []):
-                            if spec.get("name") == spec_name:
-                                specs.append({
-                                    "nombre": spec_name,
-                                    "valor": spec.get("values", [])[0] if spec.get("values") else None
-                                })
-            product_details["especificaciones"] = specs
-            
-            # Extraer sellos de advertencia
-            sellos = []
-            if "warnings" in product_data:
-                warnings = product_data.get("warnings", [])
-                for warning in warnings:
-                    sellos.append(warning.get("name"))
-            product_details["sellos_advertencia"] = sellos
-        
-        # 2. Extraer información nutricional
-        nutritional_info = {}
-        
-        # Buscar en diferentes ubicaciones del JSON
-        # Primero, buscar directamente en producto
-        if product_data and "nutritional_tables_sets" in product_data:
-            nutritional_info["nutritional_tables_sets"] = product_data.get("nutritional_tables_sets")
-        
-        # Si no se encontró, buscar en dehydratedState
-        if not nutritional_info.get("nutritional_tables_sets"):
-            if "dehydratedState" in pageProps:
-                queries = pageProps.get("dehydratedState", {}).get("queries", [])
-                for query in queries:
-                    state_data = query.get("state", {}).get("data", {})
-                    
-                    # Buscar en data.response
-                    if "data" in state_data and "response" in state_data.get("data", {}):
-                        response_data = state_data["data"]["response"]
-                        if "nutritional_tables_sets" in response_data:
-                            nutritional_info["nutritional_tables_sets"] = response_data["nutritional_tables_sets"]
-                            break
-                    
-                    # Buscar directamente en data
-                    if "nutritional_tables_sets" in state_data:
-                        nutritional_info["nutritional_tables_sets"] = state_data["nutritional_tables_sets"]
-                        break
-                    
-                    # Buscar en productos[0]
-                    products = state_data.get("products", [])
-                    if products and len(products) > 0:
-                        first_product = products[0]
-                        if "nutritional_tables_sets" in first_product:
-                            nutritional_info["nutritional_tables_sets"] = first_product["nutritional_tables_sets"]
-                            break
-                        if "item" in first_product and "nutritional_tables_sets" in first_product["item"]:
-                            nutritional_info["nutritional_tables_sets"] = first_product["item"]["nutritional_tables_sets"]
-                            break
-        
-        if nutritional_info:
-            product_details["informacion_nutricional"] = nutritional_info
-        
-        # 3. Extraer información de precios y promociones
-        price_details = {}
-        
-        # Buscar en props.pageProps.product.products[0]
-        try:
-            product = pageProps.get("product", {}).get("products", [])[0]
-            if product:
-                # Extraer información de precio
-                if "price" in product:
-                    price_data = product.get("price", {})
-                    price_details["precio_normal"] = price_data.get("listPrice")
-                    price_details["precio_oferta"] = price_data.get("price")
-                    price_details["precio_sin_descuento"] = price_data.get("priceWithoutDiscount")
-                    price_details["ahorro"] = price_data.get("saving")
-                    price_details["precio_unitario"] = price_data.get("ppum")
-                    price_details["precio_unitario_lista"] = price_data.get("ppumListPrice")
-                
-                # Extraer datos de promoción
-                if "priceDetail" in product:
-                    promo_data = product.get("priceDetail", {})
-                    price_details["detalles_precio"] = {
-                        "tipo_promocion": promo_data.get("promotionType"),
-                        "nombre_promocion": promo_data.get("promotionName"),
-                        "id_promocion": promo_data.get("promotionId"),
-                        "codigo_tag_promocional": promo_data.get("promotionalTagCode"),
-                        "precio_lista": promo_data.get("listPrice"),
-                        "precio_unitario_lista": promo_data.get("ppumListPrice"),
-                        "precio_descuento": promo_data.get("discountPrice"),
-                        "precio_unitario_descuento": promo_data.get("discountPpumPrice"),
-                        "porcentaje_descuento": promo_data.get("discountPercentage"),
-                        "mensaje_promocion": promo_data.get("promotionMessage"),
-                        "items_requeridos": promo_data.get("itemsRequiredForPromotion")
-                    }
-                    
-                    # Extraer etiqueta promocional si existe
-                    if "promotionalTag" in promo_data:
-                        promotional_tag = promo_data.get("promotionalTag", {})
-                        price_details["etiqueta_promocional"] = {
-                            "id_campania": promotional_tag.get("campaignId"),
-                            "texto": promotional_tag.get("text"),
-                            "color_texto": promotional_tag.get("textColor"),
-                            "color_fondo": promotional_tag.get("color")
-                        }
-                    
-                    # Extraer métodos de pago para promoción
-                    if "paymentMethod" in promo_data:
-                        payment_methods = promo_data.get("paymentMethod", [])
-                        if payment_methods:
-                            price_details["metodos_pago"] = payment_methods
-                    
-                    # Extraer membresías para promoción
-                    if "membership" in promo_data:
-                        memberships = promo_data.get("membership", [])
-                        if memberships:
-                            price_details["membresias"] = memberships
-        except (IndexError, KeyError, TypeError):
-            pass
-        
-        # Si no se encontraron datos de precio, buscar en dehydratedState
-        if not price_details:
-            try:
-                queries = pageProps.get("dehydratedState", {}).get("queries", [])
-                for query in queries:
-                    state_data = query.get("state", {}).get("data", {})
-                    products = state_data.get("products", [])
-                    if products and len(products) > 0:
-                        first_product = products[0]
-                        
-                        # Extraer información de precio
-                        if "price" in first_product:
-                            price_data = first_product.get("price", {})
-                            price_details["precio_normal"] = price_data.get("listPrice")
-                            price_details["precio_oferta"] = price_data.get("price")
-                            price_details["precio_sin_descuento"] = price_data.get("priceWithoutDiscount")
-                            price_details["ahorro"] = price_data.get("saving")
-                            price_details["precio_unitario"] = price_data.get("ppum")
-                            price_details["precio_unitario_lista"] = price_data.get("ppumListPrice")
-                        
-                        # Extraer datos de promoción
-                        if "priceDetail" in first_product:
-                            promo_data = first_product.get("priceDetail", {})
-                            price_details["detalles_precio"] = {
-                                "tipo_promocion": promo_data.get("promotionType"),
-                                "nombre_promocion": promo_data.get("promotionName"),
-                                "id_promocion": promo_data.get("promotionId"),
-                                "precio_lista": promo_data.get("listPrice"),
-                                "porcentaje_descuento": promo_data.get("discountPercentage"),
-                                "mensaje_promocion": promo_data.get("promotionMessage")
-                            }
-            except (IndexError, KeyError, TypeError):
-                pass
-        
-        if price_details:
-            product_details["detalles_precio"] = price_details
-        
+        # Con la memo de extracción, un __NEXT_DATA__ ya visto no se decodifica ni se extrae otra vez
+        campos = memorizar(memo, "detalle", json_data_string, lambda: extraer_campos_detalle(json_data_string))
+        product_details.actualizar(campos)
         return product_details
         
-    except json.JSONDecodeError:
+    except codec_json.JSONDecodeError:
         print("Error al decodificar el JSON de __NEXT_DATA__.")
         return None
     except Exception as e:
         print(f"Error al extraer detalles del producto: {e}")
         return None
 
+def extraer_campos_detalle(json_data_string):
+    """Campos de ProductoDetallado extraídos del __NEXT_DATA__ (todo salvo url, id_producto y fecha_extraccion)"""
+    product_details = ProductoDetallado()
+    data = codec_json.loads(json_data_string)
+    
+    # Índice de dehydratedState.queries: una sola pasada para todas las búsquedas de la página
+    indice = indexar_queries(data)
+    
+    # 1. Extraer datos básicos del producto
+    # Buscar en diferentes ubicaciones posibles del JSON
+    product_data = nodo_producto(data, indice)
+    
+    if product_data:
+        # Datos básicos
+        product_details.actualizar(DATOS_BASICOS_PRODUCTO(product_data))
+        
+        # Extraer imágenes
+        images = product_data.get("images", [])
+        if images:
+            product_details.imagenes = images
+            product_details.imagen_principal = images[0]
+        
+        # Extraer especificaciones y sellos de advertencia
+        product_details.especificaciones = especificaciones_listadas(product_data)
+        product_details.sellos_advertencia = nombres_sellos(product_data)
+    
+    # 2. Extraer información nutricional
+    nutritional_info = NutricionProducto()
+    
+    # Buscar en diferentes ubicaciones del JSON
+    # Primero, buscar directamente en producto
+    if product_data and "nutritional_tables_sets" in product_data:
+        nutritional_info.nutritional_tables_sets = product_data.get("nutritional_tables_sets")
+    
+    # Si no se encontró, buscar en dehydratedState
+    if not nutritional_info.get("nutritional_tables_sets"):
+        nutritional_tables = tablas_nutricionales_queries(indice)
+        if nutritional_tables is not None:
+            nutritional_info.nutritional_tables_sets = nutritional_tables
+    
+    if nutritional_info:
+        product_details.informacion_nutricional = nutritional_info
+    
+    # 3. Extraer información de precios y promociones
+    price_details = PrecioProducto()
+    
+    # Buscar en props.pageProps.product.products[0]
+    try:
+        product = NODO_PRIMER_PRODUCTO(data)
+        if product:
+            # Extraer información de precio
+            if "price" in product:
+                price_details.actualizar(PRECIO_BASE(product["price"]))
+            
+            # Extraer datos de promoción
+            if "priceDetail" in product:
+                promo_data = product["priceDetail"]
+                price_details.detalles_precio = DetallePromocion(DETALLE_PROMOCION(promo_data))
+                
+                # Extraer etiqueta promocional si existe
+                if "promotionalTag" in promo_data:
+                    price_details.etiqueta_promocional = EtiquetaPromocional(ETIQUETA_PROMOCIONAL(promo_data["promotionalTag"]))
+                
+                # Extraer métodos de pago y membresías para promoción
+                if promo_data.get("paymentMethod"):
+                    price_details.metodos_pago = promo_data["paymentMethod"]
+                if promo_data.get("membership"):
+                    price_details.membresias = promo_data["membership"]
+    except (IndexError, KeyError, TypeError):
+        pass
+    
+    # Si no se encontraron datos de precio, buscar en dehydratedState
+    if not price_details:
+        try:
+            for datos_query in indice.datos_con("products"):
+                first_product = PRIMER_PRODUCTO_QUERY(datos_query)
+                if first_product:
+                    # Extraer información de precio
+                    if "price" in first_product:
+                        price_details.actualizar(PRECIO_BASE(first_product["price"]))
+                    
+                    # Extraer datos de promoción
+                    if "priceDetail" in first_product:
+                        price_details.detalles_precio = DetallePromocion(DETALLE_PROMOCION_RESUMIDO(first_product["priceDetail"]))
+        except (IndexError, KeyError, TypeError):
+            pass
+    
+    if price_details:
+        product_details.detalles_precio = price_details
+    
+    return product_details.a_dict()
+
+
 def process_product_detail(url, session=None):
     """Procesa una URL de producto individual para extraer toda su información"""
     if session is None:
-        session = requests.Session()
+        session = ClienteHttp(headers=HEADERS)
     
     try:
         print(f"\nProcesando producto: {url}")
-        response = session.get(url, headers=HEADERS)
-        
+        response = session.get(url)
+    except Exception as e:
+        print(f"Error al procesar la URL {url}: {e}")
+        return None
+    
+    return process_product_response(url, response)
+
+# Memo de extracción propia de cada proceso de parseo (la conexión SQLite no se puede enviar)
+_memo_proceso = None
+
+def iniciar_proceso_parseo(versiones_memo):
+    """Inicializador de los procesos de parseo: abre la memo de extracción del proceso"""
+    global _memo_proceso
+    if versiones_memo is not None:
+        try:
+            _memo_proceso = MemoExtraccion(MEMO_EXTRACCION_DB, versiones=versiones_memo)
+        except sqlite3.Error as e:
+            # Sin memo el proceso extrae todo de nuevo; un error aquí rompería el pool completo
+            print(f"No se pudo abrir la memo de extracción en el proceso de parseo: {e}")
+
+def process_product_response_en_proceso(url, response):
+    """process_product_response dentro de un proceso de parseo"""
+    return process_product_response(url, response, _memo_proceso)
+
+def process_product_response(url, response, memo=None):
+    """Procesa la respuesta HTTP ya descargada de un producto y guarda toda su información"""
+    try:
         if response.status_code != 200:
             print(f"Error al acceder a la URL {url}: {response.status_code}")
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        html = response.content
         
         # Extraer ID del producto de la URL
         product_id = url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1].split("?")[0]
@@ -528,14 +593,14 @@ def process_product_detail(url, session=None):
         html_filename = f"producto_{product_id}_{timestamp}.html"
         html_path = os.path.join(HTML_DIR, html_filename)
         
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(soup.prettify())
+        with open(html_path, "wb") as f:
+            f.write(html)
         
         # Extraer y guardar el JSON completo de __NEXT_DATA__
-        extract_and_save_raw_json(soup, product_id)
+        extract_and_save_raw_json(html, product_id, memo)
         
         # Extraer detalles completos del producto
-        product_details = extract_product_details(soup, url, product_id)
+        product_details = extract_product_details(html, url, product_id, memo)
         
         if product_details:
             # Guardar detalles del producto
@@ -543,12 +608,11 @@ def process_product_detail(url, session=None):
             json_filename = f"producto_{product_id}_{timestamp}.json"
             json_path = os.path.join(JSON_DIR, json_filename)
             
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(product_details, f, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(json_path, product_details, compacto=JSON_COMPACTO)
             print(f"Detalles del producto guardados: {json_path}")
             
             # Si hay información nutricional, guardar en archivo separado
-            if "informacion_nutricional" in product_details and product_details["informacion_nutricional"]:
+            if product_details.get("informacion_nutricional"):
                 nutri_filename = f"nutricional_{product_id}_{timestamp}.json"
                 nutri_path = os.path.join(NUTRI_DIR, nutri_filename)
                 
@@ -556,15 +620,14 @@ def process_product_detail(url, session=None):
                     "url_producto": url,
                     "id_producto": product_id,
                     "nombre_producto": product_details.get("nombre"),
-                    "tabla_nutricional": product_details["informacion_nutricional"]
+                    "tabla_nutricional": product_details.informacion_nutricional
                 }
                 
-                with open(nutri_path, "w", encoding="utf-8") as f:
-                    json.dump(nutri_data, f, ensure_ascii=False, indent=4)
+                codec_json.escribir_archivo(nutri_path, nutri_data, compacto=JSON_COMPACTO)
                 print(f"Información nutricional guardada: {nutri_path}")
             
             # Si hay información de precios, guardar en archivo separado
-            if "detalles_precio" in product_details and product_details["detalles_precio"]:
+            if product_details.get("detalles_precio"):
                 precio_filename = f"precio_{product_id}_{timestamp}.json"
                 precio_path = os.path.join(PRECIOS_DIR, precio_filename)
                 
@@ -572,11 +635,10 @@ def process_product_detail(url, session=None):
                     "url_producto": url,
                     "id_producto": product_id,
                     "nombre_producto": product_details.get("nombre"),
-                    "detalles_precio": product_details["detalles_precio"]
+                    "detalles_precio": product_details.detalles_precio
                 }
                 
-                with open(precio_path, "w", encoding="utf-8") as f:
-                    json.dump(precio_data, f, ensure_ascii=False, indent=4)
+                codec_json.escribir_archivo(precio_path, precio_data, compacto=JSON_COMPACTO)
                 print(f"Información de precios guardada: {precio_path}")
             
             return product_details
@@ -587,35 +649,36 @@ def process_product_detail(url, session=None):
         print(f"Error al procesar la URL {url}: {e}")
         return None
 
-def main():
-    print(f"\n{'='*70}")
-    print(f"   INICIANDO SCRAPING COMPLETO DE UNIMARC - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*70}")
-    
-    # Crear directorios para resultados
-    crear_directorios()
-    
-    # Leer URLs desde archivo
-    urls_file = "urls_con_filtros.txt"
-    urls_list = leer_urls_desde_archivo(urls_file)
-    
-    if not urls_list:
-        print("No se pudieron cargar URLs válidas. Verifique el archivo.")
-        return
-    
+def procesar_por_fases(urls_list, cliente_listados, categorias_por_url, descargar_detalles, frontera=None,
+                       urls_detalle_iniciales=(), incremental=None):
+    """Primero todos los listados y después los detalles de todas las URLs únicas. Devuelve la cantidad de productos"""
     # Recolectar todas las URLs de productos
     all_detail_urls = []
     all_products_listado = []
+    huellas_por_url = {} if incremental is not None else None
     
     # PARTE 1: Procesar todas las URLs de listados y extraer productos
     for url_index, url in enumerate(urls_list, 1):
         print(f"\nProcesando URL de listado {url_index}/{len(urls_list)}")
-        products, detail_urls = scrape_product_listings(url)
+        if frontera is not None:
+            frontera.en_vuelo(url)
+        products, detail_urls = scrape_product_listings(url, cliente_listados, huellas=huellas_por_url)
         all_products_listado.extend(products)
+        if incremental is not None:
+            # Modo incremental: solo productos nuevos, con cambios en el listado o con el detalle vencido
+            detail_urls = [url_detalle for url_detalle in detail_urls
+                           if incremental.necesita_detalle(url_detalle, huellas_por_url.get(url_detalle))]
         all_detail_urls.extend(detail_urls)
+        if frontera is not None:
+            frontera.agregar(DETALLE, detail_urls, origen=url)
+            frontera.registrar_resultado(url, products)
     
-    # Eliminar duplicados en URLs de detalle
-    unique_detail_urls = list(set(all_detail_urls))
+    # Eliminar duplicados en URLs de detalle (y, al reanudar, los productos ya hechos)
+    unique_detail_urls = list(set(all_detail_urls).union(urls_detalle_iniciales))
+    if frontera is not None:
+        unique_detail_urls = [url for url in unique_detail_urls if not frontera.esta_hecha(url)]
+    if incremental is not None:
+        print(incremental.resumen())
     print(f"\nTotal de productos en listados: {len(all_products_listado)}")
     print(f"Total de URLs únicas de detalle: {len(unique_detail_urls)}")
     
@@ -634,14 +697,20 @@ def main():
     print(f"   PROCESANDO URLS DE PRODUCTOS INDIVIDUALES")
     print(f"{'='*70}")
     
-    all_product_details = []
-    with requests.Session() as session:
-        for index, url in enumerate(unique_detail_urls, 1):
-            print(f"\n[{index}/{len(unique_detail_urls)}] Procesando producto")
-            product_data = process_product_detail(url, session)
-            if product_data:
-                all_product_details.append(product_data)
-            espera_aleatoria(1.0, 2.0)
+    categorias_por_url.update(
+        (producto["url_producto"], producto["categoria"]) for producto in all_products_listado if producto.get("url_producto")
+    )
+    # Con frontera o en modo incremental, cada producto queda registrado apenas termina (no al final de la fase)
+    def al_resultado(url, product_data):
+        if frontera is not None:
+            frontera.registrar_resultado(url, product_data)
+        if incremental is not None and product_data:
+            incremental.registrar_detalle(url, huellas_por_url.get(url))
+
+    resultados = descargar_detalles(
+        unique_detail_urls, al_resultado if frontera is not None or incremental is not None else None
+    )
+    all_product_details = [product_data for product_data in resultados if product_data]
     
     # Guardar todos los resultados en un archivo JSON consolidado
     if all_product_details:
@@ -649,14 +718,222 @@ def main():
         final_json_file = f"resultados_completos_{len(all_product_details)}_productos_{timestamp}.json"
         final_json_path = os.path.join(BASE_DIR, final_json_file)
         
-        with open(final_json_path, "w", encoding="utf-8") as f:
-            json.dump(all_product_details, f, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(final_json_path, all_product_details, compacto=JSON_COMPACTO)
         print(f"\nTodos los datos consolidados guardados en: {final_json_path}")
+    return len(all_product_details)
+
+def procesar_en_tuberia(urls_list, cliente_listados, categorias_por_url, descargar_detalles_flujo, frontera=None,
+                        urls_detalle_iniciales=(), incremental=None):
+    """
+    Listados y detalles en tubería (tuberia.py): cada URL de detalle se descarga apenas aparece en su
+    página de listado, y los consolidados de URLs y de resultados se escriben a medida que avanzan.
+    Devuelve la cantidad de productos
+    """
+    timestamp = generar_timestamp()
+    combined_urls_path = os.path.join(LISTADO_DIR, f"urls_productos_consolidado_{timestamp}.txt")
+    # El nombre final lleva la cantidad de productos: mientras tanto se escribe con otro nombre
+    en_curso_path = os.path.join(BASE_DIR, f"resultados_completos_en_curso_{timestamp}.json")
+    total_listado = [0]
+    huellas_por_url = {} if incremental is not None else None
+
+    def recorrer_listado(indice_y_url, emitir):
+        url_index, url = indice_y_url
+        print(f"\nProcesando URL de listado {url_index}/{len(urls_list)}")
+        if frontera is not None:
+            frontera.en_vuelo(url)
+
+        def al_extraer_pagina(products_in_page, urls_in_page):
+            categorias_por_url.update(
+                (producto["url_producto"], producto["categoria"]) for producto in products_in_page if producto.get("url_producto")
+            )
+            if incremental is not None:
+                # Modo incremental: solo productos nuevos, con cambios en el listado o con el detalle vencido
+                urls_in_page = [url_detalle for url_detalle in urls_in_page
+                                if incremental.necesita_detalle(url_detalle, huellas_por_url.get(url_detalle))]
+            if frontera is not None:
+                # Registradas antes de descargarlas: si la corrida se corta, quedan pendientes
+                frontera.agregar(DETALLE, urls_in_page, origen=url)
+            emitir(urls_in_page)
+
+        products, _ = scrape_product_listings(url, cliente_listados, al_extraer_pagina, huellas_por_url)
+        total_listado[0] += len(products)
+        if frontera is not None:
+            frontera.registrar_resultado(url, products)
+
+    print(f"\n{'='*70}")
+    print(f"   PROCESANDO LISTADOS Y PRODUCTOS INDIVIDUALES EN TUBERÍA")
+    print(f"{'='*70}")
+
+    with open(combined_urls_path, "w", encoding="utf-8") as f_urls:
+        resultados_json = codec_json.EscritorLista(en_curso_path, compacto=JSON_COMPACTO)
+
+        def registrar_urls(urls_unicas):
+            if frontera is not None:
+                urls_unicas = frontera.despachar(urls_unicas)
+            for url in urls_unicas:
+                f_urls.write(f"{url}\n")
+                yield url
+
+        def al_resultado(url, product_data):
+            if frontera is not None:
+                frontera.registrar_resultado(url, product_data)
+            if product_data:
+                if incremental is not None:
+                    incremental.registrar_detalle(url, huellas_por_url.get(url))
+                resultados_json.agregar(product_data)
+
+        try:
+            total_urls = ejecutar_tuberia(
+                enumerate(urls_list, 1), recorrer_listado,
+                lambda urls_unicas: descargar_detalles_flujo(registrar_urls(urls_unicas), al_resultado),
+                tamano_cola=TAMANO_COLA_TUBERIA, urls_iniciales=urls_detalle_iniciales,
+            )
+        finally:
+            resultados_json.close()
+
+    print(f"\nTotal de productos en listados: {total_listado[0]}")
+    print(f"Total de URLs únicas de detalle: {total_urls}")
+    if incremental is not None:
+        print(incremental.resumen())
+    print(f"Archivo consolidado de URLs guardado: {combined_urls_path}")
+
+    if resultados_json.cantidad:
+        final_json_file = f"resultados_completos_{resultados_json.cantidad}_productos_{timestamp}.json"
+        final_json_path = os.path.join(BASE_DIR, final_json_file)
+        os.replace(en_curso_path, final_json_path)
+        print(f"\nTodos los datos consolidados guardados en: {final_json_path}")
+    else:
+        os.remove(en_curso_path)
+    return resultados_json.cantidad
+
+def instantanea_precios(urls_list, cliente_listados):
+    """Recorre los listados y guarda los campos de precio de cada producto. Devuelve la cantidad de productos"""
+    precios = []
+    for url_index, url in enumerate(urls_list, 1):
+        print(f"\nProcesando URL de listado {url_index}/{len(urls_list)}")
+        scrape_product_listings(url, cliente_listados, precios=precios, guardar_archivos=False)
+
+    # Un producto puede aparecer en más de un listado: se guarda una vez
+    instantanea = []
+    vistos = set()
+    for precio in precios:
+        clave = precio["url_producto"] or precio["sku"]
+        if clave is None or clave not in vistos:
+            vistos.add(clave)
+            instantanea.append(precio)
+
+    if instantanea:
+        timestamp = generar_timestamp()
+        instantanea_path = os.path.join(PRECIOS_DIR, f"instantanea_precios_{len(instantanea)}_productos_{timestamp}.json")
+        codec_json.escribir_archivo(instantanea_path, instantanea, compacto=True)
+        print(f"\nInstantánea de precios guardada en: {instantanea_path}")
+    return len(instantanea)
+
+def main():
+    print(f"\n{'='*70}")
+    print(f"   INICIANDO SCRAPING COMPLETO DE UNIMARC - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*70}")
+    
+    # Crear directorios para resultados
+    crear_directorios(solo_precios=SOLO_PRECIOS)
+    
+    # Leer URLs desde archivo
+    urls_file = "urls_con_filtros.txt"
+    urls_list = leer_urls_desde_archivo(urls_file)
+    
+    if not urls_list:
+        print("No se pudieron cargar URLs válidas. Verifique el archivo.")
+        return
+
+    # Modo incremental: huella del listado y fecha del último detalle de cada producto
+    incremental = HuellasListado(HUELLAS_LISTADO_DB, edad_maxima=EDAD_MAXIMA_DETALLE_DIAS * 24 * 3600) if MODO_INCREMENTAL and not SOLO_PRECIOS else None
+
+    # Al reanudar una corrida cortada se omiten los listados ya hechos y se retoman los productos pendientes
+    # (la instantánea de precios no la usa: es un recorrido rápido aparte de las corridas completas)
+    frontera = Frontera(FRONTERA_DB, max_intentos=FRONTERA_MAX_INTENTOS) if USAR_FRONTERA and not SOLO_PRECIOS else None
+    urls_detalle_iniciales = []
+    if frontera is not None:
+        urls_list, urls_detalle_iniciales = frontera.preparar(urls_list, solo_fallidas=SOLO_FALLIDAS)
+    
+    # Limitador de tasa adaptativo compartido por la fase de listados y la de detalles
+    limitador = LimitadorAIMD()
+    # Una única sesión (pool de conexiones keep-alive) para toda la corrida; en tubería, listados y
+    # detalles usan conexiones al mismo tiempo
+    tamano_pool = MAX_EN_VUELO + MAX_EN_VUELO_LISTADOS if TUBERIA_CONTINUA else max(MAX_EN_VUELO, MAX_EN_VUELO_LISTADOS)
+    sesion = crear_sesion(tamano_pool=tamano_pool, http2=USAR_HTTP2)
+    # Bytes transferidos (en red y descomprimidos) por fase y categoría, resumidos al final
+    contador = ContadorBytes()
+    cliente_listados = ClienteHttp(sesion=sesion, limitador=limitador, headers=HEADERS,
+                                   contador=contador, fase="listados", categoria_de_url=get_categoria_from_url)
+
+    if SOLO_PRECIOS:
+        total_precios = instantanea_precios(urls_list, cliente_listados)
+        sesion.close()
+        print(f"\n{'='*70}")
+        print(f"   INSTANTÁNEA DE PRECIOS COMPLETADA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"   Total de productos en la instantánea: {total_precios}")
+        print(f"{'='*70}")
+        print(contador.resumen())
+        return
+    
+    # Fase de detalles: la categoría de cada URL se conoce a medida que se recorren los listados
+    cache = CacheCondicional(CACHE_CONDICIONAL_DB) if USAR_CACHE_CONDICIONAL else None
+    categorias_por_url = {}
+    cliente_detalles = ClienteHttp(sesion=sesion, limitador=limitador, headers=HEADERS, cache=cache,
+                                   contador=contador, fase="detalles",
+                                   categoria_de_url=lambda url: categorias_por_url.get(url, "sin_categoria"))
+    cobertura = PoliticaCobertura(percentil=COBERTURA_PERCENTIL, fraccion_maxima=COBERTURA_FRACCION_MAXIMA) if USAR_COBERTURA else None
+    # El JSON crudo depende además del formato de salida: cambiarlo también invalida lo memorizado
+    versiones_memo = {
+        "detalle": VERSION_EXTRACCION,
+        "raw_json": f"{VERSION_EXTRACCION}-{codec_json.BACKEND}-{'compacto' if JSON_COMPACTO else 'indentado'}",
+    } if USAR_MEMO_EXTRACCION else None
+    memo = MemoExtraccion(MEMO_EXTRACCION_DB, versiones=versiones_memo) if versiones_memo is not None else None
+    if PROCESOS_PARSEO > 0:
+        # Cada proceso abre su propia memo; la del proceso principal queda para expirar al final
+        procesar = process_product_response_en_proceso
+    else:
+        procesar = lambda url, response: process_product_response(url, response, memo)
+    opciones_detalles = dict(
+        cliente=cliente_detalles, max_en_vuelo=MAX_EN_VUELO, cobertura=cobertura,
+        procesos=PROCESOS_PARSEO, inicializar_proceso=iniciar_proceso_parseo, argumentos_inicializar=(versiones_memo,)
+    )
+
+    if TUBERIA_CONTINUA:
+        total_detalles = procesar_en_tuberia(
+            urls_list, cliente_listados, categorias_por_url,
+            lambda urls, al_resultado: descargar_y_procesar_flujo(urls, procesar, al_resultado, **opciones_detalles),
+            frontera, urls_detalle_iniciales, incremental
+        )
+    else:
+        total_detalles = procesar_por_fases(
+            urls_list, cliente_listados, categorias_por_url,
+            lambda urls, al_resultado: descargar_y_procesar(urls, procesar, al_resultado=al_resultado, **opciones_detalles),
+            frontera, urls_detalle_iniciales, incremental
+        )
+
+    if cobertura is not None:
+        print(cobertura.resumen())
+    sesion.close()
+    if cache is not None:
+        print(cache.resumen())
+        cache.close()
+    if memo is not None:
+        if PROCESOS_PARSEO == 0:
+            print(memo.resumen())
+        memo.expirar()
+        memo.close()
+    if frontera is not None:
+        print(frontera.resumen())
+        frontera.close()
+    if incremental is not None:
+        incremental.close()
     
     print(f"\n{'='*70}")
     print(f"   PROCESO COMPLETADO - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"   Total de productos procesados: {len(all_product_details)}")
+    print(f"   Total de productos procesados: {total_detalles}")
     print(f"{'='*70}")
+    print(contador.resumen())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,188 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+'''
+MEMO DE EXTRACCIÓN POR CONTENIDO DE __NEXT_DATA__
+Entre corridas (y al reprocesar páginas ya guardadas) la mayoría de los productos trae exactamente el
+mismo __NEXT_DATA__ que la vez anterior, y aun así se decodificaba y se extraía de nuevo cada página.
+
+MemoExtraccion guarda en SQLite el resultado de cada extractor indexado por el hash SHA-256 del texto
+de __NEXT_DATA__ tal como viene en la página (o en la respuesta sintética de cache_condicional.py):
+
+- memorizar(extractor, payload, funcion): devuelve el resultado guardado para ese contenido o llama a
+  funcion(), lo guarda y lo devuelve. Si funcion() lanza una excepción o devuelve None no se guarda
+  nada, así los errores se siguen informando en cada corrida.
+- Cada extractor tiene una versión (`versiones`, p. ej. {"detalle": "3"}). Al abrir la memo se borran
+  las entradas de otra versión: basta con subir la versión del extractor al cambiar lo que extrae.
+- Los valores se guardan con pickle (los registros de registros_productos.py vuelven con su clase) y
+  comprimidos con zlib. Es un archivo local de los propios scrapers: no abrir memos de terceros.
+- expirar() borra las entradas usadas hace más tiempo hasta quedar bajo `tamano_maximo` bytes
+  (comprimidos). La conexión se comparte entre hilos con un lock; el journal es WAL, así cada
+  guardado no espera un fsync completo.
+- Varios procesos de parseo comparten el archivo: un acierto solo escribe (la fecha de uso) si la
+  guardada tiene más de ACTUALIZAR_USO_CADA segundos, y ante un bloqueo se espera hasta
+  ESPERA_BLOQUEO segundos. Si aun así SQLite falla, obtener() devuelve None y guardar() no guarda: la
+  memo nunca hace perder un producto, a lo sumo se extrae de nuevo.
+
+main-scrap.py y Scrap Unificado Unimarc.py la usan para el JSON crudo y los detalles de cada producto.
+'''
+
+TAMANO_MAXIMO_POR_DEFECTO = 512 * 1024 ** 2  # bytes (comprimidos)
+ACTUALIZAR_USO_CADA = 24 * 3600  # segundos: precisión de la fecha de uso que ordena expirar()
+ESPERA_BLOQUEO = 30.0  # segundos que se espera a otro proceso que tiene la base bloqueada
+
+
+def hash_contenido(payload):
+    """SHA-256 (hex) del texto o bytes de __NEXT_DATA__"""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class MemoExtraccion:
+    """Resultados de extracción por (extractor, hash de __NEXT_DATA__), con versión y tamaño máximo"""
+
+    def __init__(self, ruta_db, versiones, tamano_maximo=TAMANO_MAXIMO_POR_DEFECTO):
+        self.ruta_db = ruta_db
+        self.versiones = {extractor: str(version) for extractor, version in versiones.items()}
+        self.tamano_maximo = tamano_maximo
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_db, timeout=ESPERA_BLOQUEO, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS memo (
+                extractor TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                valor BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                usado REAL NOT NULL,
+                PRIMARY KEY (extractor, hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_memo_usado ON memo (usado);
+            """
+        )
+        # Lo extraído por otra versión de un extractor ya no sirve (se consulta antes: cada proceso de
+        # parseo abre la memo y no hace falta que todos escriban)
+        for extractor, version in self.versiones.items():
+            if self._conexion.execute(
+                "SELECT 1 FROM memo WHERE extractor = ? AND version != ? LIMIT 1", (extractor, version)
+            ).fetchone():
+                self._conexion.execute("DELETE FROM memo WHERE extractor = ? AND version != ?", (extractor, version))
+        self._conexion.commit()
+        self.aciertos = 0
+        self.fallos = 0
+        self.errores = 0
+
+    def _obtener(self, extractor, hash_payload):
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT valor, usado FROM memo WHERE extractor = ? AND hash = ? AND version = ?",
+                (extractor, hash_payload, self.versiones[extractor]),
+            ).fetchone()
+            ahora = time.time()
+            if fila is not None and ahora - fila[1] > ACTUALIZAR_USO_CADA:
+                self._conexion.execute(
+                    "UPDATE memo SET usado = ? WHERE extractor = ? AND hash = ?",
+                    (ahora, extractor, hash_payload),
+                )
+                self._conexion.commit()
+        if fila is None:
+            self.fallos += 1
+            return None
+        try:
+            valor = pickle.loads(zlib.decompress(fila[0]))
+        except Exception:
+            # Entrada ilegible (p. ej. una clase que ya no existe): se vuelve a extraer
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return valor
+
+    def _guardar(self, extractor, hash_payload, valor):
+        comprimido = zlib.compress(pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), 6)
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?, ?)",
+                (extractor, hash_payload, self.versiones[extractor], comprimido, len(comprimido), time.time()),
+            )
+            self._conexion.commit()
+
+    def _obtener_seguro(self, extractor, hash_payload):
+        try:
+            return self._obtener(extractor, hash_payload)
+        except sqlite3.Error as e:
+            self._error(e)
+            return None
+
+    def _guardar_seguro(self, extractor, hash_payload, valor):
+        try:
+            self._guardar(extractor, hash_payload, valor)
+        except sqlite3.Error as e:
+            self._error(e)
+
+    def _error(self, e):
+        # Base bloqueada o ilegible: se sigue sin memo para este producto
+        self.errores += 1
+        if self.errores == 1:
+            print(f"Memo de extracción: error de SQLite, se extrae sin memo ({e})")
+
+    def obtener(self, extractor, payload):
+        """Resultado guardado del extractor para ese __NEXT_DATA__, o None (también si SQLite falla)"""
+        return self._obtener_seguro(extractor, hash_contenido(payload))
+
+    def guardar(self, extractor, payload, valor):
+        """Guarda el resultado del extractor para ese __NEXT_DATA__ (si SQLite falla, no se guarda)"""
+        self._guardar_seguro(extractor, hash_contenido(payload), valor)
+
+    def memorizar(self, extractor, payload, funcion):
+        """Resultado guardado para ese __NEXT_DATA__ o, si no hay, funcion() (que se guarda si no es None)"""
+        hash_payload = hash_contenido(payload)
+        valor = self._obtener_seguro(extractor, hash_payload)
+        if valor is None:
+            valor = funcion()
+            if valor is not None:
+                self._guardar_seguro(extractor, hash_payload, valor)
+        return valor
+
+    def expirar(self):
+        """Si se supera el tamaño máximo, borra las entradas usadas hace más tiempo. Devuelve cuántas se borraron"""
+        with self._lock:
+            tamano_total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM memo").fetchone()[0]
+            if tamano_total <= self.tamano_maximo:
+                return 0
+            a_borrar = []
+            for extractor, hash_payload, tamano in self._conexion.execute(
+                "SELECT extractor, hash, tamano FROM memo ORDER BY usado"
+            ).fetchall():
+                if tamano_total <= self.tamano_maximo:
+                    break
+                a_borrar.append((extractor, hash_payload))
+                tamano_total -= tamano
+            self._conexion.executemany("DELETE FROM memo WHERE extractor = ? AND hash = ?", a_borrar)
+            self._conexion.commit()
+        return len(a_borrar)
+
+    def resumen(self):
+        resumen = f"Memo de extracción: {self.aciertos} resultados reutilizados, {self.fallos} extraídos de nuevo"
+        if self.errores:
+            resumen += f", {self.errores} errores de SQLite"
+        return resumen
+
+    def close(self):
+        with self._lock:
+            self._conexion.close()
+
+
+def memorizar(memo, extractor, payload, funcion):
+    """memo.memorizar(extractor, payload, funcion) o, sin memo (None), simplemente funcion()"""
+    if memo is None:
+        return funcion()
+    return memo.memorizar(extractor, payload, funcion)
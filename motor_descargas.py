@@ -0,0 +1,373 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cliente_http import ClienteHttp
+
+'''
+MOTOR DE DESCARGAS CONCURRENTES (asyncio)
+Este módulo reemplaza el recorrido secuencial de URLs de detalle (session.get + espera_aleatoria)
+por un motor asyncio con un límite configurable de solicitudes en vuelo.
+
+- La cortesía con el servidor la da el límite de concurrencia (semáforo), no pausas fijas.
+  El LimitadorAIMD del cliente, si lo tiene, regula además la tasa de solicitudes por segundo.
+- Las solicitudes HTTP pasan por el ClienteHttp del script (cliente_http.py: timeouts, reintentos,
+  circuit breaker); cada llamada bloqueante corre en un pool de hilos dimensionado al límite en vuelo.
+- Cada respuesta se entrega a la función `procesar(url, response)` del script, que conserva
+  la lógica de extracción existente (extract_product_details, extract_and_save_raw_json, etc.).
+- Los resultados se devuelven en el mismo orden que la lista de URLs de entrada.
+- Cobertura opcional (hedged requests, PoliticaCobertura): si una descarga supera el percentil de latencia
+  observado (ej. p95), se envía un duplicado y se usa la primera respuesta que llegue. Un presupuesto
+  global (fracción del total de solicitudes) acota la carga extra. Como las descargas corren en hilos,
+  la solicitud perdedora no se interrumpe: se abandona y su respuesta se cierra apenas llega.
+- Procesos de parseo opcionales (`procesos` > 0): la decodificación de __NEXT_DATA__ y la extracción
+  compiten con las descargas por el GIL si corren en hilos. Con un ProcessPoolExecutor, cada respuesta
+  viaja como RespuestaCruda (bytes, estado y encabezados) a un proceso que reconstruye la respuesta y
+  llama a `procesar`, que entonces debe ser una función de módulo (se envía por nombre) y devolver un
+  resultado serializable con pickle. La cola hacia los procesos está acotada (PARSEOS_EN_COLA_POR_PROCESO):
+  una descarga conserva su cupo en vuelo hasta que su respuesta entra en la cola, así con los procesos
+  ocupados se deja de descargar en vez de acumular respuestas en memoria. Los procesos se inician con
+  "spawn" (el proceso principal ya tiene hilos) y `inicializar_proceso(*argumentos_inicializar)` abre en
+  cada uno lo que no se puede enviar (conexiones a SQLite, etc.).
+- Flujo continuo (descargar_y_procesar_flujo): las URLs se toman de un iterable a medida que llegan
+  (p. ej. la cola de tuberia.py que alimentan los listados) y cada resultado se entrega apenas está
+  listo con al_resultado(url, resultado), sin acumular la lista. Como máximo hay
+  TAREAS_EN_ESPERA_POR_CUPO tareas creadas por cupo en vuelo (más la cola de parseo): con eso lleno
+  se deja de leer el iterable y la contrapresión llega hasta quien lo alimenta.
+'''
+
+MAX_EN_VUELO_POR_DEFECTO = 8
+# Respuestas descargadas que pueden esperar un proceso de parseo libre, por proceso
+PARSEOS_EN_COLA_POR_PROCESO = 2
+# Flujo continuo: tareas creadas (descargando o esperando cupo) por cada cupo en vuelo
+TAREAS_EN_ESPERA_POR_CUPO = 2
+
+_FIN_FUENTE = object()
+
+
+class PoliticaCobertura:
+    """Percentil de latencia (ventana deslizante) y presupuesto global de solicitudes duplicadas"""
+
+    def __init__(self, percentil=0.95, fraccion_maxima=0.05, rafaga=2, muestras_minimas=20,
+                 umbral_minimo=0.5, ventana=500):
+        self.percentil = percentil
+        self.fraccion_maxima = fraccion_maxima
+        self.rafaga = rafaga
+        self.muestras_minimas = muestras_minimas
+        self.umbral_minimo = umbral_minimo
+        self._latencias = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.duplicadas = 0
+        self.ganadas_por_duplicado = 0
+
+    def registrar_inicio(self):
+        with self._lock:
+            self.solicitudes += 1
+
+    def registrar_latencia(self, segundos):
+        with self._lock:
+            self._latencias.append(segundos)
+
+    def umbral(self):
+        """Latencia a partir de la cual se duplica la solicitud; None mientras no haya muestras suficientes"""
+        with self._lock:
+            if len(self._latencias) < self.muestras_minimas:
+                return None
+            ordenadas = sorted(self._latencias)
+        indice = min(len(ordenadas) - 1, int(self.percentil * len(ordenadas)))
+        return max(self.umbral_minimo, ordenadas[indice])
+
+    def autorizar_duplicado(self):
+        """True si el presupuesto global permite una solicitud duplicada más"""
+        with self._lock:
+            if self.duplicadas >= self.fraccion_maxima * self.solicitudes + self.rafaga:
+                return False
+            self.duplicadas += 1
+            return True
+
+    def registrar_victoria_duplicado(self):
+        with self._lock:
+            self.ganadas_por_duplicado += 1
+
+    def resumen(self):
+        return (f"Cobertura de latencia: {self.duplicadas} solicitudes duplicadas de {self.solicitudes} "
+                f"({self.ganadas_por_duplicado} respondieron antes que la original)")
+
+
+class RespuestaCruda:
+    """Estado, encabezados y cuerpo de una respuesta HTTP, serializables para enviarlos a otro proceso"""
+
+    def __init__(self, response):
+        self.url = response.url
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.headers = dict(response.headers)
+        self.encoding = response.encoding
+        self.content = response.content
+
+    def a_response(self):
+        """requests.Response equivalente (sin conexión), para las funciones procesar(url, response)"""
+        response = requests.Response()
+        response.url = self.url
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.content
+        return response
+
+
+class _ParseoEnProcesos:
+    """Pool de procesos de parseo y la cola acotada que lo alimenta"""
+
+    def __init__(self, procesos, inicializar_proceso, argumentos_inicializar):
+        self.executor = ProcessPoolExecutor(
+            max_workers=procesos, mp_context=multiprocessing.get_context("spawn"),
+            initializer=inicializar_proceso, initargs=argumentos_inicializar,
+        )
+        self.cola = asyncio.Semaphore(procesos * PARSEOS_EN_COLA_POR_PROCESO)
+
+
+def _procesar_en_proceso(procesar, url, respuesta_cruda):
+    """Se ejecuta en el proceso de parseo"""
+    return procesar(url, respuesta_cruda.a_response())
+
+
+def _descartar(futuro, tarea):
+    """
+    Abandona una descarga perdedora (`futuro` es el envoltorio asyncio de `tarea`, el Future del hilo):
+    si aún no empezó se cancela, si termina se cierra su respuesta
+    """
+    def cerrar_respuesta(f):
+        if not f.cancelled() and f.exception() is None:
+            f.result().close()
+    # Cancelar el envoltorio asyncio lo marca cancelado aunque el hilo siga descargando y la respuesta
+    # no se cerraría: se cancela la tarea del hilo (solo si no empezó) y se cierra desde ella
+    tarea.cancel()
+    tarea.add_done_callback(cerrar_respuesta)
+    # El error de una perdedora ya no interesa: se consume para que asyncio no lo informe
+    futuro.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+async def _obtener_con_cobertura(url, cliente, executor, cobertura):
+    """cliente.get(url) con un duplicado si la original supera el umbral de latencia de la política"""
+    loop = asyncio.get_running_loop()
+    en_red = asyncio.Event()
+
+    def get_medido(avisar_inicio):
+        # La latencia se mide desde que la solicitud sale a la red: la espera del limitador de tasa
+        # o del circuit breaker no cuenta como lentitud del servidor
+        inicio = []
+
+        def al_iniciar():
+            if not inicio:
+                inicio.append(time.monotonic())
+                if avisar_inicio:
+                    loop.call_soon_threadsafe(en_red.set)
+
+        try:
+            return cliente.get(url, al_iniciar=al_iniciar)
+        finally:
+            if inicio:
+                cobertura.registrar_latencia(time.monotonic() - inicio[0])
+
+    tareas = {}
+
+    def enviar(avisar_inicio):
+        # Se guarda el Future del hilo para poder cerrar la respuesta si esta descarga pierde
+        tarea = executor.submit(get_medido, avisar_inicio)
+        futuro = asyncio.wrap_future(tarea, loop=loop)
+        tareas[futuro] = tarea
+        return futuro
+
+    cobertura.registrar_inicio()
+    original = enviar(True)
+    umbral = cobertura.umbral()
+    if umbral is None:
+        return await original
+    # Respuestas servidas desde cache no llegan a la red: se espera lo que ocurra primero
+    espera_red = asyncio.ensure_future(en_red.wait())
+    await asyncio.wait({original, espera_red}, return_when=asyncio.FIRST_COMPLETED)
+    espera_red.cancel()
+    if original.done():
+        return await original
+    terminadas, _ = await asyncio.wait({original}, timeout=umbral)
+    if terminadas or not cobertura.autorizar_duplicado():
+        return await original
+
+    print(f"    Descarga lenta (> {umbral:.1f}s), enviando solicitud duplicada: {url}")
+    duplicado = enviar(False)
+    pendientes = {original, duplicado}
+    error = None
+    while pendientes:
+        terminadas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+        ganadora = next((f for f in terminadas if f.exception() is None), None)
+        if ganadora is None:
+            error = next(iter(terminadas)).exception()
+            continue
+        if ganadora is duplicado:
+            cobertura.registrar_victoria_duplicado()
+        for otra in (terminadas | pendientes) - {ganadora}:
+            _descartar(otra, tareas[otra])
+        return ganadora.result()
+    raise error
+
+
+async def _descargar_y_procesar_url(url, indice, total, cliente, semaforo, executor, procesar, cobertura, parseo):
+    """Descarga una URL respetando el límite en vuelo y la procesa fuera del semáforo"""
+    loop = asyncio.get_running_loop()
+    async with semaforo:
+        try:
+            if cobertura is not None:
+                response = await _obtener_con_cobertura(url, cliente, executor, cobertura)
+            else:
+                response = await loop.run_in_executor(executor, cliente.get, url)
+        except requests.exceptions.RequestException as e:
+            print(f"  [{indice}/{total}] Error HTTP al acceder a {url}: {e}")
+            return None
+        if parseo is not None:
+            # Contrapresión: el cupo de descarga se libera recién cuando hay lugar en la cola de parseo
+            await parseo.cola.acquire()
+
+    # El procesamiento (parseo + escritura de archivos) no ocupa un cupo de descarga
+    try:
+        if parseo is None:
+            resultado = await asyncio.to_thread(procesar, url, response)
+        else:
+            try:
+                respuesta_cruda = RespuestaCruda(response)
+            finally:
+                response.close()
+            resultado = await loop.run_in_executor(parseo.executor, _procesar_en_proceso, procesar, url, respuesta_cruda)
+    except Exception as e:
+        print(f"  [{indice}/{total}] Error al procesar la URL {url}: {e}")
+        return None
+    finally:
+        if parseo is not None:
+            parseo.cola.release()
+    print(f"  [{indice}/{total}] Completado: {url}")
+    return resultado
+
+
+async def _descargar_todas(urls, procesar, al_resultado, cliente, max_en_vuelo, cobertura, procesos,
+                          inicializar_proceso, argumentos_inicializar):
+    """Lanza todas las descargas con un máximo de `max_en_vuelo` solicitudes simultáneas"""
+    semaforo = asyncio.Semaphore(max_en_vuelo)
+    total = len(urls)
+    # Con cobertura, los duplicados y las descargas abandonadas necesitan hilos propios
+    hilos = max_en_vuelo * 2 if cobertura is not None else max_en_vuelo
+    parseo = _ParseoEnProcesos(procesos, inicializar_proceso, argumentos_inicializar) if procesos > 0 else None
+    try:
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="descarga") as executor:
+            tareas = [
+                _descargar_y_entregar(url, indice, total, cliente, semaforo, executor, procesar, cobertura, parseo,
+                                      al_resultado)
+                for indice, url in enumerate(urls, 1)
+            ]
+            return await asyncio.gather(*tareas)
+    finally:
+        if parseo is not None:
+            parseo.executor.shutdown()
+
+
+async def _descargar_y_entregar(url, indice, total, cliente, semaforo, executor, procesar, cobertura, parseo,
+                                al_resultado):
+    """_descargar_y_procesar_url y, apenas termina, al_resultado(url, resultado)"""
+    resultado = await _descargar_y_procesar_url(url, indice, total, cliente, semaforo, executor, procesar, cobertura, parseo)
+    if al_resultado is not None:
+        try:
+            al_resultado(url, resultado)
+        except Exception as e:
+            print(f"  [{indice}/{total}] Error al entregar el resultado de {url}: {e}")
+    return resultado
+
+
+async def _descargar_flujo(urls, procesar, al_resultado, cliente, max_en_vuelo, cobertura, procesos,
+                           inicializar_proceso, argumentos_inicializar):
+    """Lanza las descargas a medida que el iterable entrega URLs, con un número acotado de tareas creadas"""
+    loop = asyncio.get_running_loop()
+    semaforo = asyncio.Semaphore(max_en_vuelo)
+    hilos = max_en_vuelo * 2 if cobertura is not None else max_en_vuelo
+    parseo = _ParseoEnProcesos(procesos, inicializar_proceso, argumentos_inicializar) if procesos > 0 else None
+    max_tareas = max_en_vuelo * TAREAS_EN_ESPERA_POR_CUPO + (procesos * PARSEOS_EN_COLA_POR_PROCESO if parseo else 0)
+    iterador = iter(urls)
+    pendientes = set()
+    indice = 0
+    try:
+        # El iterable puede bloquear (una cola que todavía no recibe URLs): se lee en un hilo propio
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="descarga") as executor, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="fuente") as lector:
+            while True:
+                pendientes = {tarea for tarea in pendientes if not tarea.done()}
+                if len(pendientes) >= max_tareas:
+                    await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                url = await loop.run_in_executor(lector, next, iterador, _FIN_FUENTE)
+                if url is _FIN_FUENTE:
+                    break
+                indice += 1
+                pendientes.add(asyncio.ensure_future(_descargar_y_entregar(
+                    url, indice, "?", cliente, semaforo, executor, procesar, cobertura, parseo, al_resultado
+                )))
+            if pendientes:
+                await asyncio.wait(pendientes)
+    finally:
+        if parseo is not None:
+            parseo.executor.shutdown()
+    return indice
+
+
+def descargar_y_procesar_flujo(urls, procesar, al_resultado=None, cliente=None, max_en_vuelo=MAX_EN_VUELO_POR_DEFECTO,
+                               cobertura=None, procesos=0, inicializar_proceso=None, argumentos_inicializar=()):
+    """
+    Como descargar_y_procesar, pero `urls` puede ser cualquier iterable (también uno que bloquea
+    mientras espera URLs nuevas) y cada resultado se entrega con al_resultado(url, resultado) en el
+    orden en que termina (resultado None para las fallidas). Devuelve cuántas URLs se procesaron.
+    """
+    max_en_vuelo = max(1, int(max_en_vuelo))
+    cerrar_cliente = cliente is None
+    if cliente is None:
+        cliente = ClienteHttp()
+    procesos = max(0, int(procesos))
+    en_procesos = f", parseo en {procesos} procesos" if procesos else ""
+    print(f"Iniciando descarga continua de URLs (máximo {max_en_vuelo} en vuelo{en_procesos})")
+    try:
+        return asyncio.run(_descargar_flujo(urls, procesar, al_resultado, cliente, max_en_vuelo, cobertura, procesos,
+                                            inicializar_proceso, argumentos_inicializar))
+    finally:
+        if cerrar_cliente:
+            cliente.close()
+
+
+def descargar_y_procesar(urls, procesar, cliente=None, max_en_vuelo=MAX_EN_VUELO_POR_DEFECTO, cobertura=None,
+                         procesos=0, inicializar_proceso=None, argumentos_inicializar=(), al_resultado=None):
+    """
+    Descarga concurrentemente una lista de URLs con `cliente` (ClienteHttp) y aplica
+    `procesar(url, response)` a cada respuesta. `cobertura` (PoliticaCobertura) activa los duplicados
+    de las descargas lentas. Con `procesos` > 0, `procesar` corre en ese número de procesos de parseo
+    (ver encabezado del módulo). al_resultado(url, resultado), si se indica, se llama apenas termina
+    cada URL.
+    Devuelve la lista de resultados de `procesar` en el orden de `urls` (None para las fallidas).
+    """
+    if not urls:
+        return []
+    max_en_vuelo = max(1, int(max_en_vuelo))
+    cerrar_cliente = cliente is None
+    if cliente is None:
+        cliente = ClienteHttp()
+    procesos = max(0, int(procesos))
+    en_procesos = f", parseo en {procesos} procesos" if procesos else ""
+    print(f"Iniciando descarga concurrente de {len(urls)} URLs (máximo {max_en_vuelo} en vuelo{en_procesos})")
+    try:
+        return asyncio.run(_descargar_todas(list(urls), procesar, al_resultado, cliente, max_en_vuelo, cobertura,
+                                            procesos, inicializar_proceso, argumentos_inicializar))
+    finally:
+        if cerrar_cliente:
+            cliente.close()
@@ -0,0 +1,103 @@
+import html as html_lib
+import re
+
+from bs4 import BeautifulSoup
+
+'''
+EXTRACCIÓN RÁPIDA DE __NEXT_DATA__
+Las páginas de Unimarc (Next.js) traen todos los datos del producto o del listado en
+<script id="__NEXT_DATA__" type="application/json">...</script>. Construir el árbol completo con
+BeautifulSoup solo para encontrar ese script era el mayor costo de CPU por página.
+
+extraer_next_data() recorre directamente los bytes de la respuesta (response.content):
+1. busca el marcador __NEXT_DATA__,
+2. comprueba que pertenece al atributo id de una etiqueta <script>,
+3. devuelve el texto entre el '>' de apertura y el siguiente '</script>' (Next.js escapa '<' dentro
+   del JSON, así que el cierre no puede aparecer dentro del contenido).
+Si el marcador existe pero la etiqueta no tiene la forma esperada (HTML malformado), se recurre
+a BeautifulSoup como respaldo. Acepta bytes o str.
+
+extraer_titulo() y extraer_meta_descripcion() cubren las otras dos lecturas de HTML que hacían
+los scrapers, con el mismo resultado que soup.find("title").text y meta["content"].
+'''
+
+_MARCADOR = "__NEXT_DATA__"
+_RE_APERTURA = re.compile(r"<script\b[^>]*\bid\s*=\s*([\"']?)__NEXT_DATA__\1[\s/>]", re.IGNORECASE)
+_RE_APERTURA_BYTES = re.compile(_RE_APERTURA.pattern.encode("ascii"), re.IGNORECASE)
+_RE_TITLE_BYTES = re.compile(rb"<title\b[^>]*>(.*?)</title\s*>", re.DOTALL | re.IGNORECASE)
+_RE_META_DESCRIPTION_BYTES = re.compile(rb"<meta\b[^>]*\bname\s*=\s*[\"']?description[\"']?[^>]*>", re.IGNORECASE)
+_RE_CONTENT = re.compile(r"\bcontent\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", re.IGNORECASE)
+
+
+def _como_bytes(contenido):
+    return contenido.encode("utf-8") if isinstance(contenido, str) else contenido
+
+
+def _como_texto(contenido):
+    return contenido.decode("utf-8", errors="replace") if isinstance(contenido, (bytes, bytearray)) else contenido
+
+
+def _buscar_rapido(contenido):
+    """
+    Busca el script por el marcador. Devuelve (encontrado, payload):
+    (False, None) si el marcador no aparece; (True, None) si aparece pero no se pudo delimitar.
+    """
+    es_bytes = isinstance(contenido, (bytes, bytearray))
+    marcador = _MARCADOR.encode("ascii") if es_bytes else _MARCADOR
+    menor, mayor = (b"<", b">") if es_bytes else ("<", ">")
+    cierre_script = b"</script" if es_bytes else "</script"
+    regex_apertura = _RE_APERTURA_BYTES if es_bytes else _RE_APERTURA
+
+    posicion = contenido.find(marcador)
+    if posicion < 0:
+        return False, None
+    while posicion >= 0:
+        inicio_tag = contenido.rfind(menor, 0, posicion)
+        fin_tag = contenido.find(mayor, posicion)
+        if inicio_tag >= 0 and fin_tag >= 0 and regex_apertura.match(contenido, inicio_tag, fin_tag + 1):
+            fin_payload = contenido.find(cierre_script, fin_tag + 1)
+            if fin_payload < 0:
+                return True, None
+            return True, contenido[fin_tag + 1:fin_payload]
+        posicion = contenido.find(marcador, posicion + len(marcador))
+    return True, None
+
+
+def extraer_next_data(contenido):
+    """
+    Texto JSON de <script id="__NEXT_DATA__">: str con el contenido, "" si la etiqueta está vacía
+    o None si la página no la tiene.
+    """
+    if not contenido:
+        return None
+    encontrado, payload = _buscar_rapido(contenido)
+    if not encontrado:
+        return None
+    if payload is not None:
+        return _como_texto(payload)
+    # Respaldo para HTML malformado: árbol completo con BeautifulSoup
+    soup = BeautifulSoup(_como_texto(contenido), "html.parser")
+    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+    if script_tag is None:
+        return None
+    return script_tag.string or ""
+
+
+def extraer_titulo(contenido):
+    """Texto de <title> (sin espacios extremos ni entidades HTML) o None"""
+    match = _RE_TITLE_BYTES.search(_como_bytes(contenido))
+    if not match:
+        return None
+    return html_lib.unescape(_como_texto(match.group(1))).strip()
+
+
+def extraer_meta_descripcion(contenido):
+    """Atributo content de <meta name="description"> o None"""
+    match_meta = _RE_META_DESCRIPTION_BYTES.search(_como_bytes(contenido))
+    if not match_meta:
+        return None
+    match_content = _RE_CONTENT.search(_como_texto(match_meta.group(0)))
+    if not match_content:
+        return None
+    valor = next(grupo for grupo in match_content.groups() if grupo is not None)
+    return html_lib.unescape(valor)
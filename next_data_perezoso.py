@@ -0,0 +1,262 @@
+import json
+import re
+
+import codec_json
+
+'''
+DECODIFICACIÓN PEREZOSA DE __NEXT_DATA__
+De cada página se usan pocos subárboles de __NEXT_DATA__ (pageProps.product.products[0] en el
+detalle, availableProducts y totalProducts en los listados), pero codec_json.loads() convierte el
+documento completo (cientos de KB: menú de categorías, banners, todas las queries) en objetos Python.
+
+NextDataPerezoso(texto) guarda el texto sin decodificar y materializa solo lo que se pide, al estilo
+de simdjson On-Demand (no instalado aquí): se avanza sobre el texto y se decodifica únicamente el
+valor buscado con el decodificador en C de la librería estándar (raw_decode):
+
+- Los valores anteriores al buscado se saltan sin crear objetos: _fin_valor() solo sigue corchetes y
+  llaves; las cadenas y el texto entre corchetes los consume una regex (en C), así el bucle en
+  Python da una vuelta por corchete y no por valor.
+- valor_en_ruta("props.pageProps.product.products.0"): recorre la ruta exacta (claves de objeto e
+  índices de lista, como extraccion.py). Si la primera aparición de la clave buscada queda más allá
+  de FRACCION_MAXIMA_SALTADA del documento, saltar costaría más que decodificar todo y no se resuelve.
+- parcial(ruta): el mismo valor dentro de un esqueleto con su ruta ({"props": {"pageProps": ...}}),
+  para pasarlo a los extractores que reciben el documento completo.
+- elementos_con(ruta, *claves): de la lista en `ruta` (las queries de dehydratedState), solo los
+  elementos cuyo texto contiene alguna de las claves como miembro de un objeto, en orden; los demás
+  se saltan sin decodificarlos. Se deja de avanzar después de la última aparición; los elementos
+  anteriores a la primera se saltan con el mismo límite FRACCION_MAXIMA_SALTADA. Para IndiceQueries el resultado es el mismo que con todas
+  las queries: las que no mencionan la clave nunca se indexan bajo ella.
+- completo(): el documento entero con codec_json.loads() (una sola vez, queda guardado).
+
+¿Conviene? benchmark_next_data_perezoso.py compara ambos caminos en documentos con forma de listado
+y de detalle. Con la librería estándar (sin orjson ni msgspec) la decodificación perezosa gana cuando
+lo buscado está en la primera parte del documento y cuesta lo mismo cuando no (recurre a completo()).
+Con orjson el documento completo es tan rápido que la ganancia depende de la forma de la página (en
+un listado, availableProducts es casi todo el texto y se decodifica con raw_decode) y, cuando hay que
+recurrir a completo(), es más lento. Por eso PEREZOSA_POR_DEFECTO (el valor de
+DECODIFICACION_PEREZOSA en los scripts) es True solo sin un backend rápido en codec_json.
+
+valor_en_ruta, parcial y elementos_con devuelven NO_RESUELTO cuando no pueden responder sin
+decodificar todo (ruta inexistente, texto inválido en el tramo recorrido): el que llama recurre
+entonces a completo() y a la lógica de siempre, así el resultado no cambia. Diferencias conocidas con
+completo(): el resto del texto no se valida (una página truncada después del subárbol pedido igual se
+procesa, y en lo saltado no se comprueba que cada corchete cierre con su pareja) y se asume lo que
+JSON.stringify siempre cumple: claves sin repetir y sin escapes \\uXXXX en
+sus letras (la clave se busca tal cual en el texto).
+'''
+
+NO_RESUELTO = object()
+
+# Sin orjson ni msgspec la decodificación perezosa es más rápida; con ellos, decodificar todo
+PEREZOSA_POR_DEFECTO = codec_json.BACKEND == "json"
+
+# Si hay que saltar más que esta fracción del texto para llegar a la clave, se decodifica todo
+FRACCION_MAXIMA_SALTADA = 0.3
+
+_ESPACIOS = re.compile(r"[ \t\n\r]*")
+# Cadena JSON completa (con escapes) y escalar sin comillas (número, true, false, null)
+_CADENA = re.compile(r'"[^"\\]*+(?:\\.[^"\\]*+)*+"', re.DOTALL)
+_ESCALAR = re.compile(r"[^,:\[\]{}\s\"]+")
+# Todo lo que no abre ni cierra un objeto o lista: texto fuera de cadenas y cadenas completas
+_SIN_CORCHETES = re.compile(r'(?:[^"\[\]{}]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+', re.DOTALL)
+_DECODIFICADOR = json.JSONDecoder()
+_RE_CLAVES = {}
+
+
+def _segmentos(ruta):
+    if isinstance(ruta, (tuple, list)):
+        return tuple(ruta)
+    return tuple(int(segmento) if segmento.isdigit() else segmento for segmento in ruta.split("."))
+
+
+def _re_clave(clave):
+    """Regex de la clave como miembro de un objeto: "clave" seguido de ':'"""
+    regex = _RE_CLAVES.get(clave)
+    if regex is None:
+        regex = _RE_CLAVES[clave] = re.compile(re.escape(json.dumps(clave, ensure_ascii=False)) + r"[ \t\n\r]*:")
+    return regex
+
+
+class NextDataPerezoso:
+    """Texto de __NEXT_DATA__ que se decodifica por partes, a pedido"""
+
+    def __init__(self, texto):
+        self.texto = texto
+        self._completo = NO_RESUELTO
+
+    def completo(self):
+        """Documento completo (codec_json.loads, lanza JSONDecodeError si el texto no es válido)"""
+        if self._completo is NO_RESUELTO:
+            self._completo = codec_json.loads(self.texto)
+        return self._completo
+
+    def valor_en_ruta(self, ruta):
+        """Valor en la ruta exacta, decodificando solo ese valor (y lo que haya que saltar antes)"""
+        if self._completo is not NO_RESUELTO:
+            return _en_documento(self._completo, _segmentos(ruta))
+        try:
+            posicion = self._posicion(ruta)
+            if posicion is None:
+                return NO_RESUELTO
+            return _DECODIFICADOR.raw_decode(self.texto, posicion)[0]
+        except (json.JSONDecodeError, IndexError):
+            return NO_RESUELTO
+
+    def parcial(self, ruta):
+        """Esqueleto del documento con solo el valor de `ruta` (los índices anteriores quedan en None)"""
+        valor = self.valor_en_ruta(ruta)
+        if valor is NO_RESUELTO:
+            return NO_RESUELTO
+        for segmento in reversed(_segmentos(ruta)):
+            valor = [None] * segmento + [valor] if isinstance(segmento, int) else {segmento: valor}
+        return valor
+
+    def elementos_con(self, ruta, *claves):
+        """Elementos de la lista en `ruta` que mencionan alguna de las claves (decodificados, en orden)"""
+        if self._completo is not NO_RESUELTO:
+            lista = _en_documento(self._completo, _segmentos(ruta))
+            return lista if type(lista) is list else NO_RESUELTO
+        texto = self.texto
+        try:
+            posicion = self._posicion(ruta)
+            if posicion is None or texto[posicion] != "[":
+                return NO_RESUELTO
+            # Primero se busca solo en el tramo que se puede saltar: si no aparece ahí, se decodifica todo
+            if not any(_clave_cercana(texto, posicion, clave) for clave in claves):
+                if any(_re_clave(clave).search(texto, posicion) for clave in claves):
+                    return NO_RESUELTO
+                return []
+            apariciones = sorted(aparicion.start() for clave in claves
+                                 for aparicion in _re_clave(clave).finditer(texto, posicion))
+            elementos = []
+            siguiente = 0
+            posicion = _ESPACIOS.match(texto, posicion + 1).end()
+            if texto[posicion] == "]":
+                return elementos
+            while siguiente < len(apariciones):
+                fin = _fin_valor(texto, posicion, apariciones[siguiente])
+                if fin is None:
+                    # El elemento menciona una clave: se decodifica (raw_decode da también su fin)
+                    elemento, fin = _DECODIFICADOR.raw_decode(texto, posicion)
+                    elementos.append(elemento)
+                    while siguiente < len(apariciones) and apariciones[siguiente] < fin:
+                        siguiente += 1
+                posicion = _ESPACIOS.match(texto, fin).end()
+                if texto[posicion] == "]":
+                    break
+                if texto[posicion] != ",":
+                    raise json.JSONDecodeError("Se esperaba ',' o ']'", texto, posicion)
+                posicion = _ESPACIOS.match(texto, posicion + 1).end()
+            return elementos
+        except (json.JSONDecodeError, IndexError):
+            return NO_RESUELTO
+
+    def _posicion(self, ruta):
+        """Posición en el texto donde empieza el valor de `ruta`, o None si no existe"""
+        texto = self.texto
+        posicion = _ESPACIOS.match(texto, 0).end()
+        for segmento in _segmentos(ruta):
+            if isinstance(segmento, int):
+                posicion = _posicion_elemento(texto, posicion, segmento)
+            else:
+                posicion = _posicion_miembro(texto, posicion, segmento)
+            if posicion is None:
+                return None
+        return posicion
+
+
+def _en_documento(nodo, segmentos):
+    """Misma ruta sobre el documento ya decodificado"""
+    for segmento in segmentos:
+        if isinstance(segmento, int):
+            if type(nodo) is not list or not 0 <= segmento < len(nodo):
+                return NO_RESUELTO
+        elif type(nodo) is not dict or segmento not in nodo:
+            return NO_RESUELTO
+        nodo = nodo[segmento]
+    return nodo
+
+
+def _clave_cercana(texto, posicion, clave):
+    """¿Aparece `clave` como miembro a no más de FRACCION_MAXIMA_SALTADA del texto desde `posicion`?"""
+    limite = posicion + FRACCION_MAXIMA_SALTADA * len(texto)
+    # Se busca solo en ese tramo (más la clave y algún espacio antes de ':'), no en todo el texto
+    aparicion = _re_clave(clave).search(texto, posicion, int(limite) + len(clave) + 64)
+    return aparicion is not None and aparicion.start() - posicion <= FRACCION_MAXIMA_SALTADA * len(texto)
+
+
+def _fin_valor(texto, posicion, limite=None):
+    """
+    Posición siguiente al valor que empieza en `posicion`, sin decodificarlo. Con `limite`, devuelve
+    None apenas el valor pasa de esa posición (no hace falta recorrer un valor que se va a decodificar)
+    """
+    caracter = texto[posicion]
+    if caracter == '"' or caracter not in "[{":
+        fin = (_CADENA if caracter == '"' else _ESCALAR).match(texto, posicion)
+        if fin is None:
+            raise json.JSONDecodeError("Valor inválido", texto, posicion)
+        return None if limite is not None and fin.end() > limite else fin.end()
+    profundidad = 0
+    while True:
+        caracter = texto[posicion]
+        if caracter in "[{":
+            profundidad += 1
+        elif caracter in "]}":
+            profundidad -= 1
+            if profundidad == 0:
+                return posicion + 1
+        else:
+            # Solo puede ser una comilla que abre una cadena sin cerrar
+            raise json.JSONDecodeError("Cadena sin cerrar", texto, posicion)
+        posicion = _SIN_CORCHETES.match(texto, posicion + 1).end()
+        if limite is not None and posicion > limite:
+            return None
+
+
+def _saltar_valor(texto, posicion):
+    """Posición siguiente al valor que empieza en `posicion` (y a los espacios que lo siguen)"""
+    return _ESPACIOS.match(texto, _fin_valor(texto, posicion)).end()
+
+
+def _posicion_miembro(texto, posicion, clave):
+    """Inicio del valor de `clave` en el objeto que empieza en `posicion`, o None"""
+    if texto[posicion] != "{":
+        return None
+    if not _clave_cercana(texto, posicion, clave):
+        return None
+    posicion = _ESPACIOS.match(texto, posicion + 1).end()
+    if texto[posicion] == "}":
+        return None
+    while True:
+        if texto[posicion] != '"':
+            raise json.JSONDecodeError("Se esperaba una clave", texto, posicion)
+        nombre, posicion = json.decoder.scanstring(texto, posicion + 1)
+        posicion = _ESPACIOS.match(texto, posicion).end()
+        if texto[posicion] != ":":
+            raise json.JSONDecodeError("Se esperaba ':'", texto, posicion)
+        posicion = _ESPACIOS.match(texto, posicion + 1).end()
+        if nombre == clave:
+            return posicion
+        posicion = _saltar_valor(texto, posicion)
+        if texto[posicion] == "}":
+            return None
+        if texto[posicion] != ",":
+            raise json.JSONDecodeError("Se esperaba ',' o '}'", texto, posicion)
+        posicion = _ESPACIOS.match(texto, posicion + 1).end()
+
+
+def _posicion_elemento(texto, posicion, indice):
+    """Inicio del elemento `indice` de la lista que empieza en `posicion`, o None"""
+    if texto[posicion] != "[":
+        return None
+    posicion = _ESPACIOS.match(texto, posicion + 1).end()
+    if texto[posicion] == "]":
+        return None
+    for _ in range(indice):
+        posicion = _saltar_valor(texto, posicion)
+        if texto[posicion] == "]":
+            return None
+        if texto[posicion] != ",":
+            raise json.JSONDecodeError("Se esperaba ',' o ']'", texto, posicion)
+        posicion = _ESPACIOS.match(texto, posicion + 1).end()
+    return posicion
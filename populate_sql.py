@@ -1,7 +1,13 @@
-import json
 import os
 import re
 
+import codec_json
+from extraccion import compilar_ruta
+from indice_queries import IndiceQueries
+from registros_productos import (
+    CertificacionEan, CertificadorEan, DetalleEan, NutricionEan, PrecioEan, ProductoEan, PromocionEan,
+)
+
 # --- Configuration ---
 # Get the directory where the script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -65,19 +71,15 @@ if not os.path.exists(OUTPUT_BASE_DIR):
 
 # --- Helper Functions ---
 
+_ACCESOS_COMPILADOS = {}
+
 def safe_get(data, keys, default=None):
-    """Safely accesses nested dictionary/list keys."""
-    if not isinstance(keys, list):
-        keys = [keys]
-    current_data = data
-    for key in keys:
-        if isinstance(current_data, dict) and key in current_data:
-            current_data = current_data[key]
-        elif isinstance(current_data, list) and isinstance(key, int) and len(current_data) > key >= 0:
-             current_data = current_data[key]
-        else:
-            return default
-    return current_data
+    """Safely accesses nested dictionary/list keys (compiled once per key path, see extraccion.py)."""
+    ruta = tuple(keys) if isinstance(keys, list) else (keys,)
+    acceso = _ACCESOS_COMPILADOS.get(ruta)
+    if acceso is None:
+        acceso = _ACCESOS_COMPILADOS[ruta] = compilar_ruta(ruta)
+    return acceso(data, default)
 
 def clean_price(price_str):
     """Converts price string (e.g., '$3.450' or '2 x $2.500' or '0') to a float or None."""
@@ -144,13 +146,14 @@ unique_cert_types = set()
 certifier_candidates_by_name = {}
 unique_cert_degrees = set()
 unique_countries = set()
+# Compact ProductoEan records (registros_productos.py) holding only what the SQL generation reads,
+# so the combined JSON can be released once the collection pass is done
 product_raw_data_list = []
 
 # --- Main Processing (Collection Pass) ---
 print(f"\nStarting data collection from {INPUT_FILENAME}...")
 try:
-    with open(INPUT_FILENAME, 'r', encoding='utf-8') as f:
-        combined_json_data = json.load(f)
+    combined_json_data = codec_json.leer_archivo(INPUT_FILENAME)
     product_data_dict = safe_get(combined_json_data, ['datos'], {})
     if not product_data_dict:
         print(f"Error: Could not find 'datos' key or it's empty in {INPUT_FILENAME}.")
@@ -173,17 +176,14 @@ try:
         if processed_count % 100 == 0: print(f"Processed {processed_count} entries...")
 
         ean_detail_data = None
-        dehydrated_queries = safe_get(page_props, ['dehydratedState', 'queries'], [])
-        for query in dehydrated_queries:
-             query_key = safe_get(query, ['queryKey'])
-             query_state = safe_get(query, ['state'])
-             if isinstance(query_key, list) and safe_get(query_key, [0]) == 'getProductDetailByEan' and safe_get(query_key, [1]) == str(ean):
-                  if safe_get(query_state, ['status']) == 'success':
-                       ean_detail_data_payload = safe_get(query_state, ['data', 'data'])
-                       if ean_detail_data_payload:
-                           ean_detail_data_response = safe_get(ean_detail_data_payload, ['response'])
-                           if ean_detail_data_response: ean_detail_data = ean_detail_data_response
-                  break
+        # First getProductDetailByEan query for this EAN, looked up by queryKey (see indice_queries.py)
+        dehydrated_queries = IndiceQueries(safe_get(page_props, ['dehydratedState', 'queries'], []))
+        ean_query = dehydrated_queries.query('getProductDetailByEan', str(ean))
+        if ean_query is not None and safe_get(ean_query, ['state', 'status']) == 'success':
+             ean_detail_data_payload = safe_get(ean_query, ['state', 'data', 'data'])
+             if ean_detail_data_payload:
+                 ean_detail_data_response = safe_get(ean_detail_data_payload, ['response'])
+                 if ean_detail_data_response: ean_detail_data = ean_detail_data_response
 
         brand_id = safe_get(item_data, ['brandId'])
         brand_name = safe_get(item_data, ['brand'])
@@ -214,12 +214,14 @@ try:
                  if category_name_item_path is not None: current['name_item_path'] = category_name_item_path
 
 
+        ean_detail_record = None
         if ean_detail_data:
             ingredients_sets = safe_get(ean_detail_data, ['ingredients_sets'], [])
             allergens_list_data = safe_get(ean_detail_data, ['allergens'], [])
             traces_list_data = safe_get(ean_detail_data, ['traces'], [])
-            all_ing_like_items = []
-            for ing_set in ingredients_sets: all_ing_like_items.extend(safe_get(ing_set, ['ingredients'], []))
+            ingredients_list = []
+            for ing_set in ingredients_sets: ingredients_list.extend(safe_get(ing_set, ['ingredients'], []))
+            all_ing_like_items = list(ingredients_list)
             all_ing_like_items.extend(allergens_list_data)
             all_ing_like_items.extend(traces_list_data)
             for ing in all_ing_like_items:
@@ -228,17 +230,42 @@ try:
                  if ing_name and ing_name.strip(): unique_ingredients.add((ing_id, ing_name.strip()))
 
             nutri_tables = safe_get(ean_detail_data, ['nutritional_tables_sets'])
+            nutrition_record = None
             if nutri_tables:
                  nutri_info = safe_get(nutri_tables, ['nutritionalInfo'], [])
                  unique_nutri_type_names_units_all.update(collect_unique_nutri_types_flat(nutri_info))
+                 nutrition_record = NutricionEan(
+                     portion_text=safe_get(nutri_tables, ['portionText']),
+                     portion_value=safe_get(nutri_tables, ['portionValue']),
+                     portion_unit=safe_get(nutri_tables, ['portionUnit']),
+                     num_portions=safe_get(nutri_tables, ['numPortions']),
+                     basic_unit=safe_get(nutri_tables, ['basicUnit']),
+                     nutritional_info=nutri_info,
+                 )
 
             certificates = safe_get(ean_detail_data, ['certificates'], [])
+            certification_records = []
             for cert in certificates:
                 type_code = safe_get(cert, ['certification_type_code'])
                 type_name = safe_get(cert, ['certification_type_name'])
                 if type_code and type_code.strip() and type_name and type_name.strip():
                      unique_cert_types.add((type_code.strip(), type_name.strip()))
                 certifiers_list = safe_get(cert, ['certifiers'], [])
+                # Certification type code is essential for the product certification rows
+                if type_code and type_code.strip():
+                    certification_records.append(CertificacionEan(
+                        certification_type_code=type_code,
+                        certificadores=[CertificadorEan(
+                            certifier_id=safe_get(certifier_instance, ['certifier_id']),
+                            certifier_name=safe_get(certifier_instance, ['certifier_name']),
+                            certification_degree_id=safe_get(certifier_instance, ['certification_degree_id']),
+                            certification_country_id=safe_get(certifier_instance, ['certification_country_id']),
+                            certification_start=safe_get(certifier_instance, ['certification_start']),
+                            certification_end=safe_get(certifier_instance, ['certification_end']),
+                            certification_comments=safe_get(certifier_instance, ['certification_comments']),
+                            certification_last_update=safe_get(certifier_instance, ['certification_last_update']),
+                        ) for certifier_instance in certifiers_list],
+                    ))
                 for certifier in certifiers_list:
                     certifier_json_id = safe_get(certifier, ['certifier_id'])
                     certifier_name = safe_get(certifier, ['certifier_name'])
@@ -272,20 +299,69 @@ try:
             if origin_country_id is not None and origin_country_name and origin_country_name.strip():
                  unique_countries.add((origin_country_id, origin_country_name.strip()))
 
+            ean_detail_record = DetalleEan(
+                product_id=safe_get(ean_detail_data, ['product_id']),
+                full_description=safe_get(ean_detail_data, ['full_description']),
+                flavor=safe_get(ean_detail_data, ['flavor']),
+                size_value=safe_get(ean_detail_data, ['size_value']),
+                size_unit_name=safe_get(ean_detail_data, ['size_unit_name']),
+                drained_size_value=safe_get(ean_detail_data, ['drained_size_value']),
+                packaging_type_name=safe_get(ean_detail_data, ['packaging_type_name']),
+                origin_country_name=origin_country_name,
+                product_timestamp_in=safe_get(ean_detail_data, ['product_timestamp_in']),
+                product_last_review=safe_get(ean_detail_data, ['product_last_review']),
+                product_last_update=safe_get(ean_detail_data, ['product_last_update']),
+                ingredientes=[safe_get(ing, ['ingredient_name']) for ing in ingredients_list],
+                alergenos=[safe_get(ing, ['ingredient_name']) for ing in allergens_list_data],
+                trazas=[safe_get(ing, ['ingredient_name']) for ing in traces_list_data],
+                nutricion=nutrition_record,
+                certificaciones=certification_records,
+            )
 
-        product_raw_data_list.append({
-             'ean': str(ean), 'item': item_data,
-             'price': safe_get(product_item_data, ['price']),
-             'promotion': safe_get(product_item_data, ['promotion']),
-             'ean_data': ean_detail_data
-        })
+        price_data = safe_get(product_item_data, ['price'])
+        promotion_data = safe_get(product_item_data, ['promotion'])
+        product_raw_data_list.append(ProductoEan(
+             ean=str(ean),
+             product_id=safe_get(item_data, ['productId']),
+             item_id=safe_get(item_data, ['itemId']),
+             sku=safe_get(item_data, ['sku']),
+             name=safe_get(item_data, ['nameComplete']) or safe_get(item_data, ['name']),
+             brand_id=brand_id,
+             category_id=category_id,
+             description=safe_get(item_data, ['descriptionShort']) or safe_get(item_data, ['description']),
+             net_content=safe_get(item_data, ['netContent']),
+             images=safe_get(item_data, ['images'], []),
+             precio=PrecioEan(
+                 price=safe_get(price_data, ['price']),
+                 list_price=safe_get(price_data, ['listPrice']),
+                 price_without_discount=safe_get(price_data, ['priceWithoutDiscount']),
+                 reward_value=safe_get(price_data, ['rewardValue']),
+                 available_quantity=safe_get(price_data, ['availableQuantity']),
+                 in_offer=safe_get(price_data, ['inOffer']),
+                 ppum=safe_get(price_data, ['ppum']),
+                 ppum_list_price=safe_get(price_data, ['ppumListPrice']),
+                 saving=safe_get(price_data, ['saving']),
+             ) if price_data else None,
+             promocion=PromocionEan(
+                 id=safe_get(promotion_data, ['id']),
+                 name=safe_get(promotion_data, ['name']),
+                 type=safe_get(promotion_data, ['type']),
+                 has_savings=safe_get(promotion_data, ['hasSavings']),
+                 saving=safe_get(promotion_data, ['saving']),
+                 offer_message=safe_get(promotion_data, ['offerMessage']),
+                 description_message=safe_get(promotion_data, ['descriptionMessage']),
+             ) if promotion_data else None,
+             detalle=ean_detail_record,
+        ))
 
     print(f"\nFinished data collection. Successfully processed {processed_count} valid product entries.")
+    # The product records hold everything the SQL generation needs: release the parsed input
+    del combined_json_data, product_data_dict
 
 except FileNotFoundError:
     print(f"Error: Input file not found at {INPUT_FILENAME}")
     exit(1)
-except json.JSONDecodeError:
+except codec_json.JSONDecodeError:
     print(f"Error: Could not decode JSON from {INPUT_FILENAME}. Please ensure it's a valid JSON object with a 'datos' key.")
     exit(1)
 except Exception as e:
@@ -486,11 +562,10 @@ product_batch_sql_statements = []
 file_counter = 1
 
 for i, product_data in enumerate(product_raw_data_list):
-    ean = product_data['ean']
-    item_data = product_data['item']
-    price_data = product_data['price']
-    promotion_data = product_data['promotion']
-    ean_detail_data = product_data['ean_data']
+    ean = product_data.ean
+    price_data = product_data.precio
+    promotion_data = product_data.promocion
+    ean_detail_data = product_data.detalle
 
     if not product_batch_sql_statements:
         product_batch_sql_statements.append(f"-- SQL script to populate Unimarc PRODUCT BATCH {file_counter}")
@@ -507,29 +582,29 @@ for i, product_data in enumerate(product_raw_data_list):
          print(f"Warning: Skipping product entry due to missing or empty EAN.")
          continue
 
-    prod_id = safe_get(item_data, ['productId'])
+    prod_id = product_data.product_id
     # If product ID is None from item data, try EAN detail data
-    if prod_id is None and ean_detail_data: prod_id = safe_get(ean_detail_data, ['product_id'])
+    if prod_id is None and ean_detail_data: prod_id = ean_detail_data.product_id
     prod_id_sql = f"'{escape_sql_string(prod_id)}'" if prod_id is not None else 'NULL' # Assuming prod_id might be a string in source? If always integer, remove quotes.
 
-    item_id_val = safe_get(item_data, ['itemId'])
-    sku = safe_get(item_data, ['sku'])
-    name_val = safe_get(item_data, ['nameComplete']) or safe_get(item_data, ['name'])
-    brand_id_val = safe_get(item_data, ['brandId'])
-    category_id_val = safe_get(item_data, ['categoryId'])
-    description = safe_get(item_data, ['descriptionShort']) or safe_get(item_data, ['description'])
-    full_description = safe_get(ean_detail_data, ['full_description']) if ean_detail_data else None
-    flavor = safe_get(ean_detail_data, ['flavor']) if ean_detail_data else None
-    net_content = safe_get(item_data, ['netContent'])
-    size_value = safe_get(ean_detail_data, ['size_value']) if ean_detail_data else None
-    size_unit_name = safe_get(ean_detail_data, ['size_unit_name']) if ean_detail_data else None
-    drained_size_value = safe_get(ean_detail_data, ['drained_size_value']) if ean_detail_data else None
-    packaging_type_name = safe_get(ean_detail_data, ['packaging_type_name']) if ean_detail_data else None
-    origin_country_name = safe_get(ean_detail_data, ['origin_country_name']) if ean_detail_data else None
+    item_id_val = product_data.item_id
+    sku = product_data.sku
+    name_val = product_data.name
+    brand_id_val = product_data.brand_id
+    category_id_val = product_data.category_id
+    description = product_data.description
+    full_description = ean_detail_data.full_description if ean_detail_data else None
+    flavor = ean_detail_data.flavor if ean_detail_data else None
+    net_content = product_data.net_content
+    size_value = ean_detail_data.size_value if ean_detail_data else None
+    size_unit_name = ean_detail_data.size_unit_name if ean_detail_data else None
+    drained_size_value = ean_detail_data.drained_size_value if ean_detail_data else None
+    packaging_type_name = ean_detail_data.packaging_type_name if ean_detail_data else None
+    origin_country_name = ean_detail_data.origin_country_name if ean_detail_data else None
     # Assuming timestamps are integers/numbers
-    timestamp_in = safe_get(ean_detail_data, ['product_timestamp_in']) if ean_detail_data else None
-    last_review = safe_get(ean_detail_data, ['product_last_review']) if ean_detail_data else None
-    last_update = safe_get(ean_detail_data, ['product_last_update']) if ean_detail_data else None
+    timestamp_in = ean_detail_data.product_timestamp_in if ean_detail_data else None
+    last_review = ean_detail_data.product_last_review if ean_detail_data else None
+    last_update = ean_detail_data.product_last_update if ean_detail_data else None
 
     product_name_sql_val = name_val.strip() if name_val else None
     if product_name_sql_val is None or not product_name_sql_val:
@@ -537,10 +612,8 @@ for i, product_data in enumerate(product_raw_data_list):
          # We should still process its related data if available, but maybe skip the main product insert?
          # For now, let's skip the whole product if the name is essential (like for product table).
          # If you want to insert partial data, you'd need to change this continue.
-         # Let's check if we have EAN detail data or item data, if not, it's truly incomplete.
-         if not ean_detail_data and not item_data:
-             print(f"Skipping product EAN {ean} completely due to lack of item/detail data.")
-             continue # Skip to next product
+         # Every collected product has item data (entries without it are skipped during collection),
+         # so it is never completely empty here.
 
          # If we have data but just no name, log warning and continue processing relations
          pass # Continue to process related tables like prices, promotions, etc.
@@ -583,15 +656,15 @@ for i, product_data in enumerate(product_raw_data_list):
 
 
     if price_data:
-        price_val = clean_price(safe_get(price_data, ['price']))
-        list_price_val = clean_price(safe_get(price_data, ['listPrice']))
-        price_without_discount_val = clean_price(safe_get(price_data, ['priceWithoutDiscount']))
-        reward_value = safe_get(price_data, ['rewardValue'])
-        available_quantity = safe_get(price_data, ['availableQuantity'])
-        in_offer = safe_get(price_data, ['inOffer'])
-        ppum = safe_get(price_data, ['ppum'])
-        ppum_list_price = safe_get(price_data, ['ppumListPrice'])
-        saving = safe_get(price_data, ['saving'])
+        price_val = clean_price(price_data.price)
+        list_price_val = clean_price(price_data.list_price)
+        price_without_discount_val = clean_price(price_data.price_without_discount)
+        reward_value = price_data.reward_value
+        available_quantity = price_data.available_quantity
+        in_offer = price_data.in_offer
+        ppum = price_data.ppum
+        ppum_list_price = price_data.ppum_list_price
+        saving = price_data.saving
         product_batch_sql_statements.append(f"""INSERT INTO {SCHEMA_NAME}.product_prices_unimarc (
             product_ean, price, list_price, price_without_discount, reward_value,
             available_quantity, in_offer, ppum, ppum_list_price, saving
@@ -609,14 +682,14 @@ for i, product_data in enumerate(product_raw_data_list):
             last_updated = CURRENT_TIMESTAMP;""")
 
     if promotion_data:
-         promo_id_val = safe_get(promotion_data, ['id'])
-         promo_name = safe_get(promotion_data, ['name'])
-         promo_type = safe_get(promotion_data, ['type'])
-         has_savings = safe_get(promotion_data, ['hasSavings'])
-         saving_str = safe_get(promotion_data, ['saving'])
+         promo_id_val = promotion_data.id
+         promo_name = promotion_data.name
+         promo_type = promotion_data.type
+         has_savings = promotion_data.has_savings
+         saving_str = promotion_data.saving
          saving_val_cleaned = clean_price(saving_str)
-         offer_message = safe_get(promotion_data, ['offerMessage'])
-         description_message = safe_get(promotion_data, ['descriptionMessage'])
+         offer_message = promotion_data.offer_message
+         description_message = promotion_data.description_message
          product_batch_sql_statements.append(f"""INSERT INTO {SCHEMA_NAME}.product_promotions_unimarc (
             product_ean, promotion_id, promotion_name, promotion_type, has_savings,
             saving, offer_message, description_message
@@ -631,7 +704,7 @@ for i, product_data in enumerate(product_raw_data_list):
             has_savings = EXCLUDED.has_savings, saving = EXCLUDED.saving, offer_message = EXCLUDED.offer_message,
             description_message = EXCLUDED.description_message, last_updated = CURRENT_TIMESTAMP;""")
 
-    images = safe_get(item_data, ['images'], [])
+    images = product_data.images
     # Clear existing images for this product before re-inserting
     product_batch_sql_statements.append(f"DELETE FROM {SCHEMA_NAME}.product_images_unimarc WHERE product_ean = '{ean}';")
     for img_idx, image_url in enumerate(images):
@@ -647,11 +720,7 @@ for i, product_data in enumerate(product_raw_data_list):
         product_batch_sql_statements.append(f"DELETE FROM {SCHEMA_NAME}.product_allergens_unimarc WHERE product_ean = '{ean}';")
         product_batch_sql_statements.append(f"DELETE FROM {SCHEMA_NAME}.product_traces_unimarc WHERE product_ean = '{ean}';")
 
-        ingredients_sets = safe_get(ean_detail_data, ['ingredients_sets'], [])
-        all_ingredients_list = []
-        for ing_set in ingredients_sets: all_ingredients_list.extend(safe_get(ing_set, ['ingredients'], []))
-        for ing_idx, ing in enumerate(all_ingredients_list):
-            ing_name_val = safe_get(ing, ['ingredient_name'])
+        for ing_idx, ing_name_val in enumerate(ean_detail_data.ingredientes):
             if ing_name_val and ing_name_val.strip():
                 cleaned_ing_name = ing_name_val.strip()
                 # Subquery relies on ingredient_name being unique in ingredients_unimarc (due to its ON CONFLICT rule)
@@ -663,9 +732,7 @@ for i, product_data in enumerate(product_raw_data_list):
                     );""") # No ON CONFLICT needed after DELETE
 
 
-        allergens_list_data = safe_get(ean_detail_data, ['allergens'], [])
-        for ing in allergens_list_data:
-             ing_name_val = safe_get(ing, ['ingredient_name'])
+        for ing_name_val in ean_detail_data.alergenos:
              if ing_name_val and ing_name_val.strip():
                 cleaned_ing_name = ing_name_val.strip()
                 product_batch_sql_statements.append(f"""INSERT INTO {SCHEMA_NAME}.product_allergens_unimarc (product_ean, ingredient_lookup_id)
@@ -675,9 +742,7 @@ for i, product_data in enumerate(product_raw_data_list):
                     );""") # No ON CONFLICT needed after DELETE
 
 
-        traces_list_data = safe_get(ean_detail_data, ['traces'], [])
-        for ing in traces_list_data:
-             ing_name_val = safe_get(ing, ['ingredient_name'])
+        for ing_name_val in ean_detail_data.trazas:
              if ing_name_val and ing_name_val.strip():
                  cleaned_ing_name = ing_name_val.strip()
                  product_batch_sql_statements.append(f"""INSERT INTO {SCHEMA_NAME}.product_traces_unimarc (product_ean, ingredient_lookup_id)
@@ -687,14 +752,14 @@ for i, product_data in enumerate(product_raw_data_list):
                      );""") # No ON CONFLICT needed after DELETE
 
         # Nutritional Info
-        nutri_tables = safe_get(ean_detail_data, ['nutritional_tables_sets'])
+        nutri_tables = ean_detail_data.nutricion
         if nutri_tables:
             # Serving Info (UPSERT)
-            portion_text = safe_get(nutri_tables, ['portionText'])
-            portion_value = safe_get(nutri_tables, ['portionValue'])
-            portion_unit = safe_get(nutri_tables, ['portionUnit'])
-            num_portions = safe_get(nutri_tables, ['numPortions'])
-            basic_unit = safe_get(nutri_tables, ['basicUnit'])
+            portion_text = nutri_tables.portion_text
+            portion_value = nutri_tables.portion_value
+            portion_unit = nutri_tables.portion_unit
+            num_portions = nutri_tables.num_portions
+            basic_unit = nutri_tables.basic_unit
             product_batch_sql_statements.append(f"""INSERT INTO {SCHEMA_NAME}.product_serving_info_unimarc (
                  product_ean, portion_text, portion_value, portion_unit, num_portions, basic_unit
             ) VALUES (
@@ -707,7 +772,7 @@ for i, product_data in enumerate(product_raw_data_list):
 
             # Nutritional Values (Clear & Re-insert)
             product_batch_sql_statements.append(f"DELETE FROM {SCHEMA_NAME}.product_nutritional_info_unimarc WHERE product_ean = '{ean}';")
-            nutri_info = safe_get(nutri_tables, ['nutritionalInfo'], [])
+            nutri_info = nutri_tables.nutritional_info
             flat_nutri_info = flatten_nutri_nodes(nutri_info)
             for nutri_item in flat_nutri_info:
                 name_val = nutri_item.get('name')
@@ -726,21 +791,19 @@ for i, product_data in enumerate(product_raw_data_list):
                         );""") # No ON CONFLICT needed after DELETE
 
         # Certifications (Clear & Re-insert)
-        certificates = safe_get(ean_detail_data, ['certificates'], [])
         product_batch_sql_statements.append(f"DELETE FROM {SCHEMA_NAME}.product_certifications_unimarc WHERE product_ean = '{ean}';")
-        for cert in certificates:
-            type_code = safe_get(cert, ['certification_type_code'])
-            if not type_code or not type_code.strip(): continue # Certification type code is essential
-            certifiers_list_inner = safe_get(cert, ['certifiers'], [])
-            for certifier_instance in certifiers_list_inner:
-                certifier_json_id = safe_get(certifier_instance, ['certifier_id'])
-                certifier_name_val = safe_get(certifier_instance, ['certifier_name'])
-                degree_id_val = safe_get(certifier_instance, ['certification_degree_id'])
-                country_id_val = safe_get(certifier_instance, ['certification_country_id'])
-                cert_start = safe_get(certifier_instance, ['certification_start'])
-                cert_end = safe_get(certifier_instance, ['certification_end'])
-                cert_comments = safe_get(certifier_instance, ['certification_comments'])
-                cert_last_update = safe_get(certifier_instance, ['certification_last_update'])
+        # Only certifications with a type code were kept during collection (it is essential)
+        for cert in ean_detail_data.certificaciones:
+            type_code = cert.certification_type_code
+            for certifier_instance in cert.certificadores:
+                certifier_json_id = certifier_instance.certifier_id
+                certifier_name_val = certifier_instance.certifier_name
+                degree_id_val = certifier_instance.certification_degree_id
+                country_id_val = certifier_instance.certification_country_id
+                cert_start = certifier_instance.certification_start
+                cert_end = certifier_instance.certification_end
+                cert_comments = certifier_instance.certification_comments
+                cert_last_update = certifier_instance.certification_last_update
 
                 # Ensure essential lookup IDs are available (degree, country)
                 if degree_id_val is None or country_id_val is None:
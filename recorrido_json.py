@@ -0,0 +1,100 @@
+'''
+RECORRIDO ÚNICO DE JSON PARA VARIAS CLAVES
+Buscar cada clave con su propia función recursiva (como hacía find_key_in_json_recursive) recorre el
+__NEXT_DATA__ completo una vez por clave. buscar_claves() recibe todas las claves a la vez y las
+resuelve en una sola pasada en profundidad, que termina apenas se encontraron todas.
+
+- El orden de recorrido es el mismo que el de la búsqueda recursiva clásica (preorden, claves del
+  diccionario en su orden y listas de izquierda a derecha) y para cada clave se devuelve el primer
+  valor no None en ese orden. Única diferencia: si un diccionario tiene la clave con valor None, la
+  búsqueda recursiva dejaba de mirar dentro de él; aquí se sigue buscando en sus hijos.
+- Solo se baja a diccionarios y listas (los valores escalares no cuestan una llamada) y, sin
+  restricciones de ruta, no se lleva la ruta de cada nodo.
+- Restricción de ruta opcional por clave (`prefijos`): una tupla con el inicio de la ruta que debe
+  tener el valor encontrado; "*" acepta cualquier clave o índice en esa posición. Los subárboles que
+  no pueden cumplir ninguna restricción pendiente no se recorren.
+- todas=True reúne todas las coincidencias (lista por clave) en vez de solo la primera.
+
+Ejemplo:
+    buscar_claves(queries, ["nutritional_tables_sets"],
+                  prefijos={"nutritional_tables_sets": ("*", "state", "data")})
+'''
+
+COMODIN = "*"
+
+
+def _coincide_prefijo(ruta, prefijo):
+    """True si la ruta completa comienza con el prefijo"""
+    if len(ruta) < len(prefijo):
+        return False
+    return all(esperado == COMODIN or esperado == segmento for esperado, segmento in zip(prefijo, ruta))
+
+
+def _puede_contener(ruta, prefijo):
+    """True si algún descendiente de la ruta podría cumplir el prefijo"""
+    return all(esperado == COMODIN or esperado == segmento for esperado, segmento in zip(prefijo, ruta))
+
+
+def buscar_claves(dato, claves, prefijos=None, todas=False):
+    """
+    Busca varias claves en un árbol de diccionarios y listas con un único recorrido.
+    Devuelve {clave: primer valor no None} (solo las encontradas) o, con todas=True,
+    {clave: [valores en orden de recorrido]} con todas las claves pedidas.
+    """
+    pendientes = set(claves)
+    encontrados = {clave: [] for clave in pendientes} if todas else {}
+    prefijos = prefijos or {}
+    ruta = []
+
+    def registrar(nodo):
+        for clave in [c for c in pendientes if c in nodo]:
+            valor = nodo[clave]
+            if valor is None:
+                continue
+            if clave in prefijos and not _coincide_prefijo(ruta + [clave], prefijos[clave]):
+                continue
+            if todas:
+                encontrados[clave].append(valor)
+            else:
+                encontrados[clave] = valor
+                pendientes.discard(clave)
+
+    def recorrer(nodo):
+        """Devuelve True cuando ya no queda ninguna clave pendiente (corta el recorrido)"""
+        if type(nodo) is dict:
+            if not pendientes.isdisjoint(nodo):
+                registrar(nodo)
+                if not pendientes:
+                    return True
+            hijos = nodo.items()
+        else:
+            hijos = enumerate(nodo)
+
+        if prefijos:
+            # Poda: si ninguna clave pendiente puede aparecer bajo esta ruta, no se baja
+            if not any(c not in prefijos or _puede_contener(ruta, prefijos[c]) for c in pendientes):
+                return False
+            for segmento, valor in hijos:
+                tipo = type(valor)
+                if tipo is dict or tipo is list:
+                    ruta.append(segmento)
+                    terminado = recorrer(valor)
+                    ruta.pop()
+                    if terminado:
+                        return True
+        else:
+            for _, valor in hijos:
+                tipo = type(valor)
+                if (tipo is dict or tipo is list) and recorrer(valor):
+                    return True
+        return False
+
+    if type(dato) is dict or type(dato) is list:
+        recorrer(dato)
+    return encontrados
+
+
+def buscar_clave(dato, clave, prefijo=None):
+    """Primer valor no None de una sola clave (atajo de buscar_claves) o None"""
+    prefijos = {clave: prefijo} if prefijo else None
+    return buscar_claves(dato, (clave,), prefijos).get(clave)
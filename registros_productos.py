@@ -0,0 +1,178 @@
+from especificaciones_unimarc import (
+    DATOS_BASICOS_PRODUCTO, DATOS_GENERALES_UNIFICADO, DETALLE_PROMOCION, DETALLE_PROMOCION_UNIFICADO,
+    ETIQUETA_PROMOCIONAL, ETIQUETA_PROMOCIONAL_UNIFICADA, PRECIO_BASE, PRECIO_BASE_UNIFICADO,
+    PROMOCION_ADICIONAL_UNIFICADA,
+)
+
+'''
+REGISTROS COMPACTOS DE PRODUCTO
+main-scrap.py y Scrap Unificado Unimarc.py acumulan un resultado por producto durante toda la corrida
+(all_product_details / todos_los_productos_detallados) y populate_sql.py guardaba el `item` y la
+respuesta de getProductDetailByEan completos de cada producto hasta terminar de generar el SQL. Como
+diccionarios anidados, cada producto arrastra una tabla hash por nivel y, en populate_sql.py, todo el
+__NEXT_DATA__ de la página al que pertenecen.
+
+Aquí cada nivel es una clase con __slots__ (sin __dict__ por instancia):
+- Registro: base común. Un campo sin asignar simplemente no existe, igual que una clave ausente, y
+  a_dict() devuelve el diccionario con las claves asignadas en el orden de __slots__, que es el orden
+  de los JSON que ya se escribían. codec_json.py lo usa como serializador directo: orjson/msgspec/json
+  llaman a a_dict() de cada registro mientras escriben, sin copiar antes todo el resultado a dicts.
+- get(campo, por_defecto) y bool(registro) (¿hay algún campo asignado?) funcionan como en un dict.
+- Los campos que vienen de una especificación (especificaciones_unimarc.py) se declaran a partir de
+  extractor.campos, así la especificación sigue siendo la única fuente de los nombres de salida.
+
+Registros de los scrapers (misma forma JSON que antes):
+- main-scrap.py:              ProductoDetallado > NutricionProducto, PrecioProducto > DetallePromocion,
+                              EtiquetaPromocional
+- Scrap Unificado Unimarc.py: ProductoUnificado > DatosGeneralesUnificado, NutricionUnificada,
+                              PrecioUnificado > DetallePromocionUnificado, EtiquetaPromocionalUnificada,
+                              PromocionAdicionalUnificada
+
+Registros de populate_sql.py (solo los campos que usa la generación de SQL, ya leídos del JSON):
+- ProductoEan > PrecioEan, PromocionEan, DetalleEan > NutricionEan, CertificacionEan > CertificadorEan
+'''
+
+_AUSENTE = object()
+
+
+class Registro:
+    """Base de los registros: campos en __slots__, sin asignar = ausente"""
+    __slots__ = ()
+
+    def __init__(self, campos=None, **otros):
+        if campos:
+            self.actualizar(campos)
+        if otros:
+            self.actualizar(otros)
+
+    def actualizar(self, campos):
+        """Asigna los campos de un diccionario (como dict.update)"""
+        for campo, valor in campos.items():
+            setattr(self, campo, valor)
+
+    def get(self, campo, por_defecto=None):
+        return getattr(self, campo, por_defecto) if campo in self.__slots__ else por_defecto
+
+    def __contains__(self, campo):
+        return campo in self.__slots__ and hasattr(self, campo)
+
+    def __bool__(self):
+        return any(hasattr(self, campo) for campo in self.__slots__)
+
+    def a_dict(self):
+        """Diccionario con los campos asignados (los registros anidados quedan como registros)"""
+        return {campo: valor for campo in self.__slots__ if (valor := getattr(self, campo, _AUSENTE)) is not _AUSENTE}
+
+    def __eq__(self, otro):
+        if type(otro) is not type(self):
+            return NotImplemented
+        return self.a_dict() == otro.a_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+# --- main-scrap.py ---
+
+class DetallePromocion(Registro):
+    """priceDetail de main-scrap.py (DETALLE_PROMOCION o DETALLE_PROMOCION_RESUMIDO)"""
+    __slots__ = DETALLE_PROMOCION.campos
+
+
+class EtiquetaPromocional(Registro):
+    __slots__ = ETIQUETA_PROMOCIONAL.campos
+
+
+class PrecioProducto(Registro):
+    """detalles_precio de main-scrap.py"""
+    __slots__ = PRECIO_BASE.campos + ("detalles_precio", "etiqueta_promocional", "metodos_pago", "membresias")
+
+
+class NutricionProducto(Registro):
+    """informacion_nutricional de main-scrap.py"""
+    __slots__ = ("nutritional_tables_sets",)
+
+
+class ProductoDetallado(Registro):
+    """Resultado por producto de main-scrap.py"""
+    __slots__ = ("url", "id_producto", "fecha_extraccion") + DATOS_BASICOS_PRODUCTO.campos + (
+        "imagenes", "imagen_principal", "especificaciones", "sellos_advertencia",
+        "informacion_nutricional", "detalles_precio",
+    )
+
+
+# --- Scrap Unificado Unimarc.py ---
+
+class EtiquetaPromocionalUnificada(Registro):
+    __slots__ = ETIQUETA_PROMOCIONAL_UNIFICADA.campos
+
+
+class PromocionAdicionalUnificada(Registro):
+    __slots__ = PROMOCION_ADICIONAL_UNIFICADA.campos
+
+
+class DetallePromocionUnificado(Registro):
+    __slots__ = DETALLE_PROMOCION_UNIFICADO.campos + ("etiqueta_visual_promo", "metodos_pago_promo", "membresias_promo")
+
+
+class PrecioUnificado(Registro):
+    """detalles_precio_promocion del scraper unificado"""
+    __slots__ = PRECIO_BASE_UNIFICADO.campos + ("detalle_promocion_especifica", "promocion_adicional_info")
+
+
+class NutricionUnificada(Registro):
+    """informacion_nutricional_completa del scraper unificado"""
+    __slots__ = ("tablas_nutricionales_sets", "descripcion_larga_producto", "info_nutricional_texto_especificaciones")
+
+
+class DatosGeneralesUnificado(Registro):
+    __slots__ = DATOS_GENERALES_UNIFICADO.campos + (
+        "imagenes", "imagen_principal_url", "especificaciones_producto", "sellos_advertencia",
+    )
+
+
+class ProductoUnificado(Registro):
+    """Resultado por producto del scraper unificado"""
+    __slots__ = ("url_producto", "id_producto_scraped", "fecha_extraccion", "datos_generales",
+                 "informacion_nutricional_completa", "detalles_precio_promocion")
+
+
+# --- populate_sql.py ---
+
+class PrecioEan(Registro):
+    """products[0].price"""
+    __slots__ = ("price", "list_price", "price_without_discount", "reward_value", "available_quantity",
+                 "in_offer", "ppum", "ppum_list_price", "saving")
+
+
+class PromocionEan(Registro):
+    """products[0].promotion"""
+    __slots__ = ("id", "name", "type", "has_savings", "saving", "offer_message", "description_message")
+
+
+class NutricionEan(Registro):
+    """nutritional_tables_sets de getProductDetailByEan (nutritional_info sin aplanar)"""
+    __slots__ = ("portion_text", "portion_value", "portion_unit", "num_portions", "basic_unit", "nutritional_info")
+
+
+class CertificadorEan(Registro):
+    __slots__ = ("certifier_id", "certifier_name", "certification_degree_id", "certification_country_id",
+                 "certification_start", "certification_end", "certification_comments", "certification_last_update")
+
+
+class CertificacionEan(Registro):
+    """Certificado con su certification_type_code y sus certificadores"""
+    __slots__ = ("certification_type_code", "certificadores")
+
+
+class DetalleEan(Registro):
+    """response de getProductDetailByEan. Ingredientes, alérgenos y trazas: solo los ingredient_name"""
+    __slots__ = ("product_id", "full_description", "flavor", "size_value", "size_unit_name", "drained_size_value",
+                 "packaging_type_name", "origin_country_name", "product_timestamp_in", "product_last_review",
+                 "product_last_update", "ingredientes", "alergenos", "trazas", "nutricion", "certificaciones")
+
+
+class ProductoEan(Registro):
+    """Producto listo para generar su SQL: campos de `item` más precio, promoción y detalle por EAN"""
+    __slots__ = ("ean", "product_id", "item_id", "sku", "name", "brand_id", "category_id", "description",
+                 "net_content", "images", "precio", "promocion", "detalle")
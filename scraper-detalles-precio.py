@@ -1,10 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import os
 from datetime import datetime
-import time
-import random
+
+import codec_json
+from cache_respuestas import CacheRespuestas
+from cliente_http import ClienteHttp
+from especificaciones_unimarc import (
+    DETALLE_PROMOCION, ETIQUETA_PROMOCIONAL, IDENTIFICACION_ITEM, NODO_PRIMER_PRODUCTO, PRECIO_BASE,
+    PRIMER_PRODUCTO_QUERY, PROMOCION_ADICIONAL, RUTA_PRIMER_PRODUCTO, indexar_queries,
+)
+from limitador_tasa import LimitadorAIMD
+from next_data import extraer_next_data
+from next_data_perezoso import NO_RESUELTO, PEREZOSA_POR_DEFECTO, NextDataPerezoso
 
 '''
 Script especializado en la extracción de información detallada de precios y promociones
@@ -32,6 +38,19 @@ headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
 }
 
+# Cache de respuestas en disco (cache_respuestas.py): permite iterar sobre el extractor sin volver a descargar
+USAR_CACHE_RESPUESTAS = True
+SOLO_CACHE = False  # True: reproduce el extractor solo con las páginas ya guardadas, sin ir a la red
+CACHE_RESPUESTAS_DIR = "Cache_Respuestas_Unimarc"
+
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
+# Decodificar de __NEXT_DATA__ solo pageProps.product.products[0] cuando ya trae nombre e ID
+# (next_data_perezoso.py); si no, se decodifica el documento completo para buscar en las queries.
+# Solo conviene sin orjson/msgspec (benchmark_next_data_perezoso.py)
+DECODIFICACION_PEREZOSA = PEREZOSA_POR_DEFECTO
+
 def leer_urls_desde_archivo(archivo):
     """Lee las URLs de productos desde un archivo de texto"""
     urls = []
@@ -55,23 +74,46 @@ def leer_urls_desde_archivo(archivo):
     
     return urls
 
-def extract_price_details(soup, url):
+def extract_price_details(html, url):
     """Extrae detalles específicos de precio y promociones de un producto"""
-    price_details = {
-        "url": url,
-        "fecha_extraccion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
     print(f"Extrayendo datos de precios desde {url}")
-    script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+    json_data_string = extraer_next_data(html)
 
-    if not script_tag or not script_tag.string:
+    if not json_data_string:
         print("No se encontró el JSON __NEXT_DATA__ o está vacío.")
         return None
     
+    documento = NextDataPerezoso(json_data_string)
+    if DECODIFICACION_PEREZOSA:
+        data = documento.parcial(RUTA_PRIMER_PRODUCTO)
+        if data is not NO_RESUELTO and identificacion_completa(NODO_PRIMER_PRODUCTO(data)):
+            return extract_price_details_from_json(data, url)
+
+    try:
+        data = documento.completo()
+    except codec_json.JSONDecodeError:
+        print("Error al decodificar el JSON de __NEXT_DATA__.")
+        return None
+    return extract_price_details_from_json(data, url)
+
+def identificacion_completa(product):
+    """¿products[0] trae nombre e ID? Entonces extract_price_details_from_json no consulta las queries"""
+    try:
+        if product and "item" in product:
+            identificacion = IDENTIFICACION_ITEM(product["item"])
+            return bool(identificacion["nombre_producto"] and identificacion["id_producto"])
+    except (IndexError, KeyError, TypeError):
+        pass
+    return False
+
+def extract_price_details_from_json(data, url):
+    """Extrae detalles de precio y promociones desde el __NEXT_DATA__ ya decodificado"""
+    price_details = {
+        "url": url,
+        "fecha_extraccion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    
     try:
-        data = json.loads(script_tag.string)
-        
         # Extraer información básica del producto para contexto
         product_name = None
         product_id = None
@@ -79,120 +121,58 @@ def extract_price_details(soup, url):
         # Buscar en diferentes rutas del JSON
         # 1. Buscar en props.pageProps.product.products[0]
         try:
-            product = data.get("props", {}).get("pageProps", {}).get("product", {}).get("products", [])[0]
+            product = NODO_PRIMER_PRODUCTO(data)
             if product:
                 # Extraer nombre e ID
                 if "item" in product:
-                    product_name = product["item"].get("nameComplete") or product["item"].get("name")
-                    product_id = product["item"].get("sku") or product["item"].get("itemId")
+                    identificacion = IDENTIFICACION_ITEM(product["item"])
+                    product_name = identificacion["nombre_producto"]
+                    product_id = identificacion["id_producto"]
                 
                 # Extraer información de precio
                 if "price" in product:
-                    price_data = product.get("price", {})
-                    price_details["precio_normal"] = price_data.get("listPrice")
-                    price_details["precio_oferta"] = price_data.get("price")
-                    price_details["precio_sin_descuento"] = price_data.get("priceWithoutDiscount")
-                    price_details["ahorro"] = price_data.get("saving")
-                    price_details["precio_unitario"] = price_data.get("ppum")
-                    price_details["precio_unitario_lista"] = price_data.get("ppumListPrice")
+                    price_details.update(PRECIO_BASE(product["price"]))
                 
                 # Extraer datos de promoción
                 if "priceDetail" in product:
-                    promo_data = product.get("priceDetail", {})
-                    price_details["detalles_precio"] = {
-                        "tipo_promocion": promo_data.get("promotionType"),
-                        "nombre_promocion": promo_data.get("promotionName"),
-                        "id_promocion": promo_data.get("promotionId"),
-                        "codigo_tag_promocional": promo_data.get("promotionalTagCode"),
-                        "precio_lista": promo_data.get("listPrice"),
-                        "precio_unitario_lista": promo_data.get("ppumListPrice"),
-                        "precio_descuento": promo_data.get("discountPrice"),
-                        "precio_unitario_descuento": promo_data.get("discountPpumPrice"),
-                        "porcentaje_descuento": promo_data.get("discountPercentage"),
-                        "mensaje_promocion": promo_data.get("promotionMessage"),
-                        "items_requeridos": promo_data.get("itemsRequiredForPromotion")
-                    }
+                    promo_data = product["priceDetail"]
+                    price_details["detalles_precio"] = DETALLE_PROMOCION(promo_data)
                     
                     # Extraer etiqueta promocional si existe
                     if "promotionalTag" in promo_data:
-                        promotional_tag = promo_data.get("promotionalTag", {})
-                        price_details["etiqueta_promocional"] = {
-                            "id_campania": promotional_tag.get("campaignId"),
-                            "texto": promotional_tag.get("text"),
-                            "color_texto": promotional_tag.get("textColor"),
-                            "color_fondo": promotional_tag.get("color")
-                        }
+                        price_details["etiqueta_promocional"] = ETIQUETA_PROMOCIONAL(promo_data["promotionalTag"])
                     
-                    # Extraer métodos de pago para promoción
-                    if "paymentMethod" in promo_data:
-                        payment_methods = promo_data.get("paymentMethod", [])
-                        if payment_methods:
-                            price_details["metodos_pago"] = payment_methods
-                    
-                    # Extraer membresías para promoción
-                    if "membership" in promo_data:
-                        memberships = promo_data.get("membership", [])
-                        if memberships:
-                            price_details["membresias"] = memberships
+                    # Extraer métodos de pago y membresías para promoción
+                    if promo_data.get("paymentMethod"):
+                        price_details["metodos_pago"] = promo_data["paymentMethod"]
+                    if promo_data.get("membership"):
+                        price_details["membresias"] = promo_data["membership"]
                 
                 # Extraer información de promoción adicional
                 if "promotion" in product:
-                    promotion = product.get("promotion", {})
-                    price_details["promocion_adicional"] = {
-                        "tiene_ahorro": promotion.get("hasSavings"),
-                        "nombre": promotion.get("name"),
-                        "tipo": promotion.get("type"),
-                        "codigo_descripcion": promotion.get("descriptionCode"),
-                        "mensaje_descripcion": promotion.get("descriptionMessage"),
-                        "precio": promotion.get("price"),
-                        "mensaje_oferta": promotion.get("offerMessage"),
-                        "ahorro": promotion.get("saving"),
-                        "precio_unitario": promotion.get("ppum")
-                    }
+                    price_details["promocion_adicional"] = PROMOCION_ADICIONAL(product["promotion"])
         except (IndexError, KeyError, TypeError):
             pass
         
         # 2. Buscar en la estructura dehydratedState si no se encontraron datos
         if not product_name or not product_id:
             try:
-                queries = data.get("props", {}).get("pageProps", {}).get("dehydratedState", {}).get("queries", [])
-                for query in queries:
-                    state_data = query.get("state", {}).get("data", {})
-                    products = state_data.get("products", [])
-                    if products and len(products) > 0:
-                        first_product = products[0]
-                        
+                for datos_query in indexar_queries(data).datos_con("products"):
+                    first_product = PRIMER_PRODUCTO_QUERY(datos_query)
+                    if first_product:
                         # Intentar extraer información básica
                         if "item" in first_product:
-                            product_name = product_name or first_product["item"].get("nameComplete") or first_product["item"].get("name")
-                            product_id = product_id or first_product["item"].get("sku") or first_product["item"].get("itemId")
+                            identificacion = IDENTIFICACION_ITEM(first_product["item"])
+                            product_name = product_name or identificacion["nombre_producto"]
+                            product_id = product_id or identificacion["id_producto"]
                         
                         # Si no se encontró información de precio anteriormente, intentar aquí
                         if "precio_normal" not in price_details and "price" in first_product:
-                            price_data = first_product.get("price", {})
-                            price_details["precio_normal"] = price_data.get("listPrice")
-                            price_details["precio_oferta"] = price_data.get("price")
-                            price_details["precio_sin_descuento"] = price_data.get("priceWithoutDiscount")
-                            price_details["ahorro"] = price_data.get("saving")
-                            price_details["precio_unitario"] = price_data.get("ppum")
-                            price_details["precio_unitario_lista"] = price_data.get("ppumListPrice")
+                            price_details.update(PRECIO_BASE(first_product["price"]))
                         
                         # Si no se encontraron detalles de promoción, intentar aquí
                         if "detalles_precio" not in price_details and "priceDetail" in first_product:
-                            promo_data = first_product.get("priceDetail", {})
-                            price_details["detalles_precio"] = {
-                                "tipo_promocion": promo_data.get("promotionType"),
-                                "nombre_promocion": promo_data.get("promotionName"),
-                                "id_promocion": promo_data.get("promotionId"),
-                                "codigo_tag_promocional": promo_data.get("promotionalTagCode"),
-                                "precio_lista": promo_data.get("listPrice"),
-                                "precio_unitario_lista": promo_data.get("ppumListPrice"),
-                                "precio_descuento": promo_data.get("discountPrice"),
-                                "precio_unitario_descuento": promo_data.get("discountPpumPrice"),
-                                "porcentaje_descuento": promo_data.get("discountPercentage"),
-                                "mensaje_promocion": promo_data.get("promotionMessage"),
-                                "items_requeridos": promo_data.get("itemsRequiredForPromotion")
-                            }
+                            price_details["detalles_precio"] = DETALLE_PROMOCION(first_product["priceDetail"])
             except (IndexError, KeyError, TypeError):
                 pass
         
@@ -209,9 +189,6 @@ def extract_price_details(soup, url):
         
         return price_details
         
-    except json.JSONDecodeError:
-        print("Error al decodificar el JSON de __NEXT_DATA__.")
-        return None
     except Exception as e:
         print(f"Error al extraer detalles de precio: {e}")
         return None
@@ -231,8 +208,7 @@ def save_price_detail_json(price_details, product_id):
         json_path = os.path.join(json_price_folder, json_filename)
         
         # Guardar los detalles en formato JSON
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(price_details, f, ensure_ascii=False, indent=4)
+        codec_json.escribir_archivo(json_path, price_details, compacto=JSON_COMPACTO)
         
         print(f"Detalles de precio guardados en archivo individual: {json_path}")
         return True
@@ -240,31 +216,45 @@ def save_price_detail_json(price_details, product_id):
         print(f"Error al guardar archivo JSON individual para producto {product_id}: {e}")
         return False
 
-def scrape_price_details(urls_list):
+def guardar_detalle_precio(price_details, url):
+    """Guarda el archivo individual de un producto, nombrado con su ID (o el de la URL)"""
+    product_id = price_details.get("id_producto", url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1])
+    return save_price_detail_json(price_details, product_id)
+
+def procesar_documento(url, data, html):
+    """
+    Extractor de precios para scraper-detalles-todos.py: recibe el __NEXT_DATA__ ya decodificado
+    (None si la página no lo trae) y guarda el archivo individual del producto.
+    """
+    if data is None:
+        return None
+    price_details = extract_price_details_from_json(data, url)
+    if price_details:
+        guardar_detalle_precio(price_details, url)
+    return price_details
+
+def scrape_price_details(urls_list, cliente=None):
     """Procesa cada URL de producto y extrae sus detalles de precio"""
     all_price_details = []
     total_urls = len(urls_list)
+    if cliente is None:
+        cliente = ClienteHttp(limitador=LimitadorAIMD(), headers=headers)
     
     for idx, url in enumerate(urls_list, 1):
         try:
             print(f"\n[{idx}/{total_urls}] Procesando URL: {url}")
-            response = requests.get(url, headers=headers)
+            response = cliente.get(url)
             
             if response.status_code != 200:
                 print(f"Error al acceder a la URL {url}: {response.status_code}")
                 continue
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            
             # Extraer detalles de precio
-            price_details = extract_price_details(soup, url)
+            price_details = extract_price_details(response.content, url)
             
             if price_details:
-                # Obtener ID del producto para el nombre del archivo
-                product_id = price_details.get("id_producto", url.split("/")[-2] if url.endswith("/p") else url.split("/")[-1])
-                
                 # Guardar en archivo JSON individual
-                save_price_detail_json(price_details, product_id)
+                guardar_detalle_precio(price_details, url)
                 
                 # Añadir al listado completo
                 all_price_details.append(price_details)
@@ -272,21 +262,30 @@ def scrape_price_details(urls_list):
             else:
                 print(f"No se pudieron extraer detalles de precio para la URL: {url}")
             
-            # Espera aleatoria para evitar bloqueos
-            wait_time = random.uniform(1.0, 2.5)
-            print(f"Esperando {wait_time:.2f} segundos antes de la siguiente solicitud...")
-            time.sleep(wait_time)
-            
         except Exception as e:
             print(f"Error al procesar la URL {url}: {e}")
     
     return all_price_details
 
-def main():
-    # Crear directorios necesarios
+def guardar_consolidado(detalles_precios):
+    """Guarda todos los detalles de precio en un único archivo JSON consolidado"""
     json_folder = "Precios_Consolidados_Unimarc"
     os.makedirs(json_folder, exist_ok=True)
     
+    if detalles_precios:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"precios_productos_unimarc_{len(detalles_precios)}_productos_{timestamp}.json"
+        json_path = os.path.join(json_folder, json_filename)
+        
+        codec_json.escribir_archivo(json_path, detalles_precios, compacto=JSON_COMPACTO)
+        
+        print(f"\nTotal de detalles de precios extraídos: {len(detalles_precios)}")
+        print(f"Archivo JSON consolidado guardado como: {json_path}")
+        print(f"Además, cada producto ha sido guardado en su propio archivo JSON en la carpeta Precios_Productos_Unimarc")
+    else:
+        print("\nNo se lograron extraer detalles de precios de productos.")
+
+def main():
     # Definir archivo de entrada
     archivo_urls = "Detail URLs Unimarc/urls-productos.txt"
     
@@ -302,22 +301,18 @@ def main():
     print(f"Iniciando extracción de detalles de precios para {len(urls_productos)} productos")
     print(f"{'='*50}")
     
-    detalles_precios = scrape_price_details(urls_productos)
+    cache_respuestas = CacheRespuestas(CACHE_RESPUESTAS_DIR, solo_cache=SOLO_CACHE) if USAR_CACHE_RESPUESTAS else None
+    cliente = ClienteHttp(limitador=LimitadorAIMD(), headers=headers, cache_respuestas=cache_respuestas)
+    detalles_precios = scrape_price_details(urls_productos, cliente)
+    cliente.close()
+
+    if cache_respuestas is not None:
+        print(cache_respuestas.resumen())
+        cache_respuestas.expirar()
+        cache_respuestas.close()
     
     # Guardar resultados consolidados en formato JSON
-    if detalles_precios:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        json_filename = f"precios_productos_unimarc_{len(detalles_precios)}_productos_{timestamp}.json"
-        json_path = os.path.join(json_folder, json_filename)
-        
-        with open(json_path, "w", encoding="utf-8") as f_json:
-            json.dump(detalles_precios, f_json, ensure_ascii=False, indent=4)
-        
-        print(f"\nTotal de detalles de precios extraídos: {len(detalles_precios)}")
-        print(f"Archivo JSON consolidado guardado como: {json_path}")
-        print(f"Además, cada producto ha sido guardado en su propio archivo JSON en la carpeta Precios_Productos_Unimarc")
-    else:
-        print("\nNo se lograron extraer detalles de precios de productos.")
+    guardar_consolidado(detalles_precios)
 
 if __name__ == "__main__":
     main()
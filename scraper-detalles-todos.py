@@ -0,0 +1,174 @@
+import importlib
+from datetime import datetime
+
+import codec_json
+from cache_respuestas import CacheRespuestas
+from cliente_http import ClienteHttp
+from limitador_tasa import LimitadorAIMD
+from motor_descargas import descargar_y_procesar
+from next_data import extraer_next_data
+
+'''
+EXTRACCIÓN DE DETALLES CON UNA SOLA DESCARGA POR PRODUCTO
+scraper-detalles-precio.py, scraper-detalles-dentro-producto.py, get-detalles-nutri-precios-desc-etc.py
+y scraper_tablas_nutricionales_v2.py descargan cada uno la misma lista de "Detail URLs Unimarc" para
+sacar una parte distinta de la misma página. Correrlos todos costaba 4 veces las solicitudes y el
+parseo de __NEXT_DATA__.
+
+Este script descarga cada URL de producto una sola vez (motor_descargas.py, con el límite en vuelo
+y el limitador de tasa habituales), decodifica __NEXT_DATA__ una sola vez y entrega el documento a
+cada extractor registrado en EXTRACTORES_ACTIVOS:
+
+- precios:               scraper-detalles-precio.py
+- detalles:              scraper-detalles-dentro-producto.py
+- nutricion_descripcion: get-detalles-nutri-precios-desc-etc.py
+- tablas_nutricionales:  scraper_tablas_nutricionales_v2.py
+- raw_json:              __NEXT_DATA__ completo por producto (RAW_JSON_Productos_Unimarc)
+- html:                  HTML de cada página tal como llegó (HTML_Productos_Unimarc)
+
+Cada extractor escribe sus propios archivos, en las mismas carpetas y con el mismo formato que su
+script independiente: procesar(url, data, html) se llama por página (data es None si la página no
+trae un __NEXT_DATA__ válido) y consolidar(resultados), si existe, recibe al final los resultados
+no vacíos en el orden de las URLs. Para agregar un extractor basta con registrarlo en
+registrar_extractores().
+'''
+
+# Encabezados para simular un navegador
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+}
+
+# Archivo con las URLs de producto (el mismo que usan los scripts independientes)
+ARCHIVO_URLS = "Detail URLs Unimarc/urls-productos.txt"
+
+# Extractores que se aplican a cada página, en este orden
+EXTRACTORES_ACTIVOS = ["precios", "detalles", "nutricion_descripcion", "tablas_nutricionales", "raw_json", "html"]
+
+# Máximo de solicitudes de producto simultáneas
+MAX_EN_VUELO = 8
+
+# Cache de respuestas en disco (cache_respuestas.py): permite iterar sobre los extractores sin volver a descargar
+USAR_CACHE_RESPUESTAS = True
+SOLO_CACHE = False  # True: reproduce los extractores solo con las páginas ya guardadas, sin ir a la red
+CACHE_RESPUESTAS_DIR = "Cache_Respuestas_Unimarc"
+
+
+class Extractor:
+    """Extractor registrado: procesar(url, data, html) por página y consolidar(resultados) al final"""
+
+    def __init__(self, nombre, procesar, consolidar=None):
+        self.nombre = nombre
+        self.procesar = procesar
+        self.consolidar = consolidar
+
+
+def registrar_extractores():
+    """Extractores disponibles por nombre; cada uno vive en su script independiente"""
+    precio = importlib.import_module("scraper-detalles-precio")
+    dentro_producto = importlib.import_module("scraper-detalles-dentro-producto")
+    nutricion_descripcion = importlib.import_module("get-detalles-nutri-precios-desc-etc")
+    tablas = importlib.import_module("scraper_tablas_nutricionales_v2")
+
+    extractores = [
+        Extractor("precios", precio.procesar_documento, precio.guardar_consolidado),
+        Extractor("detalles", dentro_producto.procesar_documento, dentro_producto.guardar_consolidado),
+        # Mismo directorio consolidado que "detalles": se usa otro nombre de archivo para no pisarlo
+        Extractor("nutricion_descripcion", nutricion_descripcion.procesar_documento,
+                  lambda resultados: nutricion_descripcion.guardar_consolidado(
+                      resultados, nombre_base="detalles_nutricion_descripcion_unimarc")),
+        Extractor("tablas_nutricionales", tablas.procesar_documento, tablas.guardar_consolidado),
+        Extractor("raw_json", nutricion_descripcion.procesar_raw_json),
+        Extractor("html", lambda url, data, html: dentro_producto.guardar_html(html, url)),
+    ]
+    return {extractor.nombre: extractor for extractor in extractores}
+
+
+def leer_urls_desde_archivo(archivo):
+    """Lee las URLs de productos (sin duplicados, en el orden del archivo)"""
+    try:
+        with open(archivo, 'r', encoding='utf-8') as file:
+            urls = [linea.strip() for linea in file if linea.strip() and not linea.strip().startswith('//')]
+    except FileNotFoundError:
+        print(f"El archivo {archivo} no existe.")
+        return None
+    urls = list(dict.fromkeys(urls))
+    print(f"URLs de productos cargadas desde {archivo}: {len(urls)} URLs únicas")
+    return urls
+
+
+def decodificar_next_data(html, url):
+    """__NEXT_DATA__ decodificado de la página, o None si no existe o no es JSON válido"""
+    json_data_string = extraer_next_data(html)
+    if not json_data_string:
+        print(f"No se encontró __NEXT_DATA__ o estaba vacío para {url}")
+        return None
+    try:
+        return codec_json.loads(json_data_string)
+    except codec_json.JSONDecodeError:
+        print(f"Error al decodificar el JSON de __NEXT_DATA__ para {url}")
+        return None
+
+
+def procesar_respuesta(url, response, extractores):
+    """Decodifica la página una vez y la pasa a cada extractor; devuelve {nombre: resultado}"""
+    if response.status_code != 200:
+        print(f"Error al acceder a la URL {url}: {response.status_code}")
+        return None
+
+    html = response.content
+    data = decodificar_next_data(html, url)
+    resultados = {}
+    for extractor in extractores:
+        try:
+            resultados[extractor.nombre] = extractor.procesar(url, data, html)
+        except Exception as e:
+            print(f"Error en el extractor '{extractor.nombre}' para {url}: {e}")
+            resultados[extractor.nombre] = None
+    return resultados
+
+
+def main():
+    urls_productos = leer_urls_desde_archivo(ARCHIVO_URLS)
+    if not urls_productos:
+        print("No se pudieron cargar las URLs de productos. Verifique el archivo.")
+        return
+
+    registro = registrar_extractores()
+    extractores = [registro[nombre] for nombre in EXTRACTORES_ACTIVOS]
+
+    print(f"\n{'='*50}")
+    print(f"Extracción de {len(urls_productos)} productos con {len(extractores)} extractores: "
+          f"{', '.join(EXTRACTORES_ACTIVOS)}")
+    print(f"{'='*50}")
+
+    cache_respuestas = CacheRespuestas(CACHE_RESPUESTAS_DIR, solo_cache=SOLO_CACHE) if USAR_CACHE_RESPUESTAS else None
+    cliente = ClienteHttp(limitador=LimitadorAIMD(), headers=headers, cache_respuestas=cache_respuestas)
+    resultados = descargar_y_procesar(
+        urls_productos, lambda url, response: procesar_respuesta(url, response, extractores),
+        cliente=cliente, max_en_vuelo=MAX_EN_VUELO
+    )
+    cliente.close()
+
+    if cache_respuestas is not None:
+        print(cache_respuestas.resumen())
+        cache_respuestas.expirar()
+        cache_respuestas.close()
+
+    # Cada extractor guarda su archivo consolidado con los resultados de todas las páginas
+    for extractor in extractores:
+        if extractor.consolidar is None:
+            continue
+        resultados_extractor = [
+            resultado[extractor.nombre] for resultado in resultados
+            if resultado and resultado.get(extractor.nombre)
+        ]
+        extractor.consolidar(resultados_extractor)
+
+    procesadas = sum(1 for resultado in resultados if resultado)
+    print(f"\nPáginas descargadas y procesadas: {procesadas}/{len(urls_productos)} "
+          f"(una descarga por producto para {len(extractores)} extractores)")
+    print(f"Proceso completado - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
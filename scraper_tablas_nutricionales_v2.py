@@ -1,46 +1,86 @@
 # -*- coding: utf-8 -*-
 import requests
-from bs4 import BeautifulSoup
-import json
 import os
 from datetime import datetime
-import time # Opcional, para pausas entre solicitudes
+
+import codec_json
+from cache_respuestas import CacheRespuestas
+from cliente_http import ClienteHttp
+from especificaciones_unimarc import RUTA_PRIMER_PRODUCTO
+from indice_queries import IndiceQueries
+from next_data import extraer_next_data
+from next_data_perezoso import NextDataPerezoso
+from recorrido_json import buscar_clave
 
 # Encabezados para simular un navegador
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, Gecko) Chrome/123.0.0.0 Safari/537.36"
 }
 
-def find_key_in_json(data_item, target_key):
-    """Busca recursivamente una clave en un diccionario o lista anidada (similar a JSON)."""
-    if isinstance(data_item, dict):
-        if target_key in data_item:
-            return data_item[target_key]
-        for key, value in data_item.items():
-            result = find_key_in_json(value, target_key)
-            if result is not None:
-                return result
-    elif isinstance(data_item, list):
-        for item_element in data_item:
-            result = find_key_in_json(item_element, target_key)
-            if result is not None:
-                return result
-    return None
-
-def extract_nutritional_info_from_product_page(product_url, session):
+# Cache de respuestas en disco (cache_respuestas.py): permite iterar sobre el extractor sin volver a descargar
+USAR_CACHE_RESPUESTAS = True
+SOLO_CACHE = False  # True: reproduce el extractor solo con las páginas ya guardadas, sin ir a la red
+CACHE_RESPUESTAS_DIR = "Cache_Respuestas_Unimarc"
+
+# JSON compacto (sin indentación): archivos más chicos y escritura más rápida (codec_json.py)
+JSON_COMPACTO = False
+
+# Decodificar de __NEXT_DATA__ solo pageProps.product.products[0] (next_data_perezoso.py); el
+# documento completo se decodifica solo si la tabla no está ahí
+DECODIFICACION_PEREZOSA = True
+
+def extract_nutritional_info_from_product_page(product_url, cliente):
     """Extrae la información de 'nutritional_tables_sets' de la página de un producto."""
     print(f"Procesando URL del producto: {product_url}")
     try:
-        response = session.get(product_url, headers=headers, timeout=30)
+        response = cliente.get(product_url)
         response.raise_for_status()  # Lanza una excepción para errores HTTP (4xx o 5xx)
-        soup = BeautifulSoup(response.text, "html.parser")
-        script_tag = soup.find("script", {"id": "__NEXT_DATA__"})
+        json_data_string = extraer_next_data(response.content)
 
-        if not (script_tag and script_tag.string):
+        if not json_data_string:
             print(f"No se encontró __NEXT_DATA__ o estaba vacío para {product_url}")
             return None
 
-        data = json.loads(script_tag.string)
+        documento = NextDataPerezoso(json_data_string)
+        if DECODIFICACION_PEREZOSA:
+            nutritional_info = tabla_en_primer_producto(documento.valor_en_ruta(RUTA_PRIMER_PRODUCTO))
+            if nutritional_info is not None:
+                print(f"Tabla nutricional encontrada en pageProps.product.products[0] para {product_url}")
+                return nutritional_info
+
+        data = documento.completo()
+        return extract_nutritional_info_from_json(data, product_url)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error en la solicitud para {product_url}: {e}")
+        return None
+    except codec_json.JSONDecodeError:
+        print(f"Error al decodificar JSON de __NEXT_DATA__ para {product_url}. El contenido podría no ser JSON válido.")
+        # Opcional: guardar response.text para análisis
+        return None
+    except Exception as e:
+        print(f"Error inesperado procesando {product_url}: {e}")
+        # import traceback
+        # traceback.print_exc() # Para depuración más detallada
+        return None
+
+def tabla_en_primer_producto(first_product):
+    """'nutritional_tables_sets' de pageProps.product.products[0] o de su 'item', o None"""
+    if not isinstance(first_product, dict):
+        return None
+    # Primero, buscar directamente en el objeto del producto
+    nutritional_info = first_product.get("nutritional_tables_sets")
+
+    # Si no está ahí, buscar dentro de su 'item'
+    if nutritional_info is None:
+        item_data = first_product.get("item")
+        if item_data and isinstance(item_data, dict):
+            nutritional_info = item_data.get("nutritional_tables_sets")
+    return nutritional_info
+
+def extract_nutritional_info_from_json(data, product_url):
+    """Busca 'nutritional_tables_sets' en el __NEXT_DATA__ ya decodificado de la página de un producto."""
+    try:
         nutritional_info = None
         
         # Intentar extraer de la ruta pageProps.product.products[0]...
@@ -50,16 +90,7 @@ def extract_nutritional_info_from_product_page(product_url, session):
             if product_section:
                 products_list = product_section.get("products", [])
                 if products_list and isinstance(products_list, list) and len(products_list) > 0:
-                    first_product = products_list[0]
-                    if isinstance(first_product, dict):
-                        # Primero, buscar directamente en el objeto del producto
-                        nutritional_info = first_product.get("nutritional_tables_sets")
-                        
-                        # Si no está ahí, buscar dentro de su 'item'
-                        if nutritional_info is None:
-                            item_data = first_product.get("item")
-                            if item_data and isinstance(item_data, dict):
-                                nutritional_info = item_data.get("nutritional_tables_sets")
+                    nutritional_info = tabla_en_primer_producto(products_list[0])
             
             if nutritional_info is not None:
                 print(f"Tabla nutricional encontrada en pageProps.product.products[0] para {product_url}")
@@ -69,15 +100,12 @@ def extract_nutritional_info_from_product_page(product_url, session):
             dehydrated_state = page_props.get("dehydratedState", {})
             queries = dehydrated_state.get("queries", [])
             if queries:
-                for query in queries:
-                    query_data_root = query.get("state", {}).get("data", {})
-                    if query_data_root:
-                        # Buscar recursivamente la clave dentro de los datos de esta query
-                        # Esto es más robusto ya que la estructura interna de query_data_root puede variar
-                        nutritional_info_in_query = find_key_in_json(query_data_root, "nutritional_tables_sets")
-                        if nutritional_info_in_query is not None:
-                            print(f"Tabla nutricional encontrada en dehydratedState.queries para {product_url}")
-                            return nutritional_info_in_query
+                # Un solo recorrido sobre los state.data de todas las queries (indice_queries.py): la
+                # estructura interna de los datos de cada query puede variar
+                nutritional_info_in_query = buscar_clave(IndiceQueries(queries).datos, "nutritional_tables_sets")
+                if nutritional_info_in_query is not None:
+                    print(f"Tabla nutricional encontrada en dehydratedState.queries para {product_url}")
+                    return nutritional_info_in_query
         
         # Si después de todos los intentos no se encontró
         print(f"No se encontró 'nutritional_tables_sets' en las rutas esperadas para {product_url}")
@@ -93,26 +121,48 @@ def extract_nutritional_info_from_product_page(product_url, session):
         debug_filename = f"debug_next_data_no_nutritional_{sanitized_url_part}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         debug_filepath = os.path.join(output_dir_debug, debug_filename)
         try:
-            with open(debug_filepath, "w", encoding="utf-8") as f_debug:
-                json.dump(data, f_debug, ensure_ascii=False, indent=4)
+            codec_json.escribir_archivo(debug_filepath, data, compacto=JSON_COMPACTO)
             print(f"__NEXT_DATA__ completo guardado para depuración en: {debug_filepath}")
         except Exception as e_write:
             print(f"Error al guardar archivo de depuración {debug_filepath}: {e_write}")
         return None
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error en la solicitud para {product_url}: {e}")
-        return None
-    except json.JSONDecodeError:
-        print(f"Error al decodificar JSON de __NEXT_DATA__ para {product_url}. El contenido podría no ser JSON válido.")
-        # Opcional: guardar response.text para análisis
-        return None
     except Exception as e:
         print(f"Error inesperado procesando {product_url}: {e}")
-        # import traceback
-        # traceback.print_exc() # Para depuración más detallada
         return None
 
+def procesar_documento(url, data, html):
+    """
+    Extractor de tablas nutricionales para scraper-detalles-todos.py: recibe el __NEXT_DATA__ ya
+    decodificado (None si la página no lo trae) y devuelve el registro del resultado consolidado.
+    """
+    if data is None:
+        return None
+    nutritional_data = extract_nutritional_info_from_json(data, url)
+    if nutritional_data is None:
+        return None
+    return {
+        "url_producto": url,
+        "tabla_nutricional_sets": nutritional_data
+    }
+
+def guardar_consolidado(results):
+    """Guarda todas las tablas nutricionales extraídas en un único archivo JSON"""
+    output_nutritional_dir = "Nutritional Data Unimarc"
+    os.makedirs(output_nutritional_dir, exist_ok=True)
+
+    if results:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"tablas_nutricionales_unimarc_{timestamp}.json"
+        output_filepath = os.path.join(output_nutritional_dir, output_filename)
+        
+        try:
+            codec_json.escribir_archivo(output_filepath, results, compacto=JSON_COMPACTO)
+            print(f"\nProceso completado. {len(results)} registros de tablas nutricionales guardados en: {output_filepath}")
+        except Exception as e:
+            print(f"Error al guardar el archivo JSON de resultados {output_filepath}: {e}")
+    else:
+        print("\nNo se pudo extraer ninguna tabla nutricional o todas las URLs fallaron / no contenían la tabla.")
+
 def main_nutritional_scraper():
     input_urls_dir = "Detail URLs Unimarc"
     output_nutritional_dir = "Nutritional Data Unimarc"
@@ -149,10 +199,11 @@ def main_nutritional_scraper():
     print(f"Total de URLs de productos únicas a procesar: {len(unique_product_urls)}")
 
     results = []
-    with requests.Session() as session: # Usar una sesión para eficiencia
+    cache_respuestas = CacheRespuestas(CACHE_RESPUESTAS_DIR, solo_cache=SOLO_CACHE) if USAR_CACHE_RESPUESTAS else None
+    with ClienteHttp(headers=headers, cache_respuestas=cache_respuestas) as cliente: # Timeouts, reintentos y circuit breaker compartidos
         for i, product_url in enumerate(unique_product_urls):
             print(f"Procesando {i+1}/{len(unique_product_urls)}: {product_url}")
-            nutritional_data = extract_nutritional_info_from_product_page(product_url, session)
+            nutritional_data = extract_nutritional_info_from_product_page(product_url, cliente)
             # Guardar incluso si nutritional_data es None o una lista vacía, para saber qué URLs se procesaron
             # El usuario pidió guardar el JSON de la tabla, por lo que si es None, no se guarda esa entrada.
             # Si la tabla es una lista vacía (ej. nutritional_tables_sets: []), sí se guarda.
@@ -161,21 +212,13 @@ def main_nutritional_scraper():
                     "url_producto": product_url,
                     "tabla_nutricional_sets": nutritional_data
                 })
-            # time.sleep(0.1) # Pausa opcional para ser cortés con el servidor
 
-    if results:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"tablas_nutricionales_unimarc_{timestamp}.json"
-        output_filepath = os.path.join(output_nutritional_dir, output_filename)
-        
-        try:
-            with open(output_filepath, "w", encoding="utf-8") as f_out:
-                json.dump(results, f_out, ensure_ascii=False, indent=4)
-            print(f"\nProceso completado. {len(results)} registros de tablas nutricionales guardados en: {output_filepath}")
-        except Exception as e:
-            print(f"Error al guardar el archivo JSON de resultados {output_filepath}: {e}")
-    else:
-        print("\nNo se pudo extraer ninguna tabla nutricional o todas las URLs fallaron / no contenían la tabla.")
+    if cache_respuestas is not None:
+        print(cache_respuestas.resumen())
+        cache_respuestas.expirar()
+        cache_respuestas.close()
+
+    guardar_consolidado(results)
 
 if __name__ == "__main__":
     main_nutritional_scraper()
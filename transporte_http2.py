@@ -0,0 +1,145 @@
+import asyncio
+import importlib.util
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+    # h2 no se usa directamente: solo se comprueba que esté instalado (httpx lo necesita para http2=True)
+    HTTP2_DISPONIBLE = importlib.util.find_spec("h2") is not None
+except ImportError:
+    httpx = None
+    HTTP2_DISPONIBLE = False
+
+'''
+TRANSPORTE HTTP/2 OPCIONAL (httpx + h2)
+Con requests todas las descargas van por HTTP/1.1: una solicitud a la vez por conexión, de modo que
+para tener N solicitudes en vuelo hacen falta N sockets (y N handshakes TLS).
+SesionHttp2 envuelve un httpx.AsyncClient con http2=True: muchas solicitudes de listados y de detalles
+comparten una única conexión multiplexada.
+
+- SesionHttp2.get() tiene la forma de requests.Session.get() y devuelve un requests.Response, así que
+  se pasa como `sesion` a ClienteHttp (cliente_http.py) sin tocar el resto de los scripts.
+- Internamente usa httpx.AsyncClient en un event loop propio (un hilo): los hilos de descarga envían
+  sus solicitudes a ese loop. El cliente HTTP/2 síncrono de httpx no es seguro con varios hilos
+  compartiendo una conexión (puede enviar streams fuera de orden), el asíncrono en un único loop sí.
+- Los errores de httpx se traducen a las excepciones de requests (ConnectionError, Timeout, ...)
+  para que los reintentos, el circuit breaker y los `except` existentes sigan funcionando.
+- Vuelta automática a HTTP/1.1:
+    * si el servidor no ofrece h2 en la negociación TLS (ALPN), httpx usa HTTP/1.1;
+    * si un host falla con un error de protocolo HTTP/2, ese host pasa a usar HTTP/1.1 el resto de la corrida;
+    * si httpx o h2 no están instalados, crear_sesion(http2=True) (cliente_http.py) devuelve una requests.Session.
+- benchmark_http2.py compara ambos transportes contra servidores locales.
+'''
+
+HTTP2_MAX_CONEXIONES = 10
+
+
+def _a_response_requests(respuesta_httpx, url):
+    """Convierte un httpx.Response (ya leído) en un requests.Response equivalente"""
+    response = requests.Response()
+    response.status_code = respuesta_httpx.status_code
+    response.reason = respuesta_httpx.reason_phrase
+    response.url = str(respuesta_httpx.url) or url
+    response.headers = CaseInsensitiveDict(respuesta_httpx.headers.items())
+    response._content = respuesta_httpx.content
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = respuesta_httpx.elapsed
+    response.http_version = respuesta_httpx.http_version
+    response.bytes_comprimidos = respuesta_httpx.num_bytes_downloaded
+    return response
+
+
+def _timeout_httpx(timeout):
+    """Traduce el timeout de requests (número o tupla conexión/lectura) a httpx.Timeout"""
+    if isinstance(timeout, tuple):
+        conexion, lectura = timeout
+        return httpx.Timeout(lectura, connect=conexion)
+    return httpx.Timeout(timeout)
+
+
+def _traducir_excepcion(e):
+    """Excepción de requests equivalente a un error de httpx"""
+    if isinstance(e, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(e))
+    if isinstance(e, (httpx.NetworkError, httpx.RemoteProtocolError)):
+        return requests.exceptions.ConnectionError(str(e))
+    if isinstance(e, httpx.DecodingError):
+        return requests.exceptions.ContentDecodingError(str(e))
+    if isinstance(e, httpx.TooManyRedirects):
+        return requests.exceptions.TooManyRedirects(str(e))
+    return requests.exceptions.RequestException(str(e))
+
+
+class SesionHttp2:
+    """Sesión con la interfaz de requests.Session.get() sobre un httpx.AsyncClient con HTTP/2"""
+
+    def __init__(self, conocimiento_previo=False, max_conexiones=HTTP2_MAX_CONEXIONES):
+        # conocimiento_previo=True habla HTTP/2 sin TLS (h2c) desde el primer byte; solo sirve
+        # para servidores que lo aceptan, como el servidor local de benchmark_http2.py
+        self._limites = httpx.Limits(max_connections=max_conexiones, max_keepalive_connections=max_conexiones)
+        self._cliente_h2 = httpx.AsyncClient(http1=not conocimiento_previo, http2=True,
+                                             limits=self._limites, follow_redirects=True)
+        self._cliente_h1 = None
+        self._hosts_http1 = set()
+        self.headers = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._loop.run_forever, name="transporte-http2", daemon=True)
+        self._hilo.start()
+
+    def _cliente_para(self, host):
+        """Cliente a usar para el host (solo se llama desde el loop, no necesita lock)"""
+        if host not in self._hosts_http1:
+            return self._cliente_h2
+        if self._cliente_h1 is None:
+            self._cliente_h1 = httpx.AsyncClient(http1=True, http2=False, limits=self._limites,
+                                                 follow_redirects=True)
+        return self._cliente_h1
+
+    async def _get(self, url, host, opciones):
+        cliente = self._cliente_para(host)
+        try:
+            return await cliente.get(url, **opciones)
+        except httpx.RemoteProtocolError as e:
+            if cliente is not self._cliente_h2:
+                raise
+            print(f"  Error de protocolo HTTP/2 con {host} ({e}). Se usará HTTP/1.1 para este host")
+            self._hosts_http1.add(host)
+            return await self._cliente_para(host).get(url, **opciones)
+
+    def get(self, url, headers=None, timeout=None, params=None, allow_redirects=True, **kwargs):
+        host = urlparse(url).netloc
+        cabeceras = {**self.headers, **(headers or {})}
+        opciones = {"headers": cabeceras, "params": params, "follow_redirects": allow_redirects}
+        if timeout is not None:
+            opciones["timeout"] = _timeout_httpx(timeout)
+        futuro = asyncio.run_coroutine_threadsafe(self._get(url, host, opciones), self._loop)
+        try:
+            respuesta = futuro.result()
+        except httpx.HTTPError as e:
+            raise _traducir_excepcion(e) from e
+        return _a_response_requests(respuesta, url)
+
+    async def _cerrar_clientes(self):
+        await self._cliente_h2.aclose()
+        if self._cliente_h1 is not None:
+            await self._cliente_h1.aclose()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._cerrar_clientes(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
@@ -0,0 +1,112 @@
+import queue
+import threading
+
+'''
+TUBERÍA CONTINUA: LISTADOS -> URLs ÚNICAS -> DETALLES
+main-scrap.py y Scrap Unificado Unimarc.py recorrían primero todos los listados, juntaban las URLs de
+detalle en una lista, les quitaban los duplicados con set() y recién entonces descargaban el primer
+producto. Con muchas categorías pasaban horas antes de tener un solo producto guardado, y la lista
+completa de URLs (y de productos de listado) quedaba en memoria.
+
+ejecutar_tuberia() conecta las etapas con una cola acotada:
+
+- Listados (hilo "listados"): primero se emiten las `urls_iniciales` (p. ej. las pendientes de una
+  corrida anterior, frontera.py); después recorrer_listado(url, emitir) recorre cada URL de listado y
+  llama a emitir(urls_de_detalle) por cada página apenas la extrae.
+- Cola acotada (ColaCerrable, TAMANO_COLA_POR_DEFECTO URLs): si los detalles van atrasados, emitir()
+  espera a que haya lugar y los listados se frenan (contrapresión) en vez de acumular URLs.
+- URLs únicas (sin_repetir): descarta las URLs vacías y las ya vistas en la corrida, en el orden
+  en que llegan.
+- Detalles (hilo que llama): descargar_detalles(urls) recibe el iterable de URLs únicas, que bloquea
+  hasta que llega la siguiente y termina cuando se recorrieron todos los listados. Se usa con
+  motor_descargas.descargar_y_procesar_flujo, que entrega cada producto a los archivos de salida
+  apenas está listo.
+
+Si la etapa de detalles falla, la cola se abandona (los listados dejan de esperar y descartan lo que
+emiten) y la excepción se propaga; un error en los listados se propaga al terminar los detalles de
+las URLs ya emitidas.
+'''
+
+# URLs de detalle que pueden esperar en la cola entre los listados y los detalles
+TAMANO_COLA_POR_DEFECTO = 256
+
+_FIN = object()
+
+
+class ColaCerrable:
+    """Cola acotada que se recorre con for hasta que el productor la cierra"""
+
+    def __init__(self, maximo=TAMANO_COLA_POR_DEFECTO):
+        self._cola = queue.Queue(maxsize=maximo)
+        self._abandonada = False
+
+    def poner(self, item):
+        """Agrega un item; si la cola está llena, espera (contrapresión)"""
+        if not self._abandonada:
+            self._cola.put(item)
+
+    def cerrar(self):
+        """Marca el final: el recorrido termina después del último item"""
+        if not self._abandonada:
+            self._cola.put(_FIN)
+
+    def abandonar(self):
+        """El consumidor ya no lee: se descarta lo pendiente y el productor deja de esperar"""
+        self._abandonada = True
+        while True:
+            try:
+                self._cola.get_nowait()
+            except queue.Empty:
+                return
+
+    def __iter__(self):
+        while True:
+            item = self._cola.get()
+            if item is _FIN:
+                return
+            yield item
+
+
+def sin_repetir(urls):
+    """URLs no vacías, cada una la primera vez que aparece"""
+    vistas = set()
+    for url in urls:
+        if url and url not in vistas:
+            vistas.add(url)
+            yield url
+
+
+def ejecutar_tuberia(urls_listado, recorrer_listado, descargar_detalles, tamano_cola=TAMANO_COLA_POR_DEFECTO,
+                     urls_iniciales=()):
+    """
+    Recorre los listados en un hilo y descarga los detalles en el hilo actual a medida que aparecen
+    sus URLs. Devuelve lo que devuelva descargar_detalles(urls_unicas).
+    """
+    cola = ColaCerrable(tamano_cola)
+    errores = []
+
+    def emitir(urls_detalle):
+        for url in urls_detalle:
+            cola.poner(url)
+
+    def recorrer_listados():
+        try:
+            emitir(urls_iniciales)
+            for url in urls_listado:
+                recorrer_listado(url, emitir)
+        except BaseException as e:
+            errores.append(e)
+        finally:
+            cola.cerrar()
+
+    hilo_listados = threading.Thread(target=recorrer_listados, name="listados", daemon=True)
+    hilo_listados.start()
+    try:
+        resultado = descargar_detalles(sin_repetir(cola))
+    except BaseException:
+        cola.abandonar()
+        raise
+    hilo_listados.join()
+    if errores:
+        raise errores[0]
+    return resultado